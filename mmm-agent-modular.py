@@ -87,6 +87,14 @@ def main():
         # Create agent
         agent = AgentFactory.create_agent(args.agent_type, args.config)
 
+        # Use uvloop's faster event loop when it's installed
+        if sys.platform != 'win32':
+            try:
+                import uvloop
+                asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            except ImportError:
+                pass
+
         # Run agent
         asyncio.run(agent.run_with_cleanup())
 
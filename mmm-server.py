@@ -46,8 +46,11 @@ class DistributedMeshyMcMapfaceServer:
         # Get logger (logging setup handled by main function)
         self.logger = logging.getLogger(__name__)
         
+        # Queues of connected /api/events (server-sent events) clients
+        self.event_subscribers = set()
+        
         # Web app
-        self.app = web.Application(middlewares=[self.auth_middleware])
+        self.app = web.Application(middlewares=[self.auth_middleware, self.compression_middleware])
         self.setup_routes()
     
     async def setup_database(self):
@@ -270,6 +273,7 @@ class DistributedMeshyMcMapfaceServer:
         self.app.router.add_get('/api/routes', self.get_routes)
         self.app.router.add_get('/api/stats', self.get_stats)
         self.app.router.add_get('/api/map/config', self.get_map_config)
+        self.app.router.add_get('/api/events', self.stream_events)
         self.app.router.add_get('/api/debug/agents', self.debug_agents)  # Debug endpoint
         self.app.router.add_get('/api/debug/nodes', self.debug_nodes)  # Debug nodes
         self.app.router.add_get('/api/debug/packets', self.debug_packets)  # Debug packets
@@ -281,13 +285,45 @@ class DistributedMeshyMcMapfaceServer:
         self.app.router.add_get('/nodes', self.nodes_page)
         self.app.router.add_get('/map', self.map_page)
         
-        # Static files (CSS, JS) - optional
-        try:
-            from pathlib import Path
-            if Path('static').exists():
-                self.app.router.add_static('/static/', path='static/', name='static')
-        except Exception as e:
-            self.logger.debug(f"Static files directory not found: {e}")
+        # Static files (shared CSS/JS for the web UI pages)
+        static_dir = Path(__file__).parent / 'static'
+        static = self.app.router.add_static('/static/', path=static_dir, name='static')
+        self.static_css_url = str(static.url_for(filename='mmm.css', append_version=True))
+        self.static_js_url = str(static.url_for(filename='mmm.js', append_version=True))
+    
+    def page_response(self, html: str) -> web.Response:
+        """Fill in the page placeholders and build the HTML response"""
+        html = html.replace('SITE_NAME', self.site_name)
+        html = html.replace('MMM_CSS_URL', self.static_css_url)
+        html = html.replace('MMM_JS_URL', self.static_js_url)
+        return web.Response(text=html, content_type='text/html')
+    
+    def cached_json_response(self, request, data) -> web.Response:
+        """Build a JSON response with an ETag, answering 304 if the client's copy is current"""
+        body = json.dumps(data).encode()
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type='application/json', headers=headers)
+    
+    @web_middlewares.middleware
+    async def compression_middleware(self, request, handler):
+        """Compress HTML, JSON and static asset responses for clients that accept gzip/deflate"""
+        response = await handler(request)
+        if 'Content-Encoding' in response.headers:
+            return response
+        
+        if isinstance(response, web.FileResponse):
+            # Page URLs carry a ?v= content hash, so a versioned asset never changes
+            if 'v' in request.query:
+                response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+            # FileResponse skips sendfile and streams through the compressor
+            response.enable_compression()
+        elif (isinstance(response, web.Response) and isinstance(response.body, bytes)
+                and len(response.body) > 1024):
+            response.enable_compression()
+        return response
     
     @web_middlewares.middleware
     async def auth_middleware(self, request, handler):
@@ -455,6 +491,19 @@ class DistributedMeshyMcMapfaceServer:
             
             await self.db.commit()
             
+            if packets:
+                self.publish_event('packets', [{
+                    'agent_id': agent_id,
+                    'timestamp': packet.get('timestamp', timestamp),
+                    'from_node': packet.get('from_node'),
+                    'to_node': packet.get('to_node'),
+                    'type': packet.get('type'),
+                    'rssi': packet.get('rssi'),
+                    'snr': packet.get('snr')
+                } for packet in packets])
+            if node_status:
+                self.publish_event('nodes', {'agent_id': agent_id})
+            
             self.logger.debug(f"Received {len(packets)} packets from {agent_id}")
             return web.json_response({'status': 'success', 'received': len(packets)})
             
@@ -571,6 +620,8 @@ class DistributedMeshyMcMapfaceServer:
             
             await self.db.commit()
             
+            self.publish_event('nodes', {'agent_id': agent_id})
+            
             self.logger.info(f"Updated nodedb data for {len(nodes_data)} nodes from {agent_id}")
             self.logger.info(f"Stored topology data for {len(nodes_data)} node-agent relationships")
             return web.json_response({'status': 'success', 'updated': len(nodes_data)})
@@ -694,7 +745,7 @@ class DistributedMeshyMcMapfaceServer:
                     'status': agent[6]
                 })
             
-            return web.json_response({'agents': result})
+            return self.cached_json_response(request, {'agents': result})
             
         except Exception as e:
             self.logger.error(f"Error listing agents: {e}")
@@ -846,6 +897,109 @@ class DistributedMeshyMcMapfaceServer:
             self.logger.error(f"Error in debug packets endpoint: {e}")
             return web.json_response({'error': str(e)}, status=500)
     
+    def format_packet_row(self, packet) -> Dict:
+        """Convert a row from the get_packets query into its API representation"""
+        # New column indices based on explicit SELECT:
+        # 0=id, 1=agent_id, 2=timestamp, 3=from_node, 4=to_node, 
+        # 5=packet_id, 6=channel, 7=type, 8=payload, 9=rssi, 10=snr, 
+        # 11=hop_limit, 12=want_ack, 13=location_name,
+        # 14=from_short_name, 15=from_long_name, 16=from_hw_model, 17=from_role,
+        # 18=to_short_name, 19=to_long_name, 20=to_hw_model, 21=to_role,
+        # 22=from_hops_away, 23=to_hops_away
+        
+        # Format from_node with name
+        from_display = packet[3]  # from_node ID
+        if packet[14] and packet[15]:  # from_short_name and from_long_name
+            from_display = f"{packet[14]} ({packet[15]})"
+        elif packet[14]:  # just short_name
+            from_display = f"{packet[14]} ({packet[3]})"
+        elif packet[15]:  # just long_name
+            from_display = f"{packet[15]} ({packet[3]})"
+        
+        # Format to_node with name
+        to_display = packet[4] if packet[4] else 'Broadcast'  # to_node ID
+        if packet[4] and packet[18] and packet[19]:  # to_short_name and to_long_name
+            to_display = f"{packet[18]} ({packet[19]})"
+        elif packet[4] and packet[18]:  # just short_name
+            to_display = f"{packet[18]} ({packet[4]})"
+        elif packet[4] and packet[19]:  # just long_name
+            to_display = f"{packet[19]} ({packet[4]})"
+        
+        return {
+            'id': packet[0],
+            'agent_id': packet[1],
+            'agent_location': packet[13],
+            'timestamp': packet[2],
+            'from_node': packet[3],
+            'from_node_display': from_display,
+            'from_hw_model': packet[16],
+            'from_role': packet[17],
+            'from_hops': packet[22],  # from hops_away
+            'to_node': packet[4],
+            'to_node_display': to_display,
+            'to_hw_model': packet[20],
+            'to_role': packet[21],
+            'to_hops': packet[23],  # to hops_away
+            'type': packet[7],
+            'payload': json.loads(packet[8]) if packet[8] else None,
+            'rssi': packet[9],
+            'snr': packet[10]
+        }
+    
+    def publish_event(self, event: str, data):
+        """Push an event to every connected /api/events client"""
+        for queue in self.event_subscribers:
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # Client isn't keeping up; it resyncs when it reconnects
+                pass
+    
+    async def stream_events(self, request) -> web.StreamResponse:
+        """Stream new packets and node changes to the web UI as server-sent events"""
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache'
+        })
+        await response.prepare(request)
+        
+        queue = asyncio.Queue(maxsize=100)
+        self.event_subscribers.add(queue)
+        try:
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=15)
+                    await response.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+                except asyncio.TimeoutError:
+                    # Comment line keeps idle connections open through proxies
+                    await response.write(b': keepalive\n\n')
+        except ConnectionResetError:
+            pass
+        finally:
+            self.event_subscribers.discard(queue)
+        return response
+    
+    async def stream_packets(self, request, query: str, params: List) -> web.StreamResponse:
+        """Stream packet rows as NDJSON (one packet per line) as they are read"""
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        
+        # Headers are already sent, so errors past this point can only be logged
+        try:
+            lines = []
+            async with self.db.execute(query, params) as cursor:
+                async for packet in cursor:
+                    lines.append(json.dumps(self.format_packet_row(packet)))
+                    if len(lines) >= 100:
+                        await response.write(('\n'.join(lines) + '\n').encode())
+                        lines = []
+            if lines:
+                await response.write(('\n'.join(lines) + '\n').encode())
+            await response.write_eof()
+        except Exception as e:
+            self.logger.error(f"Error streaming packets: {e}")
+        return response
+    
     async def get_packets(self, request):
         """Get recent packets with filtering options"""
         try:
@@ -885,57 +1039,13 @@ class DistributedMeshyMcMapfaceServer:
             query += ' ORDER BY p.timestamp DESC LIMIT ?'
             params.append(limit)
             
+            if 'application/x-ndjson' in request.headers.get('Accept', ''):
+                return await self.stream_packets(request, query, params)
+            
             cursor = await self.db.execute(query, params)
             packets = await cursor.fetchall()
             
-            result = []
-            for packet in packets:
-                # New column indices based on explicit SELECT:
-                # 0=id, 1=agent_id, 2=timestamp, 3=from_node, 4=to_node, 
-                # 5=packet_id, 6=channel, 7=type, 8=payload, 9=rssi, 10=snr, 
-                # 11=hop_limit, 12=want_ack, 13=location_name,
-                # 14=from_short_name, 15=from_long_name, 16=from_hw_model, 17=from_role,
-                # 18=to_short_name, 19=to_long_name, 20=to_hw_model, 21=to_role,
-                # 22=from_hops_away, 23=to_hops_away
-                
-                # Format from_node with name
-                from_display = packet[3]  # from_node ID
-                if packet[14] and packet[15]:  # from_short_name and from_long_name
-                    from_display = f"{packet[14]} ({packet[15]})"
-                elif packet[14]:  # just short_name
-                    from_display = f"{packet[14]} ({packet[3]})"
-                elif packet[15]:  # just long_name
-                    from_display = f"{packet[15]} ({packet[3]})"
-                
-                # Format to_node with name
-                to_display = packet[4] if packet[4] else 'Broadcast'  # to_node ID
-                if packet[4] and packet[18] and packet[19]:  # to_short_name and to_long_name
-                    to_display = f"{packet[18]} ({packet[19]})"
-                elif packet[4] and packet[18]:  # just short_name
-                    to_display = f"{packet[18]} ({packet[4]})"
-                elif packet[4] and packet[19]:  # just long_name
-                    to_display = f"{packet[19]} ({packet[4]})"
-                
-                result.append({
-                    'id': packet[0],
-                    'agent_id': packet[1],
-                    'agent_location': packet[13],
-                    'timestamp': packet[2],
-                    'from_node': packet[3],
-                    'from_node_display': from_display,
-                    'from_hw_model': packet[16],
-                    'from_role': packet[17],
-                    'from_hops': packet[22],  # from hops_away
-                    'to_node': packet[4],
-                    'to_node_display': to_display,
-                    'to_hw_model': packet[20],
-                    'to_role': packet[21],
-                    'to_hops': packet[23],  # to hops_away
-                    'type': packet[7],
-                    'payload': json.loads(packet[8]) if packet[8] else None,
-                    'rssi': packet[9],
-                    'snr': packet[10]
-                })
+            result = [self.format_packet_row(packet) for packet in packets]
             
             return web.json_response({'packets': result})
             
@@ -1102,7 +1212,7 @@ class DistributedMeshyMcMapfaceServer:
                 
                 result.append(node_data)
             
-            return web.json_response({'nodes': result})
+            return self.cached_json_response(request, {'nodes': result})
             
         except Exception as e:
             self.logger.error(f"Error getting detailed nodes: {e}")
@@ -1611,76 +1721,21 @@ class DistributedMeshyMcMapfaceServer:
     <title>SITE_NAME Dashboard</title>
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1">
+    <link rel="stylesheet" href="MMM_CSS_URL">
+    <script src="MMM_JS_URL"></script>
     <style>
-        /* CSS Custom Properties for Light/Dark themes */
-        :root {
-            --bg-primary: #f5f5f5;
-            --bg-secondary: white;
-            --bg-tertiary: #f8f9fa;
-            --text-primary: #333;
-            --text-secondary: #666;
-            --border-color: #ddd;
-            --shadow-color: rgba(0,0,0,0.1);
-            --accent-color: #2196F3;
-            --accent-hover: #e3f2fd;
-            --success-color: #4CAF50;
-            --error-color: #f44336;
-        }
-        
-        [data-theme="dark"] {
-            --bg-primary: #121212;
-            --bg-secondary: #1e1e1e;
-            --bg-tertiary: #2d2d2d;
-            --text-primary: #e0e0e0;
-            --text-secondary: #b0b0b0;
-            --border-color: #404040;
-            --shadow-color: rgba(0,0,0,0.3);
-            --accent-color: #64b5f6;
-            --accent-hover: #1e3a5f;
-            --success-color: #66bb6a;
-            --error-color: #ef5350;
-        }
-
-        body { font-family: Arial, sans-serif; margin: 0; padding: 20px; background: var(--bg-primary); color: var(--text-primary); }
-        .container { max-width: 1200px; margin: 0 auto; }
-        .header { background: var(--bg-secondary); padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 4px var(--shadow-color); }
+        .container { max-width: 1200px; }
         .stats-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 20px; }
         .stat-card { background: var(--bg-secondary); padding: 20px; border-radius: 8px; box-shadow: 0 2px 4px var(--shadow-color); text-align: center; }
         .stat-number { font-size: 2em; font-weight: bold; color: var(--accent-color); }
         .stat-label { color: var(--text-secondary); margin-top: 5px; }
-        .section { background: var(--bg-secondary); padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 4px var(--shadow-color); }
         .section h2 { margin-top: 0; color: var(--text-primary); }
         .table { width: 100%; border-collapse: collapse; }
         .table th, .table td { padding: 10px; text-align: left; border-bottom: 1px solid var(--border-color); color: var(--text-primary); }
         .table th { background: var(--bg-tertiary); }
         .status-active { color: var(--success-color); font-weight: bold; }
         .status-inactive { color: var(--error-color); }
-        .nav { display: flex; gap: 20px; margin-bottom: 20px; align-items: center; }
-        .nav a { color: var(--accent-color); text-decoration: none; padding: 10px 20px; background: var(--bg-secondary); border-radius: 4px; }
-        .nav a:hover { background: var(--accent-hover); }
-        
-        /* Dark mode toggle */
-        .theme-toggle {
-            background: var(--bg-secondary);
-            border: 1px solid var(--border-color);
-            color: var(--text-primary);
-            padding: 10px 15px;
-            border-radius: 4px;
-            cursor: pointer;
-            font-size: 14px;
-            margin-left: auto;
-        }
-        .theme-toggle:hover {
-            background: var(--accent-hover);
-        }
     </style>
-    <script>
-        // Theme initialization - must run before page renders to avoid flash
-        (function() {
-            const theme = localStorage.getItem('theme') || 'light';
-            document.documentElement.setAttribute('data-theme', theme);
-        })();
-    </script>
 </head>
 <body>
     <div class="container">
@@ -1845,30 +1900,6 @@ class DistributedMeshyMcMapfaceServer:
             }
         }
         
-        // Theme toggle functions
-        function toggleTheme() {
-            const html = document.documentElement;
-            const currentTheme = html.getAttribute('data-theme') || 'light';
-            const newTheme = currentTheme === 'light' ? 'dark' : 'light';
-            
-            html.setAttribute('data-theme', newTheme);
-            localStorage.setItem('theme', newTheme);
-            updateThemeToggleText(newTheme);
-        }
-        
-        function updateThemeToggleText(theme) {
-            const toggle = document.getElementById('theme-toggle');
-            if (toggle) {
-                toggle.textContent = theme === 'light' ? '🌙 Dark' : '☀️ Light';
-            }
-        }
-        
-        // Initialize theme toggle text on load
-        window.addEventListener('DOMContentLoaded', () => {
-            const currentTheme = document.documentElement.getAttribute('data-theme') || 'light';
-            updateThemeToggleText(currentTheme);
-        });
-        
         // Initial load
         loadStats();
         loadAgents();
@@ -1884,8 +1915,7 @@ class DistributedMeshyMcMapfaceServer:
 </body>
 </html>
         '''
-        html = html.replace('SITE_NAME', self.site_name)
-        return web.Response(text=html, content_type='text/html')
+        return self.page_response(html)
 
     async def agents_page(self, request):
         """Agents management page"""
@@ -1896,72 +1926,16 @@ class DistributedMeshyMcMapfaceServer:
     <title>Agents - SITE_NAME</title>
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1">
+    <link rel="stylesheet" href="MMM_CSS_URL">
+    <script src="MMM_JS_URL"></script>
     <style>
-        /* CSS Custom Properties for theming */
-        :root {
-            --bg-primary: #f5f5f5;
-            --bg-secondary: white;
-            --bg-tertiary: #f8f9fa;
-            --text-primary: #333;
-            --text-secondary: #666;
-            --accent-color: #2196F3;
-            --accent-hover: #e3f2fd;
-            --border-color: #ddd;
-            --shadow-color: rgba(0,0,0,0.1);
-            --success-color: #4CAF50;
-            --error-color: #f44336;
-        }
-        
-        [data-theme="dark"] {
-            --bg-primary: #121212;
-            --bg-secondary: #1e1e1e;
-            --bg-tertiary: #2a2a2a;
-            --text-primary: #e0e0e0;
-            --text-secondary: #b0b0b0;
-            --accent-color: #64b5f6;
-            --accent-hover: #1a237e;
-            --border-color: #404040;
-            --shadow-color: rgba(0,0,0,0.3);
-            --success-color: #81c784;
-            --error-color: #e57373;
-        }
-
-        body { font-family: Arial, sans-serif; margin: 0; padding: 20px; background: var(--bg-primary); color: var(--text-primary); }
-        .container { max-width: 1200px; margin: 0 auto; }
-        .header { background: var(--bg-secondary); padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 4px var(--shadow-color); }
-        .section { background: var(--bg-secondary); padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 4px var(--shadow-color); }
+        .container { max-width: 1200px; }
         .table { width: 100%; border-collapse: collapse; }
         .table th, .table td { padding: 12px; text-align: left; border-bottom: 1px solid var(--border-color); color: var(--text-primary); }
         .table th { background: var(--bg-tertiary); }
         .status-active { color: var(--success-color); font-weight: bold; }
         .status-inactive { color: var(--error-color); }
-        .nav { display: flex; gap: 20px; margin-bottom: 20px; align-items: center; }
-        .nav a { color: var(--accent-color); text-decoration: none; padding: 10px 20px; background: var(--bg-secondary); border-radius: 4px; }
-        .nav a:hover { background: var(--accent-hover); }
-        .nav a.active { background: var(--accent-color); color: white; }
-        
-        /* Dark mode toggle */
-        .theme-toggle {
-            background: var(--bg-secondary);
-            border: 1px solid var(--border-color);
-            color: var(--text-primary);
-            padding: 10px 15px;
-            border-radius: 4px;
-            cursor: pointer;
-            font-size: 14px;
-            margin-left: auto;
-        }
-        .theme-toggle:hover {
-            background: var(--accent-hover);
-        }
     </style>
-    <script>
-        // Theme initialization - must run before page renders to avoid flash
-        (function() {
-            const theme = localStorage.getItem('theme') || 'light';
-            document.documentElement.setAttribute('data-theme', theme);
-        })();
-    </script>
 </head>
 <body>
     <div class="container">
@@ -2044,30 +2018,6 @@ class DistributedMeshyMcMapfaceServer:
             }
         }
         
-        // Theme toggle functions
-        function toggleTheme() {
-            const html = document.documentElement;
-            const currentTheme = html.getAttribute('data-theme') || 'light';
-            const newTheme = currentTheme === 'light' ? 'dark' : 'light';
-            
-            html.setAttribute('data-theme', newTheme);
-            localStorage.setItem('theme', newTheme);
-            updateThemeToggleText(newTheme);
-        }
-        
-        function updateThemeToggleText(theme) {
-            const toggle = document.getElementById('theme-toggle');
-            if (toggle) {
-                toggle.textContent = theme === 'light' ? '🌙 Dark' : '☀️ Light';
-            }
-        }
-        
-        // Initialize theme toggle text on load
-        window.addEventListener('DOMContentLoaded', () => {
-            const currentTheme = document.documentElement.getAttribute('data-theme') || 'light';
-            updateThemeToggleText(currentTheme);
-        });
-        
         // Initial load
         loadAllAgents();
         
@@ -2077,8 +2027,7 @@ class DistributedMeshyMcMapfaceServer:
 </body>
 </html>
         '''
-        html = html.replace('SITE_NAME', self.site_name)
-        return web.Response(text=html, content_type='text/html')
+        return self.page_response(html)
 
     async def nodes_page(self, request):
         """Nodes page with table view"""
@@ -2089,64 +2038,18 @@ class DistributedMeshyMcMapfaceServer:
     <title>Nodes - SITE_NAME</title>
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1">
+    <link rel="stylesheet" href="MMM_CSS_URL">
+    <script src="MMM_JS_URL"></script>
     <style>
-        /* CSS Custom Properties for theming */
-        :root {
-            --bg-primary: #f5f5f5;
-            --bg-secondary: white;
-            --bg-tertiary: #f8f9fa;
-            --text-primary: #333;
-            --text-secondary: #666;
-            --accent-color: #2196F3;
-            --accent-hover: #e3f2fd;
-            --border-color: #ddd;
-            --shadow-color: rgba(0,0,0,0.1);
-            --success-color: #4CAF50;
-            --error-color: #f44336;
-            --warning-color: #FF9800;
-            --purple-color: #9C27B0;
-            --gray-color: #607D8B;
-            --muted-color: #9E9E9E;
-        }
-        
-        [data-theme="dark"] {
-            --bg-primary: #121212;
-            --bg-secondary: #1e1e1e;
-            --bg-tertiary: #2a2a2a;
-            --text-primary: #e0e0e0;
-            --text-secondary: #b0b0b0;
-            --accent-color: #64b5f6;
-            --accent-hover: #1a237e;
-            --border-color: #404040;
-            --shadow-color: rgba(0,0,0,0.3);
-            --success-color: #81c784;
-            --error-color: #e57373;
-            --warning-color: #ffb74d;
-            --purple-color: #ba68c8;
-            --gray-color: #90a4ae;
-            --muted-color: #bdbdbd;
-        }
-
-        body { font-family: Arial, sans-serif; margin: 0; padding: 20px; background: var(--bg-primary); color: var(--text-primary); }
-        .container { max-width: 1200px; margin: 0 auto; }
-        .header { background: var(--bg-secondary); padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 4px var(--shadow-color); }
-        .section { background: var(--bg-secondary); padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 4px var(--shadow-color); }
+        .container { max-width: 1200px; }
         .table { width: 100%; border-collapse: collapse; }
         .table th, .table td { padding: 12px; text-align: left; border-bottom: 1px solid var(--border-color); color: var(--text-primary); }
         .table th { background: var(--bg-tertiary); }
         .status-active { color: var(--success-color); font-weight: bold; }
         .status-inactive { color: var(--error-color); }
-        .nav { display: flex; gap: 20px; margin-bottom: 20px; align-items: center; }
-        .nav a { color: var(--accent-color); text-decoration: none; padding: 10px 20px; background: var(--bg-secondary); border-radius: 4px; }
-        .nav a:hover { background: var(--accent-hover); }
-        .nav a.active { background: var(--accent-color); color: white; }
         .battery-high { color: var(--success-color); }
         .battery-medium { color: var(--warning-color); }
         .battery-low { color: var(--error-color); }
-        .packet-details-table { margin-top: 15px; border: 1px solid var(--border-color); border-radius: 4px; }
-        .packet-type { background: var(--accent-hover); padding: 2px 8px; border-radius: 12px; font-size: 0.8em; white-space: nowrap; color: var(--text-primary); }
-        .clickable { cursor: pointer; color: var(--accent-color); text-decoration: underline; }
-        .clickable:hover { color: #1976D2; }
         .packet-section { background: #f8f9fa; padding: 15px; border-radius: 4px; margin-top: 10px; }
         .filter-controls { display: flex; align-items: center; gap: 15px; margin-bottom: 15px; }
         .filter-controls label { font-weight: bold; }
@@ -2174,21 +2077,6 @@ class DistributedMeshyMcMapfaceServer:
         .clear-filters { background: var(--error-color); color: white; border: none; }
         .clear-filters:hover { background: var(--error-color); opacity: 0.8; }
         
-        /* Dark mode toggle */
-        .theme-toggle {
-            background: var(--bg-secondary);
-            border: 1px solid var(--border-color);
-            color: var(--text-primary);
-            padding: 10px 15px;
-            border-radius: 4px;
-            cursor: pointer;
-            font-size: 14px;
-            margin-left: auto;
-        }
-        .theme-toggle:hover {
-            background: var(--accent-hover);
-        }
-        
         /* Modal styles */
         .modal {
             display: none;
@@ -2445,13 +2333,6 @@ class DistributedMeshyMcMapfaceServer:
             opacity: 0.8;
         }
     </style>
-    <script>
-        // Theme initialization - must run before page renders to avoid flash
-        (function() {
-            const theme = localStorage.getItem('theme') || 'light';
-            document.documentElement.setAttribute('data-theme', theme);
-        })();
-    </script>
 </head>
 <body>
     <div class="container">
@@ -2601,6 +2482,9 @@ class DistributedMeshyMcMapfaceServer:
                 console.log('Number of nodes:', data.nodes ? data.nodes.length : 'undefined');
                 
                 allNodes = data.nodes || []; // Store original data
+                // Escape user-controlled fields once per load so renders,
+                // sorts and filter clicks can reuse them
+                allNodes.forEach(prepareNodeDisplay);
                 console.log('allNodes set to:', allNodes);
                 console.log('allNodes length:', allNodes.length);
 
@@ -2615,6 +2499,21 @@ class DistributedMeshyMcMapfaceServer:
             }
         }
 
+        function prepareNodeDisplay(node) {
+            let nameDisplay = node.node_id;
+            if (node.short_name && node.long_name) {
+                nameDisplay = `${node.short_name} (${node.long_name})`;
+            } else if (node.short_name) {
+                nameDisplay = node.short_name;
+            } else if (node.long_name) {
+                nameDisplay = node.long_name;
+            }
+            node._nameDisplay = nameDisplay;
+            node._escNodeId = escapeHtml(node.node_id);
+            node._escName = escapeHtml(nameDisplay);
+            node._escAgents = (node.seeing_agents || []).map(escapeHtml).join(', ');
+        }
+
         function populateModelFilter() {
             // Get unique hardware models from all nodes
             const models = new Set();
@@ -2663,6 +2562,9 @@ class DistributedMeshyMcMapfaceServer:
             applyFiltersAndSearch();
         }
         
+        const NODE_ROW_BATCH = 50;
+        let nodeRenderToken = 0;
+        
         function displayNodes() {
             console.log('displayNodes called with currentNodes.length:', currentNodes.length);
             const tbody = document.querySelector('#nodes-table tbody');
@@ -2674,6 +2576,7 @@ class DistributedMeshyMcMapfaceServer:
             }
             
             tbody.innerHTML = '';
+            nodeRenderToken++;
             
             if (currentNodes.length === 0) {
                 console.log('No nodes found, showing empty message');
@@ -2684,162 +2587,185 @@ class DistributedMeshyMcMapfaceServer:
             
             console.log('Processing', currentNodes.length, 'nodes...');
             
-            currentNodes.forEach((node, index) => {
-                console.log('Processing node', index, ':', node.node_id, node);
-                const row = tbody.insertRow();
-                const lastSeen = new Date(node.updated_at).toLocaleString();
-                const isActive = new Date() - new Date(node.updated_at) < 60 * 60 * 1000;
-                console.log('Node', node.node_id, 'processed, isActive:', isActive);
+            // Render the first batch synchronously and the rest in idle-time
+            // batches so large node lists don't block the main thread. A newer
+            // render bumps nodeRenderToken, which stops any stale batches.
+            const token = nodeRenderToken;
+            const nodes = currentNodes;
+            appendNodeRows(tbody, nodes, 0, Math.min(NODE_ROW_BATCH, nodes.length));
+            
+            const scheduleRows = (start) => {
+                scheduleIdle(deadline => {
+                    if (token !== nodeRenderToken) return;
+                    let i = start;
+                    do {
+                        const end = Math.min(i + NODE_ROW_BATCH, nodes.length);
+                        appendNodeRows(tbody, nodes, i, end);
+                        i = end;
+                    } while (i < nodes.length && deadline.timeRemaining() > 4);
+                    if (i < nodes.length) scheduleRows(i);
+                });
+            };
+            if (nodes.length > NODE_ROW_BATCH) scheduleRows(NODE_ROW_BATCH);
+        }
+        
+        function appendNodeRows(tbody, nodes, start, end) {
+            const frag = document.createDocumentFragment();
+            for (let i = start; i < end; i++) {
+                frag.appendChild(buildNodeRow(nodes[i], i));
+            }
+            tbody.appendChild(frag);
+        }
+        
+        // requestIdleCallback with a setTimeout fallback for browsers without it
+        function scheduleIdle(callback) {
+            if (window.requestIdleCallback) {
+                requestIdleCallback(callback, { timeout: 500 });
+            } else {
+                setTimeout(() => callback({ timeRemaining: () => 0 }), 16);
+            }
+        }
+        
+        function buildNodeRow(node, index) {
+            console.log('Processing node', index, ':', node.node_id, node);
+            const row = document.createElement('tr');
+            const lastSeen = new Date(node.updated_at).toLocaleString();
+            const isActive = new Date() - new Date(node.updated_at) < 60 * 60 * 1000;
+            console.log('Node', node.node_id, 'processed, isActive:', isActive);
+            
+            // Format battery level with color coding
+            let batteryDisplay = '-';
+            let batteryClass = '';
+            if (node.battery_level !== null) {
+                batteryDisplay = `${node.battery_level}%`;
+                if (node.battery_level > 50) batteryClass = 'battery-high';
+                else if (node.battery_level > 20) batteryClass = 'battery-medium';
+                else batteryClass = 'battery-low';
+            }
+            
+            // Format position
+            let positionDisplay = '-';
+            if (node.position && node.position[0] && node.position[1]) {
+                positionDisplay = `${node.position[0].toFixed(4)}, ${node.position[1].toFixed(4)}`;
+            }
+            
+            // Format signal info
+            let signalDisplay = '';
+            if (node.rssi) signalDisplay += `${node.rssi} dBm`;
+            if (node.snr) signalDisplay += ` / ${node.snr} dB`;
+            if (!signalDisplay) signalDisplay = '-';
+            
+            // Format agents seeing this node
+            let agentsDisplay = node.seeing_agents.length > 0 ? 
+                `${node.agent_count} (${node._escAgents})` : '-';
+            
+            // Format role with color coding
+            let roleDisplay = '-';
+            if (node.role !== null && node.role !== undefined && node.role !== '') {
+                let roleClass = 'role-unknown';
+                let roleName = '';
                 
-                // Format names
-                let nameDisplay = node.node_id;
-                if (node.short_name && node.long_name) {
-                    nameDisplay = `${node.short_name} (${node.long_name})`;
-                } else if (node.short_name) {
-                    nameDisplay = node.short_name;
-                } else if (node.long_name) {
-                    nameDisplay = node.long_name;
-                }
+                // Handle both numeric and string role values according to Meshtastic protocol
+                const roleValue = String(node.role).toUpperCase();
                 
-                // Format battery level with color coding
-                let batteryDisplay = '-';
-                let batteryClass = '';
-                if (node.battery_level !== null) {
-                    batteryDisplay = `${node.battery_level}%`;
-                    if (node.battery_level > 50) batteryClass = 'battery-high';
-                    else if (node.battery_level > 20) batteryClass = 'battery-medium';
-                    else batteryClass = 'battery-low';
+                // Numeric values (Meshtastic protocol)
+                if (roleValue === '0') {
+                    roleClass = 'role-client';
+                    roleName = 'CLIENT';
+                } else if (roleValue === '1') {
+                    roleClass = 'role-client-mute';
+                    roleName = 'CLIENT_MUTE';
+                } else if (roleValue === '2') {
+                    roleClass = 'role-router';
+                    roleName = 'ROUTER';
+                } else if (roleValue === '3') {
+                    roleClass = 'role-router-client';
+                    roleName = 'ROUTER_CLIENT';
                 }
-                
-                // Format position
-                let positionDisplay = '-';
-                if (node.position && node.position[0] && node.position[1]) {
-                    positionDisplay = `${node.position[0].toFixed(4)}, ${node.position[1].toFixed(4)}`;
+                // String values - handle various naming conventions
+                else if (roleValue.includes('ROUTER_CLIENT') || roleValue.includes('ROUTERCLIENT')) {
+                    roleClass = 'role-router-client';  
+                    roleName = 'ROUTER_CLIENT';
+                } else if (roleValue.includes('CLIENT_MUTE') || roleValue.includes('CLIENTMUTE')) {
+                    roleClass = 'role-client-mute';
+                    roleName = 'CLIENT_MUTE';
+                } else if (roleValue.includes('ROUTER_LATE')) {
+                    roleClass = 'role-router-late';
+                    roleName = 'ROUTER_LATE';
+                } else if (roleValue.includes('ROUTER') && !roleValue.includes('CLIENT')) {
+                    roleClass = 'role-router';
+                    roleName = 'ROUTER';
+                } else if (roleValue.includes('CLIENT') && !roleValue.includes('MUTE')) {
+                    roleClass = 'role-client';
+                    roleName = 'CLIENT';
+                } else if (roleValue.includes('REPEATER')) {
+                    roleClass = 'role-repeater';
+                    roleName = 'REPEATER';
+                } else if (roleValue.includes('TRACKER')) {
+                    roleClass = 'role-tracker';
+                    roleName = 'TRACKER';
+                } else {
+                    // Unknown role - show the raw value
+                    roleClass = 'role-unknown';
+                    roleName = roleValue;
                 }
                 
-                // Format signal info
-                let signalDisplay = '';
-                if (node.rssi) signalDisplay += `${node.rssi} dBm`;
-                if (node.snr) signalDisplay += ` / ${node.snr} dB`;
-                if (!signalDisplay) signalDisplay = '-';
-                
-                // Format agents seeing this node
-                let agentsDisplay = node.seeing_agents.length > 0 ? 
-                    `${node.agent_count} (${node.seeing_agents.join(', ')})` : '-';
-                
-                // Format role with color coding
-                let roleDisplay = '-';
-                if (node.role !== null && node.role !== undefined && node.role !== '') {
-                    let roleClass = 'role-unknown';
-                    let roleName = '';
-                    
-                    // Handle both numeric and string role values according to Meshtastic protocol
-                    const roleValue = String(node.role).toUpperCase();
-                    
-                    // Numeric values (Meshtastic protocol)
-                    if (roleValue === '0') {
-                        roleClass = 'role-client';
-                        roleName = 'CLIENT';
-                    } else if (roleValue === '1') {
-                        roleClass = 'role-client-mute';
-                        roleName = 'CLIENT_MUTE';
-                    } else if (roleValue === '2') {
-                        roleClass = 'role-router';
-                        roleName = 'ROUTER';
-                    } else if (roleValue === '3') {
-                        roleClass = 'role-router-client';
-                        roleName = 'ROUTER_CLIENT';
-                    }
-                    // String values - handle various naming conventions
-                    else if (roleValue.includes('ROUTER_CLIENT') || roleValue.includes('ROUTERCLIENT')) {
-                        roleClass = 'role-router-client';  
-                        roleName = 'ROUTER_CLIENT';
-                    } else if (roleValue.includes('CLIENT_MUTE') || roleValue.includes('CLIENTMUTE')) {
-                        roleClass = 'role-client-mute';
-                        roleName = 'CLIENT_MUTE';
-                    } else if (roleValue.includes('ROUTER_LATE')) {
-                        roleClass = 'role-router-late';
-                        roleName = 'ROUTER_LATE';
-                    } else if (roleValue.includes('ROUTER') && !roleValue.includes('CLIENT')) {
-                        roleClass = 'role-router';
-                        roleName = 'ROUTER';
-                    } else if (roleValue.includes('CLIENT') && !roleValue.includes('MUTE')) {
-                        roleClass = 'role-client';
-                        roleName = 'CLIENT';
-                    } else if (roleValue.includes('REPEATER')) {
-                        roleClass = 'role-repeater';
-                        roleName = 'REPEATER';
-                    } else if (roleValue.includes('TRACKER')) {
-                        roleClass = 'role-tracker';
-                        roleName = 'TRACKER';
-                    } else {
-                        // Unknown role - show the raw value
-                        roleClass = 'role-unknown';
-                        roleName = roleValue;
-                    }
-                    
-                    roleDisplay = `<span class="${roleClass}">${roleName}</span>`;
-                }
+                roleDisplay = `<span class="${roleClass}">${escapeHtml(roleName)}</span>`;
+            }
 
-                // Format hop count with color coding
-                let hopDisplay = '-';
-                let hopClass = '';
-                if (node.hops_away !== null && node.hops_away !== undefined) {
-                    hopDisplay = `${node.hops_away}`;
-                    if (node.hops_away === 0) hopClass = 'style="color: #4CAF50; font-weight: bold;"'; // Direct
-                    else if (node.hops_away <= 2) hopClass = 'style="color: #FF9800;"'; // Close
-                    else if (node.hops_away <= 4) hopClass = 'style="color: #f44336;"'; // Far
-                    else hopClass = 'style="color: #9E9E9E;"'; // Very far
-                }
-                
-                row.innerHTML = `
-                    <td><strong><a href="#" onclick="showNodeDetails('${node.node_id}'); return false;" style="color: var(--accent-color); text-decoration: none;">${node.node_id}</a></strong></td>
-                    <td><a href="#" onclick="showNodeDetails('${node.node_id}'); return false;" style="color: var(--text-primary); text-decoration: none;">${nameDisplay}</a></td>
-                    <td>${roleDisplay}</td>
-                    <td>${agentsDisplay}</td>
-                    <td>${lastSeen}</td>
-                    <td class="${batteryClass}">${batteryDisplay}</td>
-                    <td>${positionDisplay}</td>
-                    <td>${signalDisplay}</td>
-                    <td ${hopClass}>${hopDisplay}</td>
-                    <td><span style="cursor: pointer; color: #2196F3;">${node.packet_count}</span></td>
-                    <td class="${isActive ? 'status-active' : 'status-inactive'}">
-                        ${isActive ? 'Active' : 'Inactive'}
-                    </td>
-                `;
-                
-                // Add click handler for packet count
-                const packetSpan = row.querySelector('span');
-                if (packetSpan) {
-                    packetSpan.onclick = () => showPackets(index);
-                }
-            });
+            // Format hop count with color coding
+            let hopDisplay = '-';
+            let hopClass = '';
+            if (node.hops_away !== null && node.hops_away !== undefined) {
+                hopDisplay = `${node.hops_away}`;
+                if (node.hops_away === 0) hopClass = 'style="color: #4CAF50; font-weight: bold;"'; // Direct
+                else if (node.hops_away <= 2) hopClass = 'style="color: #FF9800;"'; // Close
+                else if (node.hops_away <= 4) hopClass = 'style="color: #f44336;"'; // Far
+                else hopClass = 'style="color: #9E9E9E;"'; // Very far
+            }
             
-            // Setup sorting event listeners (re-attach after each load)
-            setupSorting();
+            row.innerHTML = `
+                <td><strong><a href="#" data-node-id="${node._escNodeId}" onclick="showNodeDetails(this.dataset.nodeId); return false;" style="color: var(--accent-color); text-decoration: none;">${node._escNodeId}</a></strong></td>
+                <td><a href="#" data-node-id="${node._escNodeId}" onclick="showNodeDetails(this.dataset.nodeId); return false;" style="color: var(--text-primary); text-decoration: none;">${node._escName}</a></td>
+                <td>${roleDisplay}</td>
+                <td>${agentsDisplay}</td>
+                <td>${lastSeen}</td>
+                <td class="${batteryClass}">${batteryDisplay}</td>
+                <td>${positionDisplay}</td>
+                <td>${signalDisplay}</td>
+                <td ${hopClass}>${hopDisplay}</td>
+                <td><span style="cursor: pointer; color: #2196F3;">${node.packet_count}</span></td>
+                <td class="${isActive ? 'status-active' : 'status-inactive'}">
+                    ${isActive ? 'Active' : 'Inactive'}
+                </td>
+            `;
+            
+            // Add click handler for packet count
+            const packetSpan = row.querySelector('span');
+            if (packetSpan) {
+                packetSpan.onclick = () => showPackets(index);
+            }
+            return row;
         }
         
         function setupSorting() {
-            document.querySelectorAll('.sortable').forEach(th => {
-                th.removeEventListener('click', handleSortClick); // Remove existing listeners
-                th.addEventListener('click', handleSortClick);
+            // Headers never change, so a single delegated listener on the
+            // thead covers every sortable column for the page's lifetime
+            document.querySelector('#nodes-table thead').addEventListener('click', e => {
+                const th = e.target.closest('.sortable');
+                if (th) sortNodes(th.dataset.column);
             });
         }
         
-        function handleSortClick() {
-            const column = this.getAttribute('data-column');
-            sortNodes(column);
-        }
-        
         function showPackets(nodeIndex) {
             const node = currentNodes[nodeIndex];
             const detailsDiv = document.getElementById('packet-details');
             const contentDiv = document.getElementById('packet-details-content');
             
             if (!node.recent_packets || node.recent_packets.length === 0) {
-                contentDiv.innerHTML = `<p>No recent packets for ${node.node_id}</p>`;
+                contentDiv.innerHTML = `<p>No recent packets for ${node._escNodeId}</p>`;
             } else {
-                let html = `<h4>Recent packets from ${node.node_id}</h4>`;
+                let html = `<h4>Recent packets from ${node._escNodeId}</h4>`;
                 html += '<table class="table" style="font-size: 0.9em;">';
                 html += '<thead><tr><th>Timestamp</th><th>Type</th><th>Agent</th><th>Payload</th><th>Signal</th></tr></thead><tbody>';
                 
@@ -2860,13 +2786,13 @@ class DistributedMeshyMcMapfaceServer:
                             if (dm.channel_utilization) payloadDisplay += `, Ch.Util: ${dm.channel_utilization}%`;
                         }
                     } else if (packet.type === 'text_message' && packet.payload) {
-                        payloadDisplay = packet.payload.length > 50 ? 
-                            packet.payload.substring(0, 50) + '...' : packet.payload;
+                        payloadDisplay = escapeHtml(String(packet.payload).length > 50 ?
+                            String(packet.payload).substring(0, 50) + '...' : String(packet.payload));
                     } else if (packet.type === 'user_info' && packet.payload) {
                         const ui = packet.payload;
-                        payloadDisplay = `${ui.short_name || 'N/A'} (${ui.long_name || 'N/A'})`;
+                        payloadDisplay = escapeHtml(`${ui.short_name || 'N/A'} (${ui.long_name || 'N/A'})`);
                     } else if (packet.payload) {
-                        payloadDisplay = JSON.stringify(packet.payload).substring(0, 100);
+                        payloadDisplay = escapeHtml(previewJson(packet.payload, 100));
                     } else {
                         payloadDisplay = '-';
                     }
@@ -2879,8 +2805,8 @@ class DistributedMeshyMcMapfaceServer:
                     html += `
                         <tr>
                             <td>${timestamp}</td>
-                            <td><span style="background: #e3f2fd; padding: 2px 6px; border-radius: 3px; font-size: 0.8em;">${packet.type}</span></td>
-                            <td>${packet.agent_location}</td>
+                            <td><span style="background: #e3f2fd; padding: 2px 6px; border-radius: 3px; font-size: 0.8em;">${escapeHtml(packet.type)}</span></td>
+                            <td>${escapeHtml(packet.agent_location)}</td>
                             <td style="max-width: 300px; overflow: hidden;">${payloadDisplay}</td>
                             <td>${signalInfo}</td>
                         </tr>
@@ -2930,24 +2856,15 @@ class DistributedMeshyMcMapfaceServer:
             let html = '<h4>Recent Packets from All Nodes</h4>';
             
             try {
-                // Collect all packets from all nodes
-                let allPackets = [];
-                currentNodes.forEach(node => {
-                    if (node.recent_packets) {
-                        node.recent_packets.forEach(packet => {
-                            allPackets.push({
-                                ...packet,
-                                node_id: node.node_id,
-                                node_name: node.short_name || node.long_name || node.node_id
-                            });
-                        });
-                    }
-                });
+                // Pick the 50 most recent packets across all nodes without
+                // sorting (or copying) every packet
+                const allPackets = newestPackets(currentNodes, 50).map(([ts, packet, node]) => ({
+                    ...packet,
+                    node_id: node.node_id,
+                    node_name: escapeHtml(node.short_name || node.long_name || node.node_id)
+                }));
                 
-                console.log('Total packets collected:', allPackets.length);
-                
-                // Sort by timestamp
-                allPackets.sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp));
+                console.log('Recent packets selected:', allPackets.length);
                 
                 if (allPackets.length === 0) {
                     contentDiv.innerHTML = html + '<p>No recent packets found</p>';
@@ -2957,7 +2874,7 @@ class DistributedMeshyMcMapfaceServer:
                 html += '<table class="table" style="font-size: 0.9em;">';
                 html += '<thead><tr><th>Timestamp</th><th>From Node</th><th>Type</th><th>Agent</th><th>Payload</th><th>Signal</th></tr></thead><tbody>';
                 
-                allPackets.slice(0, 50).forEach(packet => {  // Limit to 50 most recent
+                allPackets.forEach(packet => {
                     const timestamp = new Date(packet.timestamp).toLocaleString();
                     let payloadDisplay = formatPayload(packet.type, packet.payload);
                     
@@ -2970,8 +2887,8 @@ class DistributedMeshyMcMapfaceServer:
                         <tr>
                             <td>${timestamp}</td>
                             <td><strong>${packet.node_name}</strong></td>
-                            <td><span style="background: #e3f2fd; padding: 2px 6px; border-radius: 3px; font-size: 0.8em;">${packet.type}</span></td>
-                            <td>${packet.agent_location}</td>
+                            <td><span style="background: #e3f2fd; padding: 2px 6px; border-radius: 3px; font-size: 0.8em;">${escapeHtml(packet.type)}</span></td>
+                            <td>${escapeHtml(packet.agent_location)}</td>
                             <td style="max-width: 400px; overflow: hidden;">${payloadDisplay}</td>
                             <td>${signalInfo}</td>
                         </tr>
@@ -2988,6 +2905,49 @@ class DistributedMeshyMcMapfaceServer:
             }
         }
         
+        // Return up to `count` [timestamp, packet, node] tuples, newest first.
+        // Keeps a min-heap of the newest entries seen so far, so the cost is
+        // O(M log count) for M packets instead of sorting all of them.
+        function newestPackets(nodes, count) {
+            const heap = [];
+            const siftDown = (i) => {
+                for (;;) {
+                    const l = 2 * i + 1, r = l + 1;
+                    let min = i;
+                    if (l < heap.length && heap[l][0] < heap[min][0]) min = l;
+                    if (r < heap.length && heap[r][0] < heap[min][0]) min = r;
+                    if (min === i) return;
+                    [heap[i], heap[min]] = [heap[min], heap[i]];
+                    i = min;
+                }
+            };
+            const siftUp = (i) => {
+                while (i > 0) {
+                    const parent = (i - 1) >> 1;
+                    if (heap[parent][0] <= heap[i][0]) return;
+                    [heap[i], heap[parent]] = [heap[parent], heap[i]];
+                    i = parent;
+                }
+            };
+            
+            nodes.forEach(node => {
+                if (!node.recent_packets) return;
+                node.recent_packets.forEach(packet => {
+                    let ts = Date.parse(packet.timestamp);
+                    if (Number.isNaN(ts)) ts = -Infinity;
+                    if (heap.length < count) {
+                        heap.push([ts, packet, node]);
+                        siftUp(heap.length - 1);
+                    } else if (count > 0 && ts > heap[0][0]) {
+                        heap[0] = [ts, packet, node];
+                        siftDown(0);
+                    }
+                });
+            });
+            
+            return heap.sort((a, b) => b[0] - a[0]);
+        }
+        
         function formatPayload(type, payload) {
             if (!payload) return '-';
             
@@ -3004,14 +2964,54 @@ class DistributedMeshyMcMapfaceServer:
                     if (dm.channel_utilization) display += `, Ch.Util: ${dm.channel_utilization}%`;
                     return display;
                 }
-                return JSON.stringify(payload).substring(0, 100);
+                return escapeHtml(previewJson(payload, 100));
             } else if (type === 'text_message') {
-                return payload.length > 80 ? payload.substring(0, 80) + '...' : payload;
+                const text = String(payload);
+                return escapeHtml(text.length > 80 ? text.substring(0, 80) + '...' : text);
             } else if (type === 'user_info') {
-                return `${payload.short_name || 'N/A'} (${payload.long_name || 'N/A'})`;
+                return escapeHtml(`${payload.short_name || 'N/A'} (${payload.long_name || 'N/A'})`);
             } else {
-                return JSON.stringify(payload).substring(0, 100);
+                return escapeHtml(previewJson(payload, 100));
+            }
+        }
+        
+        // JSON-like preview of a payload, capped at `cap` characters. Stops
+        // walking the object as soon as the cap is reached so large telemetry
+        // payloads are not serialized in full just to show the first 100 chars.
+        function previewJson(value, cap) {
+            let out = '';
+            const walk = (v) => {
+                if (out.length >= cap) return;
+                if (v === null || typeof v !== 'object') {
+                    if (typeof v === 'string') v = v.substring(0, cap - out.length);
+                    out += JSON.stringify(v) ?? 'null';
+                } else if (Array.isArray(v)) {
+                    out += '[';
+                    for (let i = 0; i < v.length && out.length < cap; i++) {
+                        if (i > 0) out += ',';
+                        walk(v[i]);
+                    }
+                    out += ']';
+                } else {
+                    out += '{';
+                    let first = true;
+                    for (const key of Object.keys(v)) {
+                        if (out.length >= cap) break;
+                        if (v[key] === undefined || typeof v[key] === 'function') continue;
+                        if (!first) out += ',';
+                        first = false;
+                        out += JSON.stringify(key) + ':';
+                        walk(v[key]);
+                    }
+                    out += '}';
+                }
+            };
+            try {
+                walk(value);
+            } catch (e) {
+                return '[object]';
             }
+            return out.substring(0, cap);
         }
         
         // Filtering functionality
@@ -3336,6 +3336,8 @@ class DistributedMeshyMcMapfaceServer:
         document.addEventListener('DOMContentLoaded', function() {
             console.log('DOM loaded, initializing nodes page...');
 
+            setupSorting();
+
             // Run test to verify DOM access
             testJS();
             
@@ -3344,8 +3346,6 @@ class DistributedMeshyMcMapfaceServer:
                 button.onclick = toggleView;
             }
             
-            // Initial sorting setup will be done after first load
-            
             // Initialize filter UI
             updateFilterUI();
             
@@ -3366,24 +3366,6 @@ class DistributedMeshyMcMapfaceServer:
             return new Date(timestamp + 'Z');
         }
 
-        // Theme toggle functions
-        function toggleTheme() {
-            const html = document.documentElement;
-            const currentTheme = html.getAttribute('data-theme') || 'light';
-            const newTheme = currentTheme === 'light' ? 'dark' : 'light';
-            
-            html.setAttribute('data-theme', newTheme);
-            localStorage.setItem('theme', newTheme);
-            updateThemeToggleText(newTheme);
-        }
-        
-        function updateThemeToggleText(theme) {
-            const toggle = document.getElementById('theme-toggle');
-            if (toggle) {
-                toggle.textContent = theme === 'light' ? '🌙 Dark' : '☀️ Light';
-            }
-        }
-        
         // Node Details Modal Functions
         let nodeDetailsModal = null;
         let modalChart = null;
@@ -3786,15 +3768,18 @@ class DistributedMeshyMcMapfaceServer:
             container.innerHTML = html;
         }
 
+        const ESCAPE_HTML_RE = /[&<>"']/g;
+        const ESCAPE_HTML_MAP = {
+            '&': '&amp;',
+            '<': '&lt;',
+            '>': '&gt;',
+            '"': '&quot;',
+            "'": '&#039;'
+        };
+
         function escapeHtml(text) {
-            const map = {
-                '&': '&amp;',
-                '<': '&lt;',
-                '>': '&gt;',
-                '"': '&quot;',
-                "'": '&#039;'
-            };
-            return text.replace(/[&<>"']/g, m => map[m]);
+            if (text === null || text === undefined) return '';
+            return String(text).replace(ESCAPE_HTML_RE, m => ESCAPE_HTML_MAP[m]);
         }
 
         function closeNodeDetailsModal() {
@@ -3831,12 +3816,6 @@ class DistributedMeshyMcMapfaceServer:
             }
         }
         
-        // Initialize theme toggle text on load
-        window.addEventListener('DOMContentLoaded', () => {
-            const currentTheme = document.documentElement.getAttribute('data-theme') || 'light';
-            updateThemeToggleText(currentTheme);
-        });
-        
         // Close modal on Escape key
         document.addEventListener('keydown', function(e) {
             if (e.key === 'Escape' && nodeDetailsModal && nodeDetailsModal.style.display === 'block') {
@@ -3850,8 +3829,7 @@ class DistributedMeshyMcMapfaceServer:
 </body>
 </html>
         '''
-        html = html.replace('SITE_NAME', self.site_name)
-        return web.Response(text=html, content_type='text/html')
+        return self.page_response(html)
 
     async def packets_page(self, request):
         """Packets page with filtering"""
@@ -3862,54 +3840,17 @@ class DistributedMeshyMcMapfaceServer:
     <title>Packets - SITE_NAME</title>
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1">
+    <link rel="stylesheet" href="MMM_CSS_URL">
+    <script src="MMM_JS_URL"></script>
     <style>
-        /* CSS Custom Properties for theming */
-        :root {
-            --bg-primary: #f5f5f5;
-            --bg-secondary: white;
-            --bg-tertiary: #f8f9fa;
-            --text-primary: #333;
-            --text-secondary: #666;
-            --accent-color: #2196F3;
-            --accent-hover: #e3f2fd;
-            --border-color: #ddd;
-            --shadow-color: rgba(0,0,0,0.1);
-            --success-color: #4CAF50;
-            --error-color: #f44336;
-        }
-        
-        [data-theme="dark"] {
-            --bg-primary: #121212;
-            --bg-secondary: #1e1e1e;
-            --bg-tertiary: #2a2a2a;
-            --text-primary: #e0e0e0;
-            --text-secondary: #b0b0b0;
-            --accent-color: #64b5f6;
-            --accent-hover: #1a237e;
-            --border-color: #404040;
-            --shadow-color: rgba(0,0,0,0.3);
-            --success-color: #81c784;
-            --error-color: #e57373;
-        }
-
-        body { font-family: Arial, sans-serif; margin: 0; padding: 20px; background: var(--bg-primary); color: var(--text-primary); }
-        .container { max-width: 1400px; margin: 0 auto; }
-        .header { background: var(--bg-secondary); padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 4px var(--shadow-color); }
-        .section { background: var(--bg-secondary); padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 4px var(--shadow-color); }
         .table { width: 100%; border-collapse: collapse; font-size: 0.9em; }
         .table th, .table td { padding: 8px; text-align: left; border-bottom: 1px solid var(--border-color); color: var(--text-primary); }
         .table th { background: var(--bg-tertiary); position: sticky; top: 0; }
-        .nav { display: flex; gap: 20px; margin-bottom: 20px; align-items: center; }
-        .nav a { color: var(--accent-color); text-decoration: none; padding: 10px 20px; background: var(--bg-secondary); border-radius: 4px; }
-        .nav a:hover { background: var(--accent-hover); }
-        .nav a.active { background: var(--accent-color); color: white; }
         .filter-controls { display: flex; align-items: center; gap: 15px; margin-bottom: 15px; flex-wrap: wrap; }
         .filter-controls label { font-weight: bold; color: var(--text-primary); }
         .filter-controls select, .filter-controls button { padding: 8px 12px; border: 1px solid var(--border-color); border-radius: 4px; background: var(--bg-secondary); color: var(--text-primary); }
         .packet-type { background: var(--accent-hover); padding: 2px 8px; border-radius: 12px; font-size: 0.8em; white-space: nowrap; color: var(--text-primary); }
         .packet-payload { max-width: 500px; color: var(--text-primary); word-wrap: break-word; }
-        .packet-payload-short { max-width: 500px; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; color: var(--text-primary); cursor: pointer; }
-        .packet-payload-full { max-width: 500px; color: var(--text-primary); word-wrap: break-word; }
         .payload-expand-btn {
             color: var(--accent-color);
             cursor: pointer;
@@ -4067,13 +4008,6 @@ class DistributedMeshyMcMapfaceServer:
             background: var(--bg-secondary);
         }
 
-        .chart-info {
-            color: var(--text-secondary);
-            font-size: 12px;
-            margin-top: 10px;
-            text-align: center;
-        }
-
         /* Role badge styles */
         .role-router { background: #ff9800; color: white; padding: 2px 8px; border-radius: 12px; font-size: 0.85em; }
         .role-client { background: #2196F3; color: white; padding: 2px 8px; border-radius: 12px; font-size: 0.85em; }
@@ -4082,29 +4016,7 @@ class DistributedMeshyMcMapfaceServer:
         .role-repeater { background: #f44336; color: white; padding: 2px 8px; border-radius: 12px; font-size: 0.85em; }
         .role-tracker { background: #4caf50; color: white; padding: 2px 8px; border-radius: 12px; font-size: 0.85em; }
         .role-unknown { background: #9e9e9e; color: white; padding: 2px 8px; border-radius: 12px; font-size: 0.85em; }
-        
-        /* Dark mode toggle */
-        .theme-toggle {
-            background: var(--bg-secondary);
-            border: 1px solid var(--border-color);
-            color: var(--text-primary);
-            padding: 10px 15px;
-            border-radius: 4px;
-            cursor: pointer;
-            font-size: 14px;
-            margin-left: auto;
-        }
-        .theme-toggle:hover {
-            background: var(--accent-hover);
-        }
     </style>
-    <script>
-        // Theme initialization - must run before page renders to avoid flash
-        (function() {
-            const theme = localStorage.getItem('theme') || 'light';
-            document.documentElement.setAttribute('data-theme', theme);
-        })();
-    </script>
 </head>
 <body>
     <div class="container">
@@ -4126,7 +4038,7 @@ class DistributedMeshyMcMapfaceServer:
             <h2>Recent Packets</h2>
             <div class="filter-controls">
                 <label for="hours-filter">Time range:</label>
-                <select id="hours-filter" onchange="loadPackets()">
+                <select id="hours-filter" onchange="loadPacketsDebounced()">
                     <option value="1">Last 1 hour</option>
                     <option value="6" selected>Last 6 hours</option>
                     <option value="72">Last 72 hours</option>
@@ -4134,7 +4046,7 @@ class DistributedMeshyMcMapfaceServer:
                 </select>
                 
                 <label for="type-filter">Packet type:</label>
-                <select id="type-filter" onchange="loadPackets()">
+                <select id="type-filter" onchange="loadPacketsDebounced()">
                     <option value="all">All types</option>
                     <option value="position">Position</option>
                     <option value="telemetry">Telemetry</option>
@@ -4143,12 +4055,12 @@ class DistributedMeshyMcMapfaceServer:
                 </select>
                 
                 <label for="agent-filter">Agent:</label>
-                <select id="agent-filter" onchange="loadPackets()">
+                <select id="agent-filter" onchange="loadPacketsDebounced()">
                     <option value="all">All agents</option>
                 </select>
                 
                 <label for="limit-filter">Show:</label>
-                <select id="limit-filter" onchange="loadPackets()">
+                <select id="limit-filter" onchange="loadPacketsDebounced()">
                     <option value="50">50 packets</option>
                     <option value="100" selected>100 packets</option>
                     <option value="500">500 packets</option>
@@ -4175,14 +4087,51 @@ class DistributedMeshyMcMapfaceServer:
                     <tbody></tbody>
                 </table>
             </div>
+            <template id="packet-row-tpl"><tr><td></td><td><strong class="clickable"></strong></td><td><span class="clickable"></span></td><td><span class="packet-type"></span></td><td></td><td></td><td></td><td class="packet-payload"></td></tr></template>
         </div>
     </div>
     
     <script>
         console.log('Packets page script loaded');
         
+        // The packets table is windowed: only the rows around the viewport of
+        // .table-container are mounted, with spacer rows standing in for the
+        // rest, so render cost scales with the viewport rather than the limit.
+        const ROW_HEIGHT_ESTIMATE = 48;
+        const ROW_OVERSCAN = 10;
+        let packetList = [];
+        let packetRowHeight = ROW_HEIGHT_ESTIMATE;
+        let measureRowHeight = false;
+        let windowRenderPending = false;
+        let packetsController = null;
+        
+        // Built rows are cached by packet key and reused across scrolls and
+        // refreshes, so a poll only builds rows for packets that are new
+        const rowByKey = new Map();
+        
+        function packetKey(packet) {
+            return packet.id ?? `${packet.timestamp}|${packet.from_node}|${packet.agent_id}`;
+        }
+        
+        function debounce(fn, ms) {
+            let timer;
+            return (...args) => {
+                clearTimeout(timer);
+                timer = setTimeout(() => fn(...args), ms);
+            };
+        }
+        
+        // Filter changes are coalesced so toggling several selects in a row
+        // issues a single request
+        const loadPacketsDebounced = debounce(loadPackets, 200);
+        
         async function loadPackets() {
             console.log('loadPackets called');
+            // Supersede any request still in flight so a stale response
+            // can't overwrite a newer one
+            if (packetsController) packetsController.abort();
+            const controller = new AbortController();
+            packetsController = controller;
             try {
                 const hours = document.getElementById('hours-filter').value;
                 const type = document.getElementById('type-filter').value;
@@ -4193,44 +4142,150 @@ class DistributedMeshyMcMapfaceServer:
                 if (type !== 'all') url += `&type=${type}`;
                 if (agent !== 'all') url += `&agent_id=${agent}`;
                 
-                const response = await fetch(url);
-                const data = await response.json();
+                const response = await fetch(url, {
+                    signal: controller.signal,
+                    headers: { 'Accept': 'application/x-ndjson' }
+                });
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
                 
-                const tbody = document.querySelector('#packets-table tbody');
-                tbody.innerHTML = '';
+                // Show rows as soon as the first batch arrives instead of
+                // waiting for the whole body
+                const packets = [];
+                await readNdjson(response, batch => {
+                    for (const packet of batch) packets.push(packet);
+                    if (packetList !== packets) {
+                        packetList = packets;
+                        measureRowHeight = true;
+                    }
+                    schedulePacketWindow();
+                });
                 
-                if (!data.packets || data.packets.length === 0) {
-                    const row = tbody.insertRow();
-                    row.innerHTML = '<td colspan="8" style="text-align: center;">No packets found</td>';
-                    return;
+                packetList = packets;
+                const seen = new Set(packetList.map(packetKey));
+                for (const key of rowByKey.keys()) {
+                    if (!seen.has(key)) rowByKey.delete(key);
                 }
-                
-                data.packets.forEach((packet, index) => {
-                    const row = tbody.insertRow();
-                    const timestamp = new Date(packet.timestamp).toLocaleString();
-                    const payloadData = formatPayload(packet.payload, packet.type);
-
-                    row.innerHTML = `
-                        <td>${timestamp}</td>
-                        <td><strong class="clickable" onclick="showNodeDetails('${packet.from_node}')">${packet.from_node_display}</strong>${packet.from_hw_model ? `<br><small style="color: #666;">${packet.from_hw_model}</small>` : ''}${packet.from_role ? `<br><small style="color: #888; font-style: italic;">${packet.from_role}</small>` : ''}${packet.from_hops ? `<br><small style="color: #2196F3;">🛣️ ${packet.from_hops} hops</small>` : ''}</td>
-                        <td><span class="clickable" onclick="showNodeDetails('${packet.to_node}')">${packet.to_node_display}</span>${packet.to_hw_model ? `<br><small style="color: #666;">${packet.to_hw_model}</small>` : ''}${packet.to_role ? `<br><small style="color: #888; font-style: italic;">${packet.to_role}</small>` : ''}${packet.to_hops ? `<br><small style="color: #2196F3;">🛣️ ${packet.to_hops} hops</small>` : ''}</td>
-                        <td><span class="packet-type">${packet.type}</span></td>
-                        <td>${packet.agent_location}</td>
-                        <td>${packet.rssi || '-'}</td>
-                        <td>${packet.snr || '-'}</td>
-                        <td class="packet-payload" id="payload-${index}">${payloadData.html}</td>
-                    `;
-                });
+                measureRowHeight = true;
+                renderPacketWindow();
                 
             } catch (error) {
+                if (error.name === 'AbortError') return;
                 console.error('Error loading packets:', error);
+            } finally {
+                if (packetsController === controller) packetsController = null;
             }
         }
         
+        // Rows are cloned from the <template> and filled via textContent,
+        // so building a row never goes through the HTML parser (except for
+        // the pre-escaped payload markup)
+        let packetRowTemplate = null;
+        
+        function appendNodeDetail(cell, text, style) {
+            cell.appendChild(document.createElement('br'));
+            const small = document.createElement('small');
+            small.style.cssText = style;
+            small.textContent = text;
+            cell.appendChild(small);
+        }
+        
+        function fillNodeCell(cell, nodeId, display, hwModel, role, hops) {
+            const link = cell.firstElementChild;
+            link.textContent = display;
+            link.onclick = () => showNodeDetails(nodeId);
+            if (hwModel) appendNodeDetail(cell, hwModel, 'color: #666;');
+            if (role) appendNodeDetail(cell, role, 'color: #888; font-style: italic;');
+            if (hops) appendNodeDetail(cell, `🛣️ ${hops} hops`, 'color: #2196F3;');
+        }
+        
+        function buildRow(packet) {
+            if (!packetRowTemplate) {
+                packetRowTemplate = document.getElementById('packet-row-tpl').content.firstElementChild;
+            }
+            const row = packetRowTemplate.cloneNode(true);
+            const cells = row.cells;
+            const payloadData = formatPayload(packet.payload, packet.type);
+            
+            cells[0].textContent = fmtTs(packet.timestamp);
+            fillNodeCell(cells[1], packet.from_node, packet.from_node_display,
+                         packet.from_hw_model, packet.from_role, packet.from_hops);
+            fillNodeCell(cells[2], packet.to_node, packet.to_node_display,
+                         packet.to_hw_model, packet.to_role, packet.to_hops);
+            cells[3].firstElementChild.textContent = packet.type;
+            cells[4].textContent = packet.agent_location;
+            cells[5].textContent = packet.rssi || '-';
+            cells[6].textContent = packet.snr || '-';
+            cells[7].id = `payload-${packet.id}`;
+            if (payloadData.html) {
+                cells[7].innerHTML = payloadData.html;
+            } else {
+                cells[7].textContent = payloadData.text;
+            }
+            return row;
+        }
+        
+        function spacerRow(height) {
+            const row = document.createElement('tr');
+            const cell = row.insertCell();
+            cell.colSpan = 8;
+            cell.style.cssText = `height: ${height}px; padding: 0; border: 0;`;
+            return row;
+        }
+        
+        function renderPacketWindow() {
+            const container = document.querySelector('.table-container');
+            const tbody = document.querySelector('#packets-table tbody');
+            const total = packetList.length;
+            
+            if (total === 0) {
+                tbody.innerHTML = '<tr><td colspan="8" style="text-align: center;">No packets found</td></tr>';
+                return;
+            }
+            
+            const first = Math.max(0, Math.floor(container.scrollTop / packetRowHeight) - ROW_OVERSCAN);
+            const count = Math.ceil(container.clientHeight / packetRowHeight) + 2 * ROW_OVERSCAN;
+            const last = Math.min(total, first + count);
+            
+            const frag = document.createDocumentFragment();
+            const top = frag.appendChild(spacerRow(first * packetRowHeight));
+            for (let i = first; i < last; i++) {
+                const packet = packetList[i];
+                const key = packetKey(packet);
+                let row = rowByKey.get(key);
+                if (!row) {
+                    row = buildRow(packet);
+                    rowByKey.set(key, row);
+                }
+                frag.appendChild(row);
+            }
+            const bottom = frag.appendChild(spacerRow((total - last) * packetRowHeight));
+            tbody.replaceChildren(frag);
+            
+            // Refine the row height estimate from the first rendered window
+            // of each load so the spacers track the real table height
+            if (measureRowHeight) {
+                measureRowHeight = false;
+                const measured = (bottom.offsetTop - top.offsetTop - top.offsetHeight) / (last - first);
+                if (measured > 0 && Math.abs(measured - packetRowHeight) > 1) {
+                    packetRowHeight = measured;
+                    renderPacketWindow();
+                }
+            }
+        }
+        
+        function schedulePacketWindow() {
+            if (windowRenderPending) return;
+            windowRenderPending = true;
+            requestAnimationFrame(() => {
+                windowRenderPending = false;
+                renderPacketWindow();
+            });
+        }
+        
         async function loadAgents() {
             try {
-                const response = await fetch('/api/agents');
-                const data = await response.json();
+                const { data, changed } = await fetchCached('/api/agents');
+                if (!changed) return;
                 
                 const select = document.getElementById('agent-filter');
                 select.innerHTML = '<option value="all">All agents</option>';
@@ -4248,52 +4303,48 @@ class DistributedMeshyMcMapfaceServer:
             }
         }
         
+        // Known payload shapes are formatted straight from their fields and
+        // returned as plain text; only long generic payloads need the
+        // expandable markup, returned as html
         function formatPayload(payload, type) {
-            if (!payload) return { html: '-', needsExpand: false };
-
-            let formatted = '';
-            let fullText = '';
-
-            if (type === 'position' && typeof payload === 'object') {
-                formatted = `Lat: ${payload.latitude?.toFixed(4) || 'N/A'}, Lon: ${payload.longitude?.toFixed(4) || 'N/A'}`;
-                if (payload.altitude) formatted += `, Alt: ${payload.altitude}m`;
-                if (payload.time) formatted += `, Time: ${new Date(payload.time * 1000).toLocaleString()}`;
-                return { html: formatted, needsExpand: false };
-            } else if (type === 'telemetry' && typeof payload === 'object') {
-                if (payload.device_metrics) {
-                    const dm = payload.device_metrics;
-                    formatted = `Battery: ${dm.battery_level || 'N/A'}%`;
-                    if (dm.voltage) formatted += `, Voltage: ${dm.voltage}V`;
-                    if (dm.channel_utilization) formatted += `, Ch.Util: ${dm.channel_utilization}%`;
-                    if (dm.air_util_tx) formatted += `, Air: ${dm.air_util_tx}%`;
-                    return { html: formatted, needsExpand: false };
+            if (!payload) return { text: '-' };
+
+            if (typeof payload === 'object') {
+                switch (type) {
+                    case 'position': {
+                        let text = `Lat: ${payload.latitude?.toFixed(4) || 'N/A'}, Lon: ${payload.longitude?.toFixed(4) || 'N/A'}`;
+                        if (payload.altitude) text += `, Alt: ${payload.altitude}m`;
+                        if (payload.time) text += `, Time: ${fmtTs(payload.time * 1000)}`;
+                        return { text };
+                    }
+                    case 'telemetry': {
+                        const dm = payload.device_metrics;
+                        if (!dm) break;
+                        let text = `Battery: ${dm.battery_level || 'N/A'}%`;
+                        if (dm.voltage) text += `, Voltage: ${dm.voltage}V`;
+                        if (dm.channel_utilization) text += `, Ch.Util: ${dm.channel_utilization}%`;
+                        if (dm.air_util_tx) text += `, Air: ${dm.air_util_tx}%`;
+                        return { text };
+                    }
+                    case 'user_info': {
+                        let text = `${payload.short_name || 'N/A'} (${payload.long_name || 'N/A'})`;
+                        if (payload.macaddr) text += `, MAC: ${payload.macaddr}`;
+                        return { text };
+                    }
                 }
-                fullText = JSON.stringify(payload, null, 2);
-            } else if (type === 'text_message') {
-                fullText = String(payload);
-            } else if (type === 'user_info' && typeof payload === 'object') {
-                formatted = `${payload.short_name || 'N/A'} (${payload.long_name || 'N/A'})`;
-                if (payload.macaddr) formatted += `, MAC: ${payload.macaddr}`;
-                return { html: formatted, needsExpand: false };
-            } else if (typeof payload === 'object') {
-                fullText = JSON.stringify(payload, null, 2);
-            } else {
-                fullText = String(payload);
             }
 
-            // Check if content needs expand/collapse (longer than 100 chars)
-            if (fullText.length > 100) {
-                const shortText = fullText.substring(0, 100) + '...';
-                const id = 'payload-' + Math.random().toString(36).substr(2, 9);
-                return {
-                    html: `<span id="${id}-short">${escapeHtml(shortText)}</span>
-                           <span id="${id}-full" style="display:none;">${escapeHtml(fullText)}</span>
-                           <a class="payload-expand-btn" id="${id}-btn" onclick="togglePayload('${id}')">[expand]</a>`,
-                    needsExpand: true
-                };
-            }
+            const fullText = typeof payload === 'object' ? JSON.stringify(payload, null, 2) : String(payload);
+            if (fullText.length <= 100) return { text: fullText };
 
-            return { html: escapeHtml(fullText), needsExpand: false };
+            // Long content gets an expand/collapse toggle
+            const shortText = fullText.substring(0, 100) + '...';
+            const id = 'payload-' + Math.random().toString(36).substr(2, 9);
+            return {
+                html: `<span id="${id}-short">${escapeHtml(shortText)}</span>
+                       <span id="${id}-full" style="display:none;">${escapeHtml(fullText)}</span>
+                       <a class="payload-expand-btn" id="${id}-btn" onclick="togglePayload('${id}')">[expand]</a>`
+            };
         }
 
         function escapeHtml(text) {
@@ -4522,42 +4573,19 @@ class DistributedMeshyMcMapfaceServer:
             }
         });
 
-        // Theme toggle functions
-        function toggleTheme() {
-            const html = document.documentElement;
-            const currentTheme = html.getAttribute('data-theme') || 'light';
-            const newTheme = currentTheme === 'light' ? 'dark' : 'light';
-
-            html.setAttribute('data-theme', newTheme);
-            localStorage.setItem('theme', newTheme);
-            updateThemeToggleText(newTheme);
-        }
-
-        function updateThemeToggleText(theme) {
-            const toggle = document.getElementById('theme-toggle');
-            if (toggle) {
-                toggle.textContent = theme === 'light' ? '🌙 Dark' : '☀️ Light';
-            }
-        }
-
-        // Initialize theme toggle text on load
-        window.addEventListener('DOMContentLoaded', () => {
-            const currentTheme = document.documentElement.getAttribute('data-theme') || 'light';
-            updateThemeToggleText(currentTheme);
-        });
-
         document.addEventListener('DOMContentLoaded', function() {
+            document.querySelector('.table-container').addEventListener('scroll', schedulePacketWindow, { passive: true });
+            window.addEventListener('resize', schedulePacketWindow);
             loadAgents();
             loadPackets();
         });
 
-        setInterval(loadPackets, 30000);
+        startVisiblePolling(loadPackets, 30000);
     </script>
 </body>
 </html>
         '''
-        html = html.replace('SITE_NAME', self.site_name)
-        return web.Response(text=html, content_type='text/html')
+        return self.page_response(html)
 
     async def map_page(self, request):
         """Interactive map page showing nodes and agents"""
@@ -4568,45 +4596,12 @@ class DistributedMeshyMcMapfaceServer:
     <title>Network Map - SITE_NAME</title>
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1">
+    <link rel="stylesheet" href="MMM_CSS_URL">
+    <script src="MMM_JS_URL"></script>
     <link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css" />
+    <link rel="stylesheet" href="https://unpkg.com/leaflet.markercluster@1.5.3/dist/MarkerCluster.css" />
+    <link rel="stylesheet" href="https://unpkg.com/leaflet.markercluster@1.5.3/dist/MarkerCluster.Default.css" />
     <style>
-        /* CSS Custom Properties for theming */
-        :root {
-            --bg-primary: #f5f5f5;
-            --bg-secondary: white;
-            --bg-tertiary: #f8f9fa;
-            --text-primary: #333;
-            --text-secondary: #666;
-            --accent-color: #2196F3;
-            --accent-hover: #e3f2fd;
-            --border-color: #ddd;
-            --shadow-color: rgba(0,0,0,0.1);
-            --success-color: #4CAF50;
-            --error-color: #f44336;
-        }
-        
-        [data-theme="dark"] {
-            --bg-primary: #121212;
-            --bg-secondary: #1e1e1e;
-            --bg-tertiary: #2a2a2a;
-            --text-primary: #e0e0e0;
-            --text-secondary: #b0b0b0;
-            --accent-color: #64b5f6;
-            --accent-hover: #1a237e;
-            --border-color: #404040;
-            --shadow-color: rgba(0,0,0,0.3);
-            --success-color: #81c784;
-            --error-color: #e57373;
-        }
-
-        body { font-family: Arial, sans-serif; margin: 0; padding: 20px; background: var(--bg-primary); color: var(--text-primary); }
-        .container { max-width: 1400px; margin: 0 auto; }
-        .header { background: var(--bg-secondary); padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 4px var(--shadow-color); }
-        .section { background: var(--bg-secondary); padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 4px var(--shadow-color); }
-        .nav { display: flex; gap: 20px; margin-bottom: 20px; align-items: center; }
-        .nav a { color: var(--accent-color); text-decoration: none; padding: 10px 20px; background: var(--bg-secondary); border-radius: 4px; }
-        .nav a:hover { background: var(--accent-hover); }
-        .nav a.active { background: var(--accent-color); color: white; }
         .controls { display: flex; gap: 10px; align-items: center; margin-bottom: 10px; flex-wrap: wrap; }
         .control-group { display: flex; gap: 5px; align-items: center; }
         .control-group label { font-weight: bold; color: var(--text-primary); }
@@ -4626,21 +4621,6 @@ class DistributedMeshyMcMapfaceServer:
         .route-path { font-family: monospace; color: var(--text-secondary); font-size: 0.9em; }
         .route-discovery-time { color: var(--text-secondary); font-size: 0.8em; }
         
-        /* Dark mode toggle */
-        .theme-toggle {
-            background: var(--bg-secondary);
-            border: 1px solid var(--border-color);
-            color: var(--text-primary);
-            padding: 10px 15px;
-            border-radius: 4px;
-            cursor: pointer;
-            font-size: 14px;
-            margin-left: auto;
-        }
-        .theme-toggle:hover {
-            background: var(--accent-hover);
-        }
-        
         /* Modal styles */
         .modal {
             display: none;
@@ -4858,13 +4838,6 @@ class DistributedMeshyMcMapfaceServer:
             }
         }
     </style>
-    <script>
-        // Theme initialization - must run before page renders to avoid flash
-        (function() {
-            const theme = localStorage.getItem('theme') || 'light';
-            document.documentElement.setAttribute('data-theme', theme);
-        })();
-    </script>
 </head>
 <body>
     <div class="container">
@@ -4987,13 +4960,39 @@ class DistributedMeshyMcMapfaceServer:
     </div>
     
     <script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+    <script src="https://unpkg.com/leaflet.markercluster@1.5.3/dist/leaflet.markercluster.js"></script>
+    <script src="https://unpkg.com/rbush@3.0.1/rbush.min.js"></script>
     <script>
         let map;
         let markers = new Map();
+        // Node markers inside the (padded) viewport go on nodeLayer, which is
+        // the cluster group for large networks and a plain layer otherwise
+        let nodeCluster;
+        let nodeGroup;
+        let nodeLayer;
+        const CLUSTER_THRESHOLD = 200;
+        let nodeTree;  // R-tree over node marker positions for viewport queries
+        let markerRenderer;  // One shared canvas for all circle markers instead of an SVG path each
+        const VIEWPORT_PAD = 0.25;
         let connections = [];
+        // Fetched data is frozen: it is only ever read and replaced wholesale
         let nodeData = [];
         let agentData = [];
         let packetData = [];
+        // Node coordinates as flat typed arrays parallel to nodeData (NaN when unknown)
+        let nodeLat = new Float64Array(0);
+        let nodeLon = new Float64Array(0);
+        // DOM handles used on every refresh, looked up once
+        const UI = {
+            totalNodes: document.getElementById('total-nodes'),
+            activeNodes: document.getElementById('active-nodes'),
+            totalAgents: document.getElementById('total-agents'),
+            coverage: document.getElementById('coverage-area'),
+            filterAgent: document.getElementById('filter-agent'),
+            filterType: document.getElementById('filter-type'),
+            timeRange: document.getElementById('time-range'),
+            showConnections: document.getElementById('show-connections')
+        };
         
         // Initialize map with configuration
         async function initMap() {
@@ -5023,62 +5022,141 @@ class DistributedMeshyMcMapfaceServer:
             L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
                 attribution: '© OpenStreetMap contributors'
             }).addTo(map);
+            
+            markerRenderer = L.canvas({ padding: 0.5 });
+            
+            // Node markers are culled to the viewport, and clustered above CLUSTER_THRESHOLD
+            nodeTree = new RBush();
+            nodeCluster = L.markerClusterGroup({ chunkedLoading: true });
+            nodeGroup = L.layerGroup();
+            nodeLayer = nodeGroup;
+            map.addLayer(nodeCluster);
+            map.addLayer(nodeGroup);
+            map.on('moveend', syncNodeMarkersToViewport);
+            map.on('moveend', () => scheduleRender(renderConnections));
+        }
+        
+        // Attach node markers entering the padded viewport, detach those leaving it.
+        // Every node marker stays cached in `markers` so connections can still find it.
+        function syncNodeMarkersToViewport() {
+            const bounds = map.getBounds().pad(VIEWPORT_PAD);
+            const inView = new Set(nodeTree.search({
+                minX: bounds.getWest(),
+                minY: bounds.getSouth(),
+                maxX: bounds.getEast(),
+                maxY: bounds.getNorth()
+            }).map(item => item.marker));
+            
+            const toAdd = [];
+            const toRemove = [];
+            inView.forEach(marker => {
+                if (!nodeLayer.hasLayer(marker)) toAdd.push(marker);
+            });
+            nodeLayer.eachLayer(marker => {
+                if (!inView.has(marker)) toRemove.push(marker);
+            });
+            
+            if (nodeLayer === nodeCluster) {
+                // Bulk operations let the cluster group recluster once
+                if (toRemove.length) nodeCluster.removeLayers(toRemove);
+                if (toAdd.length) nodeCluster.addLayers(toAdd);
+            } else {
+                toRemove.forEach(marker => nodeGroup.removeLayer(marker));
+                toAdd.forEach(marker => nodeGroup.addLayer(marker));
+            }
         }
         
         // Load and display data
         async function loadMapData() {
             try {
-                // Load nodes
-                const timeRange = document.getElementById('time-range').value;
-                const agentFilter = document.getElementById('filter-agent').value;
+                await loadMarkerData();
                 
-                let nodesUrl = `/api/nodes/detailed?hours=${timeRange}&limit=500`;
-                if (agentFilter !== 'all') {
-                    nodesUrl += `&agent_id=${agentFilter}`;
+                // Recent packets for connections are streamed as NDJSON, so markers
+                // are already on the map and links are drawn as batches arrive
+                const timeRange = UI.timeRange.value;
+                const packetsResponse = await fetch(`/api/packets?limit=500&hours=${timeRange}`, {
+                    headers: { 'Accept': 'application/x-ndjson' }
+                });
+                if (!packetsResponse.ok) throw new Error(`HTTP ${packetsResponse.status}`);
+                const packets = [];
+                await readNdjson(packetsResponse, batch => {
+                    for (const packet of batch) packets.push(packet);
+                    packetData = Object.freeze(packets.slice());
+                    scheduleRender(renderConnections);
+                });
+                if (!packets.length) {
+                    packetData = Object.freeze([]);
+                    scheduleRender(renderConnections);
                 }
                 
-                const nodesResponse = await fetch(nodesUrl);
-                const nodesData = await nodesResponse.json();
-                nodeData = nodesData.nodes || [];
-                
-                // Load agents
-                const agentsResponse = await fetch('/api/agents');
-                const agentsData = await agentsResponse.json();
-                agentData = agentsData.agents || [];
-                
-                // Load recent packets for connections
-                const packetsResponse = await fetch(`/api/packets?limit=500&hours=${timeRange}`);
-                const packetsData = await packetsResponse.json();
-                packetData = packetsData.packets || [];
-                
-                displayNodes();
-                displayAgents();
-                displayConnections(packetData);
-                updateStats();
-                updateAgentFilter();
-                
             } catch (error) {
                 console.error('Error loading map data:', error);
             }
         }
         
-        function displayNodes() {
-            const filterType = document.getElementById('filter-type').value;
-            const now = new Date();
+        // Load nodes and agents and update their markers
+        async function loadMarkerData() {
+            // Load nodes
+            const timeRange = UI.timeRange.value;
+            const agentFilter = UI.filterAgent.value;
             
-            // Clear existing node markers
-            markers.forEach((marker, key) => {
-                if (key.startsWith('node_')) {
-                    map.removeLayer(marker);
-                    markers.delete(key);
+            let nodesUrl = `/api/nodes/detailed?hours=${timeRange}&limit=500`;
+            if (agentFilter !== 'all') {
+                nodesUrl += `&agent_id=${agentFilter}`;
+            }
+            
+            // Nodes are revalidated on every refresh; agents change rarely and are reused for a minute
+            const { data: nodesData, changed: nodesChanged } = await fetchCached(nodesUrl, 0);
+            nodeData = Object.freeze(nodesData.nodes || []);
+            
+            // Load agents
+            const { data: agentsData, changed: agentsChanged } = await fetchCached('/api/agents', 60000);
+            agentData = Object.freeze(agentsData.agents || []);
+            
+            // Parse last-seen times to epoch ms once per payload, so activity
+            // checks are plain number compares instead of Date objects
+            if (nodesChanged) {
+                const count = nodeData.length;
+                nodeLat = new Float64Array(count);
+                nodeLon = new Float64Array(count);
+                for (let i = 0; i < count; i++) {
+                    const node = nodeData[i];
+                    const pos = node.position;
+                    nodeLat[i] = pos && pos[0] !== null ? pos[0] : NaN;
+                    nodeLon[i] = pos && pos[1] !== null ? pos[1] : NaN;
+                    node._lastSeenMs = Date.parse(node.updated_at);
                 }
-            });
+            }
+            if (agentsChanged) {
+                for (const agent of agentData) agent._lastSeenMs = Date.parse(agent.last_seen);
+            }
+            
+            displayNodes();
+            displayAgents();
+            updateStats();
+            if (agentsChanged) updateAgentFilter();
+        }
+        
+        function displayNodes() {
+            const filterType = UI.filterType.value;
+            const now = Date.now();
+            
+            // Markers are reused across refreshes: existing ones are moved and
+            // restyled, new nodes get a marker and vanished ones are dropped
+            const wantedLayer = nodeData.length > CLUSTER_THRESHOLD ? nodeCluster : nodeGroup;
+            if (wantedLayer !== nodeLayer) {
+                nodeLayer.clearLayers();
+                nodeLayer = wantedLayer;
+            }
+            const seen = new Set();
+            const treeItems = [];
             
-            nodeData.forEach(node => {
-                if (!node.position || node.position[0] === null || node.position[1] === null) return;
+            nodeData.forEach((node, i) => {
+                const lat = nodeLat[i];
+                const lon = nodeLon[i];
+                if (Number.isNaN(lat) || Number.isNaN(lon)) return;
                 
-                const lastSeen = new Date(node.updated_at);
-                const hoursOld = (now - lastSeen) / (1000 * 60 * 60);
+                const hoursOld = (now - node._lastSeenMs) / (1000 * 60 * 60);
                 const isActive = hoursOld < 1;
                 
                 // Apply filter
@@ -5104,118 +5182,158 @@ class DistributedMeshyMcMapfaceServer:
                 // Override for critical battery (always red)
                 if (node.battery_level && node.battery_level < 20) color = '#D32F2F';
                 
-                // Create marker
-                const marker = L.circleMarker([node.position[0], node.position[1]], {
-                    radius: 8,
-                    fillColor: color,
-                    color: '#fff',
-                    weight: 2,
-                    opacity: 1,
-                    fillOpacity: 0.8
-                });
-                
-                // Create popup content with names and hardware info
-                let nodeTitle = node.node_id;
-                const hasShortName = node.short_name && node.short_name.trim() !== '';
-                const hasLongName = node.long_name && node.long_name.trim() !== '';
-                
-                if (hasShortName && hasLongName) {
-                    nodeTitle = `${node.short_name} (${node.long_name})`;
-                } else if (hasShortName) {
-                    nodeTitle = `${node.short_name} (${node.node_id})`;
-                } else if (hasLongName) {
-                    nodeTitle = `${node.long_name} (${node.node_id})`;
+                const key = `node_${node.node_id}`;
+                seen.add(key);
+                let marker = markers.get(key);
+                if (marker) {
+                    const latLng = marker.getLatLng();
+                    if (latLng.lat !== lat || latLng.lng !== lon) {
+                        // Detach so the viewport sync re-adds (and re-clusters) it at the new position
+                        nodeLayer.removeLayer(marker);
+                        marker.setLatLng([lat, lon]);
+                    }
+                    marker.setStyle({ fillColor: color });
+                } else {
+                    marker = L.circleMarker([lat, lon], {
+                        renderer: markerRenderer,
+                        radius: 8,
+                        fillColor: color,
+                        color: '#fff',
+                        weight: 2,
+                        opacity: 1,
+                        fillOpacity: 0.8
+                    });
+                    
+                    // Popup HTML is only built when the popup is opened
+                    marker.bindPopup(source => buildNodePopupHtml(source.node), { maxWidth: 350 });
+                    markers.set(key, marker);
                 }
-                
-                // Build route information display
-                let routeInfo = '';
-                if (node.agent_routes && Object.keys(node.agent_routes).length > 0) {
-                    routeInfo = '<strong>🛣️ Network Routes:</strong><br>';
-                    for (const [agentId, routeData] of Object.entries(node.agent_routes)) {
-                        const agentName = routeData.location_name || routeData.agent_id;
-                        const hopCount = routeData.hop_count;
-                        
-                        if (routeData.route_type === 'traceroute' && routeData.route_path && routeData.route_path.length > 0) {
-                            // Show full traceroute path
-                            const pathDisplay = routeData.route_path.join(' → ');
-                            const discoveryTime = routeData.discovery_timestamp ? 
-                                new Date(routeData.discovery_timestamp).toLocaleString() : 'Unknown';
-                            routeInfo += `&nbsp;&nbsp;📍 <strong>${agentName}</strong>: ${hopCount} hops<br>`;
-                            routeInfo += `&nbsp;&nbsp;&nbsp;&nbsp;<span class="route-path">${pathDisplay}</span><br>`;
-                            routeInfo += `&nbsp;&nbsp;&nbsp;&nbsp;<span class="route-discovery-time">Discovered: ${discoveryTime}</span><br>`;
-                        } else {
-                            // Show basic hop count
-                            routeInfo += `&nbsp;&nbsp;📍 <strong>${agentName}</strong>: ${hopCount !== null ? hopCount + ' hops' : 'Unknown hops'}<br>`;
-                        }
+                marker.node = node;
+                treeItems.push({ minX: lon, minY: lat, maxX: lon, maxY: lat, marker });
+            });
+            
+            markers.forEach((marker, key) => {
+                if (key.startsWith('node_') && !seen.has(key)) {
+                    nodeLayer.removeLayer(marker);
+                    markers.delete(key);
+                }
+            });
+            nodeTree.clear();
+            nodeTree.load(treeItems);
+            
+            syncNodeMarkersToViewport();
+        }
+        
+        function buildNodePopupHtml(node) {
+            // Create popup content with names and hardware info
+            let nodeTitle = node.node_id;
+            const hasShortName = node.short_name && node.short_name.trim() !== '';
+            const hasLongName = node.long_name && node.long_name.trim() !== '';
+            
+            if (hasShortName && hasLongName) {
+                nodeTitle = `${node.short_name} (${node.long_name})`;
+            } else if (hasShortName) {
+                nodeTitle = `${node.short_name} (${node.node_id})`;
+            } else if (hasLongName) {
+                nodeTitle = `${node.long_name} (${node.node_id})`;
+            }
+            
+            // Build route information display
+            let routeInfo = '';
+            if (node.agent_routes && Object.keys(node.agent_routes).length > 0) {
+                routeInfo = '<strong>🛣️ Network Routes:</strong><br>';
+                for (const [agentId, routeData] of Object.entries(node.agent_routes)) {
+                    const agentName = routeData.location_name || routeData.agent_id;
+                    const hopCount = routeData.hop_count;
+                    
+                    if (routeData.route_type === 'traceroute' && routeData.route_path && routeData.route_path.length > 0) {
+                        // Show full traceroute path
+                        const pathDisplay = routeData.route_path.join(' → ');
+                        const discoveryTime = routeData.discovery_timestamp ? 
+                            fmtTs(routeData.discovery_timestamp) : 'Unknown';
+                        routeInfo += `&nbsp;&nbsp;📍 <strong>${agentName}</strong>: ${hopCount} hops<br>`;
+                        routeInfo += `&nbsp;&nbsp;&nbsp;&nbsp;<span class="route-path">${pathDisplay}</span><br>`;
+                        routeInfo += `&nbsp;&nbsp;&nbsp;&nbsp;<span class="route-discovery-time">Discovered: ${discoveryTime}</span><br>`;
+                    } else {
+                        // Show basic hop count
+                        routeInfo += `&nbsp;&nbsp;📍 <strong>${agentName}</strong>: ${hopCount !== null ? hopCount + ' hops' : 'Unknown hops'}<br>`;
                     }
-                } else if (node.hops_away !== null) {
-                    // Fallback to old format if no route data
-                    routeInfo = `<strong>🛣️ Network Hops: ${node.hops_away}</strong><br>`;
                 }
+            } else if (node.hops_away !== null) {
+                // Fallback to old format if no route data
+                routeInfo = `<strong>🛣️ Network Hops: ${node.hops_away}</strong><br>`;
+            }
 
-                const popupContent = `
-                    <strong>📡 <a href="#" onclick="showNodeDetails('${node.node_id}'); return false;" style="color: var(--accent-color); text-decoration: none; cursor: pointer;">${nodeTitle}</a></strong><br>
-                    ${node.hw_model ? `Hardware: ${node.hw_model}<br>` : ''}
-                    ${node.role ? `Role: ${node.role}<br>` : ''}
-                    Last Seen: ${lastSeen.toLocaleString()}<br>
-                    ${node.battery_level ? `Battery: ${node.battery_level}%<br>` : ''}
-                    ${node.voltage ? `Voltage: ${node.voltage.toFixed(2)}V<br>` : ''}
-                    ${routeInfo}
-                    ${node.rssi ? `RSSI: ${node.rssi} dBm<br>` : ''}
-                    ${node.snr ? `SNR: ${node.snr} dB` : ''}
-                `;
-                
-                marker.bindPopup(popupContent);
-                marker.addTo(map);
-                markers.set(`node_${node.node_id}`, marker);
-            });
+            return `
+                <strong>📡 <a href="#" onclick="showNodeDetails('${node.node_id}'); return false;" style="color: var(--accent-color); text-decoration: none; cursor: pointer;">${nodeTitle}</a></strong><br>
+                ${node.hw_model ? `Hardware: ${node.hw_model}<br>` : ''}
+                ${node.role ? `Role: ${node.role}<br>` : ''}
+                Last Seen: ${fmtTs(node.updated_at)}<br>
+                ${node.battery_level ? `Battery: ${node.battery_level}%<br>` : ''}
+                ${node.voltage ? `Voltage: ${node.voltage.toFixed(2)}V<br>` : ''}
+                ${routeInfo}
+                ${node.rssi ? `RSSI: ${node.rssi} dBm<br>` : ''}
+                ${node.snr ? `SNR: ${node.snr} dB` : ''}
+            `;
         }
         
         function displayAgents() {
-            const filterType = document.getElementById('filter-type').value;
+            const filterType = UI.filterType.value;
+            
+            // Agent markers are reused across refreshes like node markers
+            const seen = new Set();
+            
+            // Skip agents when showing nodes only
+            if (filterType !== 'nodes') {
+                agentData.forEach(agent => {
+                    if (!agent.coordinates || agent.coordinates.length !== 2) return;
+                    
+                    const key = `agent_${agent.agent_id}`;
+                    seen.add(key);
+                    let marker = markers.get(key);
+                    if (marker) {
+                        marker.setLatLng(agent.coordinates);
+                    } else {
+                        // Create agent marker (smaller, less prominent)
+                        marker = L.circleMarker([agent.coordinates[0], agent.coordinates[1]], {
+                            renderer: markerRenderer,
+                            radius: 6,
+                            fillColor: '#2196F3',
+                            color: '#fff',
+                            weight: 2,
+                            opacity: 1,
+                            fillOpacity: 0.9
+                        });
+                        
+                        marker.bindPopup(source => buildAgentPopupHtml(source.agent));
+                        marker.addTo(map);
+                        markers.set(key, marker);
+                    }
+                    marker.agent = agent;
+                });
+            }
             
-            // Clear existing agent markers
             markers.forEach((marker, key) => {
-                if (key.startsWith('agent_')) {
+                if (key.startsWith('agent_') && !seen.has(key)) {
                     map.removeLayer(marker);
                     markers.delete(key);
                 }
             });
-            
-            if (filterType === 'nodes') return; // Skip agents when showing nodes only
-            
-            agentData.forEach(agent => {
-                if (!agent.coordinates || agent.coordinates.length !== 2) return;
-                
-                const lastSeen = new Date(agent.last_seen);
-                const isActive = (new Date() - lastSeen) < (60 * 60 * 1000); // 1 hour
-                
-                // Create agent marker (smaller, less prominent)
-                const marker = L.circleMarker([agent.coordinates[0], agent.coordinates[1]], {
-                    radius: 6,
-                    fillColor: '#2196F3',
-                    color: '#fff',
-                    weight: 2,
-                    opacity: 1,
-                    fillOpacity: 0.9
-                });
-                
-                const popupContent = `
-                    <strong>🏢 Agent: ${agent.agent_id}</strong><br>
-                    Location: ${agent.location_name}<br>
-                    Last Seen: ${lastSeen.toLocaleString()}<br>
-                    Status: ${isActive ? '✅ Active' : '❌ Inactive'}<br>
-                    Total Packets: ${agent.packet_count}
-                `;
-                
-                marker.bindPopup(popupContent);
-                marker.addTo(map);
-                markers.set(`agent_${agent.agent_id}`, marker);
-            });
+        }
+        
+        function buildAgentPopupHtml(agent) {
+            const isActive = (Date.now() - agent._lastSeenMs) < (60 * 60 * 1000); // 1 hour
+            return `
+                <strong>🏢 Agent: ${agent.agent_id}</strong><br>
+                Location: ${agent.location_name}<br>
+                Last Seen: ${fmtTs(agent.last_seen)}<br>
+                Status: ${isActive ? '✅ Active' : '❌ Inactive'}<br>
+                Total Packets: ${agent.packet_count}
+            `;
         }
         
         function displayConnections(packets) {
-            const showConnections = document.getElementById('show-connections').checked;
+            const showConnections = UI.showConnections.checked;
             
             // Clear existing connections
             connections.forEach(line => map.removeLayer(line));
@@ -5223,111 +5341,184 @@ class DistributedMeshyMcMapfaceServer:
             
             if (!showConnections) return;
             
-            // Create connections from recent packets (all types, not just text)
+            // Create connections from recent packets (all types, not just text),
+            // grouped as from_node -> to_node -> stats without building key strings
             const connectionMap = new Map();
             
-            packets.forEach(packet => {
+            for (const packet of packets) {
+                const from = packet.from_node;
+                const to = packet.to_node;
+                const timestamp = packet.timestamp;
+                
                 // Show connections for all packet types except broadcasts
-                if (packet.from_node && packet.to_node && packet.to_node !== '^all' && packet.to_node !== 'Broadcast') {
-                    const key = `${packet.from_node}-${packet.to_node}`;
-                    if (!connectionMap.has(key)) {
-                        connectionMap.set(key, { count: 0, latest: packet.timestamp, types: new Set() });
-                    }
-                    connectionMap.get(key).count++;
-                    connectionMap.get(key).types.add(packet.type);
-                    if (packet.timestamp > connectionMap.get(key).latest) {
-                        connectionMap.get(key).latest = packet.timestamp;
-                    }
+                if (!from || !to || to === '^all' || to === 'Broadcast') continue;
+                
+                let targets = connectionMap.get(from);
+                if (!targets) {
+                    targets = new Map();
+                    connectionMap.set(from, targets);
                 }
-            });
+                let data = targets.get(to);
+                if (!data) {
+                    data = { count: 0, latest: timestamp, types: new Set() };
+                    targets.set(to, data);
+                }
+                data.count++;
+                data.types.add(packet.type);
+                if (timestamp > data.latest) {
+                    data.latest = timestamp;
+                }
+            }
+            
+            // Endpoint markers are resolved once per id, not once per connection
+            const endpointMarkers = new Map();
+            const endpointMarker = id => {
+                let marker = endpointMarkers.get(id);
+                if (marker === undefined) {
+                    marker = markers.get(`node_${id}`) || markers.get(`agent_${id}`) || null;
+                    endpointMarkers.set(id, marker);
+                }
+                return marker;
+            };
+            
+            // Only draw lines that pass through the (padded) viewport; they
+            // are redrawn on moveend
+            const viewBounds = map.getBounds().pad(0.2);
             
-            connectionMap.forEach((data, key) => {
-                const [fromNode, toNode] = key.split('-');
-                let fromMarker = markers.get(`node_${fromNode}`) || markers.get(`agent_${fromNode}`);
-                let toMarker = markers.get(`node_${toNode}`) || markers.get(`agent_${toNode}`);
+            // Lines sharing a style are drawn as one multi-segment polyline
+            const lineGroups = new Map();
+            
+            for (const [fromNode, targets] of connectionMap) {
+                const fromMarker = endpointMarker(fromNode);
+                if (!fromMarker) continue;
                 
-                // Show agent-to-node connections even if destination node isn't on map
-                // This reveals the network reach from agents
-                if (fromMarker && toMarker) {
-                    // Style connections based on activity and type
-                    let lineColor = '#2196F3'; // Default blue
-                    let lineWeight = Math.max(2, Math.min(data.count / 5, 6));
-                    let lineOpacity = 0.7;
-                    
-                    // Color code by packet types
-                    if (data.types.has('text')) lineColor = '#4CAF50'; // Green for text
-                    else if (data.types.has('position')) lineColor = '#FF9800'; // Orange for position
-                    else if (data.types.has('telemetry')) lineColor = '#9C27B0'; // Purple for telemetry
-                    
-                    const line = L.polyline([
-                        fromMarker.getLatLng(),
-                        toMarker.getLatLng()
-                    ], {
-                        color: lineColor,
-                        weight: lineWeight,
-                        opacity: lineOpacity,
-                        dashArray: data.types.has('text') ? null : '5, 5' // Solid for text, dashed for data
-                    });
+                for (const [toNode, data] of targets) {
+                    const toMarker = endpointMarker(toNode);
+                    if (toMarker && !viewBounds.intersects(L.latLngBounds(fromMarker.getLatLng(), toMarker.getLatLng()))) continue;
+                
+                    // Show agent-to-node connections even if destination node isn't on map
+                    // This reveals the network reach from agents
+                    if (fromMarker && toMarker) {
+                        // Style connections based on activity and type
+                        let lineColor = '#2196F3'; // Default blue
+                        let lineWeight = Math.round(Math.min(2 + Math.log2(data.count), 8));
+                        let lineOpacity = 0.7;
                     
-                    // Enhanced popup with routing information
-                    const typesArray = Array.from(data.types);
-                    line.bindPopup(`
-                        <strong>🔗 Mesh Connection</strong><br>
-                        <strong>From:</strong> ${fromNode}<br>
-                        <strong>To:</strong> ${toNode}<br>
-                        <strong>Packets:</strong> ${data.count}<br>
-                        <strong>Types:</strong> ${typesArray.join(', ')}<br>
-                        <strong>Latest:</strong> ${new Date(data.latest).toLocaleString()}
-                    `);
+                        // Color code by packet types
+                        if (data.types.has('text')) lineColor = '#4CAF50'; // Green for text
+                        else if (data.types.has('position')) lineColor = '#FF9800'; // Orange for position
+                        else if (data.types.has('telemetry')) lineColor = '#9C27B0'; // Purple for telemetry
                     
-                    line.addTo(map);
-                    connections.push(line);
+                        const dashArray = data.types.has('text') ? null : '5, 5'; // Solid for text, dashed for data
+                        const styleKey = `${lineColor}|${lineWeight}|${dashArray}`;
+                        let group = lineGroups.get(styleKey);
+                        if (!group) {
+                            group = {
+                                style: { color: lineColor, weight: lineWeight, opacity: lineOpacity, dashArray },
+                                segments: [],
+                                details: []
+                            };
+                            lineGroups.set(styleKey, group);
+                        }
+                        group.segments.push([fromMarker.getLatLng(), toMarker.getLatLng()]);
+                        group.details.push({ fromNode, toNode, data });
+                    }
+                }
+            }
+            
+            for (const group of lineGroups.values()) {
+                const line = L.polyline(group.segments, { ...group.style, renderer: markerRenderer });
+                // Enhanced popup with routing information, built when clicked
+                line.on('click', e => openConnectionPopup(group, e.latlng));
+                line.addTo(map);
+                connections.push(line);
+            }
+        }
+        
+        // Find the segment of a grouped connection line nearest to the click
+        // and show that connection's popup
+        function openConnectionPopup(group, latlng) {
+            const point = map.latLngToLayerPoint(latlng);
+            let nearest = 0;
+            let nearestDistance = Infinity;
+            group.segments.forEach(([from, to], index) => {
+                const distance = L.LineUtil.pointToSegmentDistance(
+                    point, map.latLngToLayerPoint(from), map.latLngToLayerPoint(to));
+                if (distance < nearestDistance) {
+                    nearestDistance = distance;
+                    nearest = index;
                 }
             });
+            
+            const { fromNode, toNode, data } = group.details[nearest];
+            L.popup()
+                .setLatLng(latlng)
+                .setContent(buildConnectionPopupHtml(fromNode, toNode, data))
+                .openOn(map);
+        }
+        
+        function buildConnectionPopupHtml(fromNode, toNode, data) {
+            return `
+                <strong>🔗 Mesh Connection</strong><br>
+                <strong>From:</strong> ${fromNode}<br>
+                <strong>To:</strong> ${toNode}<br>
+                <strong>Packets:</strong> ${data.count}<br>
+                <strong>Types:</strong> ${Array.from(data.types).join(', ')}<br>
+                <strong>Latest:</strong> ${fmtTs(data.latest)}
+            `;
         }
         
         function updateStats() {
-            const now = new Date();
-            const activeNodes = nodeData.filter(node => {
-                const lastSeen = new Date(node.updated_at);
-                return (now - lastSeen) < (60 * 60 * 1000);
-            }).length;
-            
-            document.getElementById('total-nodes').textContent = nodeData.length;
-            document.getElementById('active-nodes').textContent = activeNodes;
-            document.getElementById('total-agents').textContent = agentData.length;
+            const now = Date.now();
+            let activeNodes = 0;
+            for (const node of nodeData) {
+                if (now - node._lastSeenMs < 60 * 60 * 1000) activeNodes++;
+            }
             
-            // Calculate rough coverage area
-            const positions = [...nodeData, ...agentData].map(item => 
-                item.position || item.coordinates
-            ).filter(pos => pos && pos[0] && pos[1]);
+            // Calculate rough coverage area from the lat/lon bounding box,
+            // tracked in a single pass over nodes and agents
+            let count = 0;
+            let minLat = Infinity, maxLat = -Infinity, minLon = Infinity, maxLon = -Infinity;
+            const extend = (lat, lon) => {
+                if (!lat || !lon) return;
+                count++;
+                if (lat < minLat) minLat = lat;
+                if (lat > maxLat) maxLat = lat;
+                if (lon < minLon) minLon = lon;
+                if (lon > maxLon) maxLon = lon;
+            };
+            for (let i = 0; i < nodeLat.length; i++) extend(nodeLat[i], nodeLon[i]);
+            for (const agent of agentData) {
+                if (agent.coordinates) extend(agent.coordinates[0], agent.coordinates[1]);
+            }
             
             let area = 0;
-            if (positions.length > 2) {
-                const lats = positions.map(p => p[0]);
-                const lons = positions.map(p => p[1]);
-                const latRange = Math.max(...lats) - Math.min(...lats);
-                const lonRange = Math.max(...lons) - Math.min(...lons);
-                area = Math.round(latRange * lonRange * 111 * 111); // Rough km²
+            if (count > 2) {
+                area = Math.round((maxLat - minLat) * (maxLon - minLon) * 111 * 111); // Rough km²
             }
             
-            document.getElementById('coverage-area').textContent = area > 0 ? area : '-';
+            // Write all stats together once everything is computed
+            const totalNodes = nodeData.length;
+            const totalAgents = agentData.length;
+            requestAnimationFrame(() => {
+                UI.totalNodes.textContent = totalNodes;
+                UI.activeNodes.textContent = activeNodes;
+                UI.totalAgents.textContent = totalAgents;
+                UI.coverage.textContent = area > 0 ? area : '-';
+            });
         }
         
         function updateAgentFilter() {
-            const select = document.getElementById('filter-agent');
+            const select = UI.filterAgent;
             const currentValue = select.value;
             
-            // Clear existing options except "All Agents"
-            select.innerHTML = '<option value="all">All Agents</option>';
-            
-            // Add agent options
+            // Build "All Agents" plus one option per agent, then swap them in with a single write
+            const frag = document.createDocumentFragment();
+            frag.appendChild(new Option('All Agents', 'all'));
             agentData.forEach(agent => {
-                const option = document.createElement('option');
-                option.value = agent.agent_id;
-                option.textContent = `${agent.agent_id} (${agent.location_name})`;
-                select.appendChild(option);
+                frag.appendChild(new Option(`${agent.agent_id} (${agent.location_name})`, agent.agent_id));
             });
+            select.replaceChildren(frag);
             
             // Restore previous selection
             select.value = currentValue;
@@ -5350,35 +5541,32 @@ class DistributedMeshyMcMapfaceServer:
             }
         }
         
-        // Event listeners
-        document.getElementById('filter-type').addEventListener('change', () => {
+        // Coalesce repeated requests for the same render into one per frame
+        const pendingRenders = new Set();
+        
+        function scheduleRender(fn) {
+            if (pendingRenders.has(fn)) return;
+            pendingRenders.add(fn);
+            requestAnimationFrame(() => {
+                pendingRenders.delete(fn);
+                fn();
+            });
+        }
+        
+        function renderMarkers() {
             displayNodes();
             displayAgents();
-        });
+        }
         
-        document.getElementById('filter-agent').addEventListener('change', refreshMap);
-        document.getElementById('time-range').addEventListener('change', refreshMap);
-        document.getElementById('show-connections').addEventListener('change', () => {
+        function renderConnections() {
             displayConnections(packetData); // Use actual packet data
-        });
-        
-        // Theme toggle functions
-        function toggleTheme() {
-            const html = document.documentElement;
-            const currentTheme = html.getAttribute('data-theme') || 'light';
-            const newTheme = currentTheme === 'light' ? 'dark' : 'light';
-            
-            html.setAttribute('data-theme', newTheme);
-            localStorage.setItem('theme', newTheme);
-            updateThemeToggleText(newTheme);
         }
         
-        function updateThemeToggleText(theme) {
-            const toggle = document.getElementById('theme-toggle');
-            if (toggle) {
-                toggle.textContent = theme === 'light' ? '🌙 Dark' : '☀️ Light';
-            }
-        }
+        // Event listeners
+        UI.filterType.addEventListener('change', () => scheduleRender(renderMarkers));
+        UI.filterAgent.addEventListener('change', () => scheduleRender(refreshMap));
+        UI.timeRange.addEventListener('change', () => scheduleRender(refreshMap));
+        UI.showConnections.addEventListener('change', () => scheduleRender(renderConnections));
         
         // Robust date parsing function
         function parseTimestamp(timestamp) {
@@ -5392,12 +5580,6 @@ class DistributedMeshyMcMapfaceServer:
             // Otherwise, assume UTC and add 'Z'
             return new Date(timestamp + 'Z');
         }
-
-        // Initialize theme toggle text on load
-        window.addEventListener('DOMContentLoaded', () => {
-            const currentTheme = document.documentElement.getAttribute('data-theme') || 'light';
-            updateThemeToggleText(currentTheme);
-        });
         
         // Initialize
         async function init() {
@@ -5406,29 +5588,48 @@ class DistributedMeshyMcMapfaceServer:
         }
         init();
         
-        // Auto-refresh every 30 seconds
-        setInterval(loadMapData, 30000);
+        // Live updates: the server pushes new packets and node changes as agents
+        // report, instead of the page re-fetching everything on a timer
+        let mapEvents = null;
+        let mapEventsResync = false;
         
-        // Fit map after initial load
-        setTimeout(fitMapToMarkers, 2000);
+        function refreshMarkers() {
+            loadMarkerData().catch(error => console.error('Error refreshing nodes:', error));
+        }
         
-        // Theme toggle functions
-        function toggleTheme() {
-            const html = document.documentElement;
-            const currentTheme = html.getAttribute('data-theme') || 'light';
-            const newTheme = currentTheme === 'light' ? 'dark' : 'light';
-            
-            html.setAttribute('data-theme', newTheme);
-            localStorage.setItem('theme', newTheme);
-            updateThemeToggleText(newTheme);
+        function connectMapEvents() {
+            mapEvents = new EventSource('/api/events');
+            mapEvents.addEventListener('open', () => {
+                // Events may have been missed while disconnected
+                if (mapEventsResync) scheduleRender(loadMapData);
+                mapEventsResync = false;
+            });
+            mapEvents.addEventListener('error', () => { mapEventsResync = true; });
+            mapEvents.addEventListener('packets', event => {
+                // Newest first, keeping the same 500-packet window as the initial load
+                const incoming = JSON.parse(event.data).reverse();
+                packetData = Object.freeze(incoming.concat(packetData).slice(0, 500));
+                scheduleRender(renderConnections);
+            });
+            mapEvents.addEventListener('nodes', () => scheduleRender(refreshMarkers));
         }
         
-        function updateThemeToggleText(theme) {
-            const toggle = document.getElementById('theme-toggle');
-            if (toggle) {
-                toggle.textContent = theme === 'light' ? '🌙 Dark' : '☀️ Light';
+        // Only hold the event stream open while the tab is visible
+        document.addEventListener('visibilitychange', () => {
+            if (document.hidden) {
+                if (mapEvents) {
+                    mapEvents.close();
+                    mapEvents = null;
+                    mapEventsResync = true;
+                }
+            } else if (!mapEvents) {
+                connectMapEvents();
             }
-        }
+        });
+        if (!document.hidden) connectMapEvents();
+        
+        // Fit map after initial load
+        setTimeout(fitMapToMarkers, 2000);
         
         // Node Details Modal Functions
         let nodeDetailsModal = null;
@@ -5864,8 +6065,7 @@ class DistributedMeshyMcMapfaceServer:
 </body>
 </html>
         '''
-        html = html.replace('SITE_NAME', self.site_name)
-        return web.Response(text=html, content_type='text/html')
+        return self.page_response(html)
 
     async def start_server(self):
         """Start the web server"""
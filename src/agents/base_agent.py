@@ -3,24 +3,145 @@ Base agent class for MeshyMcMapface
 """
 import asyncio
 import logging
+import os
+import sys
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, List
+from functools import lru_cache
+from operator import attrgetter
+from types import MappingProxyType
+from typing import Dict, Optional, List, Tuple
 
 from ..core.config import ConfigManager, AgentConfig, MeshtasticConfig
-from ..core.database import DatabaseConnection
+from ..core.database import DatabaseConnection, RouteCacheRepository
 from ..core.exceptions import MeshyMcMapfaceError, ConfigurationError
 from ..mesh_integration.connections import ConnectionManager
 from ..mesh_integration.packet_parser import PacketProcessor
 from ..mesh_integration.node_tracker import NodeTracker
 from ..utils.logging import LoggerMixin
 
+# meshtastic_traceroute_integration lives in the project root
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
+
+# Route discovery settings used when the agent config doesn't override them
+_ROUTE_DISCOVERY_DEFAULTS = MappingProxyType({
+    'enabled': True,
+    'interval_minutes': 60,
+    'hop_limit': 7,
+    'delay_between_traces': 3.0
+})
+
+# Received packets waiting for the consumer task, and how many it handles per wakeup
+PACKET_QUEUE_SIZE = 4096
+PACKET_BATCH_SIZE = 64
+
+# Fields copied from a node's user/position/deviceMetrics into nodedb data,
+# with the default used when a field is missing
+_USER_KEYS = ('id', 'longName', 'shortName', 'macaddr', 'hwModel', 'role', 'isLicensed')
+_USER_DEFAULTS = ('', '', '', '', 0, 0, False)
+_POSITION_KEYS = ('latitude', 'longitude', 'altitude', 'time')
+_POSITION_DEFAULTS = (0, 0, 0, 0)
+_METRIC_KEYS = ('batteryLevel', 'voltage', 'channelUtilization', 'airUtilTx', 'uptimeSeconds')
+_METRIC_DEFAULTS = (None, None, None, None, None)
+_NODE_KEYS = ('hopsAway', 'lastHeard', 'isFavorite')
+_NODE_DEFAULTS = (None, None, False)
+
+_get_user_fields = attrgetter(*_USER_KEYS)
+_get_position_fields = attrgetter(*_POSITION_KEYS)
+_get_metric_fields = attrgetter(*_METRIC_KEYS)
+_get_node_fields = attrgetter(*_NODE_KEYS)
+
+
+def _object_fields(obj, getter: attrgetter, keys: Tuple[str, ...], defaults: Tuple) -> Dict:
+    """Read a fixed set of attributes off an object in one attrgetter call"""
+    try:
+        return dict(zip(keys, getter(obj)))
+    except AttributeError:
+        # Some attribute is missing, fall back to per-field defaults
+        return {key: getattr(obj, key, default) for key, default in zip(keys, defaults)}
+
+
+def _dict_fields(src: Dict, keys: Tuple[str, ...], defaults: Tuple) -> Dict:
+    """Read a fixed set of keys from a dict, with per-key defaults"""
+    return {key: src.get(key, default) for key, default in zip(keys, defaults)}
+
+
+def _extract_from_dict(node: Dict, node_id: str) -> Dict:
+    """Build the nodedb entry for a node reported as a dict"""
+    # Sub-sections are only included when the node reported them
+    node_data = _dict_fields(node, _NODE_KEYS, _NODE_DEFAULTS)
+    user = node.get('user')
+    if user:
+        user_fields = _dict_fields(user, _USER_KEYS, _USER_DEFAULTS)
+        user_fields['id'] = user_fields['id'] or node_id
+        node_data['user'] = user_fields
+    position = node.get('position')
+    if position:
+        node_data['position'] = _dict_fields(position, _POSITION_KEYS, _POSITION_DEFAULTS)
+    metrics = node.get('deviceMetrics')
+    if metrics:
+        node_data['deviceMetrics'] = _dict_fields(metrics, _METRIC_KEYS, _METRIC_DEFAULTS)
+    return node_data
+
+
+def _extract_from_object(node, node_id: str) -> Dict:
+    """Build the nodedb entry for a node reported as an object"""
+    node_data = _object_fields(node, _get_node_fields, _NODE_KEYS, _NODE_DEFAULTS)
+    user = getattr(node, 'user', None)
+    if user:
+        user_fields = _object_fields(user, _get_user_fields, _USER_KEYS, _USER_DEFAULTS)
+        user_fields['id'] = user_fields['id'] or node_id
+        node_data['user'] = user_fields
+    position = getattr(node, 'position', None)
+    if position:
+        node_data['position'] = _object_fields(position, _get_position_fields, _POSITION_KEYS, _POSITION_DEFAULTS)
+    metrics = getattr(node, 'deviceMetrics', None)
+    if metrics:
+        node_data['deviceMetrics'] = _object_fields(metrics, _get_metric_fields, _METRIC_KEYS, _METRIC_DEFAULTS)
+    return node_data
+
+
+@lru_cache(maxsize=4096)
+def _format_node_id(node_num: int) -> str:
+    """Format a node number as its '!xxxxxxxx' ID (the same nodes come up every cycle)"""
+    return f"!{node_num:08x}"
+
+
+def _node_fingerprint(node) -> int:
+    """Hash the node fields that change when fresh data is heard from it"""
+    if isinstance(node, dict):
+        metrics = node.get('deviceMetrics') or {}
+        position = node.get('position') or {}
+        return hash((node.get('lastHeard'), metrics.get('batteryLevel'),
+                     metrics.get('voltage'), position.get('time')))
+    metrics = getattr(node, 'deviceMetrics', None)
+    position = getattr(node, 'position', None)
+    return hash((getattr(node, 'lastHeard', None), getattr(metrics, 'batteryLevel', None),
+                 getattr(metrics, 'voltage', None), getattr(position, 'time', None)))
+
 
 class BaseAgent(ABC, LoggerMixin):
     """Base class for all MeshyMcMapface agents"""
     
+    # Fixed attribute layout for the state read on every packet and poll;
+    # subclasses without __slots__ still get a __dict__ for their own state
+    __slots__ = (
+        'config_file', 'running', '_stop_event',
+        'config_manager', 'agent_config', 'meshtastic_config',
+        'db_connection', 'connection_manager', 'packet_processor', 'node_tracker', 'traceroute_manager',
+        '_current_connection', '_is_connected', '_local_node_num_cache',
+        '_node_table_version', '_known_nodes_cache', '_known_nodes_cache_key',
+        '_route_config_cache', '_prev_node_hash', '_prev_node_data',
+        '_loop', '_packet_queue', '_packet_consumer_task',
+        '_process_packet', '_update_node', '_handle_packet',
+    )
+    
     def __init__(self, config_file: str):
         self.config_file = config_file
         self.running = False
+        # Set by stop() so sleeping loops wake up immediately on shutdown
+        self._stop_event = asyncio.Event()
         
         # Initialize components
         self.config_manager: Optional[ConfigManager] = None
@@ -33,6 +154,29 @@ class BaseAgent(ABC, LoggerMixin):
         self.node_tracker: Optional[NodeTracker] = None
         self.traceroute_manager = None
         
+        # Connection from the last successful connect_to_meshtastic, None when disconnected
+        self._current_connection = None
+        self._is_connected: bool = False
+        # Local node number for the current connection, looked up on first use
+        self._local_node_num_cache: Optional[int] = None
+        
+        # Traceroute targets, reused until a node update or a change in node count
+        self._node_table_version = 0
+        self._known_nodes_cache: Optional[List[str]] = None
+        self._known_nodes_cache_key: Optional[Tuple[int, int]] = None
+        
+        # Route discovery settings, resolved on first use
+        self._route_config_cache: Optional[Dict] = None
+        
+        # Extended node data from the last nodedb read, reused for unchanged nodes
+        self._prev_node_hash: Dict[str, int] = {}
+        self._prev_node_data: Dict[str, Dict] = {}
+        
+        # Packets are handed from the Meshtastic callback thread to the event loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._packet_queue: Optional[asyncio.Queue] = None
+        self._packet_consumer_task: Optional[asyncio.Task] = None
+        
         self._initialize_components()
     
     def _initialize_components(self):
@@ -52,12 +196,46 @@ class BaseAgent(ABC, LoggerMixin):
             self.packet_processor = PacketProcessor()
             self.node_tracker = NodeTracker()
             
-            self.logger.info(f"Initialized agent {self.agent_config.id} with config from {self.config_file}")
+            # Bound once so the per-packet path skips the attribute chains
+            self._process_packet = self.packet_processor.process_packet
+            self._update_node = self.node_tracker.update_from_packet
+            self._handle_packet = self._handle_processed_packet
+            
+            self.logger.info("Initialized agent %s with config from %s", self.agent_config.id, self.config_file)
             
         except Exception as e:
-            self.logger.error(f"Failed to initialize agent components: {e}")
+            self.logger.error("Failed to initialize agent components: %s", e)
             raise ConfigurationError(f"Agent initialization failed: {e}")
     
+    async def setup_database(self):
+        """Create the database schema off the event loop before the agent starts"""
+        await asyncio.to_thread(self.db_connection.initialize)
+        self.logger.debug("Database ready at %s", self.db_connection.db_path)
+    
+    def start_packet_consumer(self):
+        """Start the task that processes packets queued by on_receive"""
+        self._loop = asyncio.get_running_loop()
+        self._packet_queue = asyncio.Queue(maxsize=PACKET_QUEUE_SIZE)
+        self._packet_consumer_task = asyncio.create_task(self._consume_packets())
+    
+    async def _consume_packets(self):
+        """Drain received packets in batches on the event loop"""
+        queue = self._packet_queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < PACKET_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            
+            for packet in batch:
+                self._process_received_packet(packet)
+    
+    def _enqueue_packet(self, packet):
+        """Queue a received packet for the consumer (runs on the event loop)"""
+        try:
+            self._packet_queue.put_nowait(packet)
+        except asyncio.QueueFull:
+            self.logger.warning("Packet queue full, dropping packet from %s", packet.get('fromId', 'unknown'))
+    
     @abstractmethod
     async def run(self):
         """Main agent execution loop - must be implemented by subclasses"""
@@ -65,6 +243,8 @@ class BaseAgent(ABC, LoggerMixin):
     
     def connect_to_meshtastic(self) -> bool:
         """Connect to Meshtastic device"""
+        self._local_node_num_cache = None
+        self._known_nodes_cache = None
         try:
             connection = self.connection_manager.create_connection(self.meshtastic_config)
             
@@ -76,6 +256,9 @@ class BaseAgent(ABC, LoggerMixin):
                     on_node_updated_callback=self.on_node_updated
                 )
                 
+                self._current_connection = connection
+                self._is_connected = True
+                
                 # Initialize traceroute manager
                 self._initialize_traceroute_manager()
                 
@@ -85,40 +268,65 @@ class BaseAgent(ABC, LoggerMixin):
                 return False
                 
         except Exception as e:
-            self.logger.error(f"Failed to connect to Meshtastic device: {e}")
+            self.logger.error("Failed to connect to Meshtastic device: %s", e)
             return False
     
     def disconnect_from_meshtastic(self):
         """Disconnect from Meshtastic device"""
+        self._current_connection = None
+        self._is_connected = False
+        self._local_node_num_cache = None
         if self.connection_manager:
             self.connection_manager.close_connection()
             self.logger.info("Disconnected from Meshtastic device")
     
     def on_receive(self, packet, interface):
         """Handle received packets from Meshtastic"""
+        # Called on the Meshtastic thread: hand the packet to the event loop so
+        # parsing and storage don't hold up the radio driver. stop() may clear
+        # the loop meanwhile, so read it once
+        loop = self._loop
+        if loop is None:
+            # Packet handling isn't thread-safe, so it only runs on the loop;
+            # the consumer starts before connecting, so this is only after stop()
+            self.logger.debug("Agent stopped, dropping packet from %s", packet.get('fromId', 'unknown'))
+            return
+        try:
+            loop.call_soon_threadsafe(self._enqueue_packet, packet)
+        except RuntimeError:
+            # The loop has already been closed during shutdown
+            self.logger.debug("Event loop closed, dropping packet from %s", packet.get('fromId', 'unknown'))
+    
+    def _process_received_packet(self, packet):
+        """Parse, track and hand off a received packet"""
         try:
-            self.logger.debug(f"Received packet from: {packet.get('fromId', 'unknown')}")
+            self.logger.debug("Received packet from: %s", packet.get('fromId', 'unknown'))
 
             # Process packet using packet processor
-            packet_data = self.packet_processor.process_packet(packet)
+            packet_data = self._process_packet(packet)
 
             # Update node tracking
-            self.node_tracker.update_from_packet(packet_data)
+            self._update_node(packet_data)
 
             # Let subclasses handle the processed packet
-            self._handle_processed_packet(packet_data)
+            self._handle_packet(packet_data)
 
         except Exception as e:
-            self.logger.error(f"Error processing received packet: {e}")
+            self.logger.error("Error processing received packet: %s", e)
     
     def on_connection(self, interface, topic=None):
         """Handle Meshtastic connection established"""
         self.logger.info("Meshtastic connection established")
+        self._is_connected = True
+        # The node database is reloaded on (re)connection, so rebuild every node
+        self._prev_node_hash = {}
+        self._prev_node_data = {}
         self._handle_connection_established()
     
     def on_node_updated(self, node):
         """Handle Meshtastic node updates"""
-        self.logger.debug(f"Node updated: {getattr(node, 'num', 'unknown')}")
+        self._node_table_version += 1
+        self.logger.debug("Node updated: %s", getattr(node, 'num', 'unknown'))
         self._handle_node_updated(node)
     
     @abstractmethod
@@ -142,14 +350,10 @@ class BaseAgent(ABC, LoggerMixin):
     def _initialize_traceroute_manager(self):
         """Initialize the traceroute manager"""
         try:
-            # Import here to avoid circular imports
-            import sys
-            import os
-            sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+            # Imported here because it pulls in the meshtastic library
             from meshtastic_traceroute_integration import MeshtasticTracerouteManager
-            from ..core.database import RouteCacheRepository
             
-            connection = self.connection_manager.get_connection()
+            connection = self._current_connection
             if connection and connection.interface:
                 # Initialize route cache repository
                 route_cache = RouteCacheRepository(self.db_connection)
@@ -165,77 +369,80 @@ class BaseAgent(ABC, LoggerMixin):
             else:
                 self.logger.warning("Could not initialize traceroute manager - no interface available")
         except Exception as e:
-            self.logger.error(f"Failed to initialize traceroute manager: {e}")
+            self.logger.error("Failed to initialize traceroute manager: %s", e)
     
-    async def discover_network_routes(self, hop_limit: int = 7, delay_between_traces: float = 3.0) -> List[Dict]:
-        """Discover routes to all known nodes using traceroute"""
+    async def discover_network_routes(self) -> List[Dict]:
+        """Collect the routes discovered by the traceroute manager since the last cycle"""
         if not self.traceroute_manager:
             self.logger.warning("Traceroute manager not initialized")
             return []
         
-        # Get all known nodes
-        known_nodes = self._get_known_nodes_for_traceroute()
-        if not known_nodes:
-            self.logger.info("No known nodes found for traceroute")
-            return []
-        
-        self.logger.info(f"Starting route discovery for {len(known_nodes)} nodes")
+        # The target list is only reported here; the traceroute manager runs the
+        # traceroutes, so skip building it unless the count will be logged
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Route discovery covers %d known nodes", len(self._get_known_nodes_for_traceroute()))
         
         # Get completed routes from individual traceroutes that have been running
         try:
             completed_routes = self.traceroute_manager.get_and_clear_completed_routes()
             
             if completed_routes:
-                self.logger.info(f"Collected {len(completed_routes)} completed routes for server")
+                self.logger.info("Collected %d completed routes for server", len(completed_routes))
                 return completed_routes
             else:
                 self.logger.info("No completed routes available this cycle")
                 return []
                 
         except Exception as e:
-            self.logger.error(f"Error collecting completed routes: {e}")
+            self.logger.error("Error collecting completed routes: %s", e)
             return []
     
     def _get_known_nodes_for_traceroute(self) -> List[str]:
         """Get list of known node IDs for traceroute (excluding our own node)"""
-        nodes = []
         try:
-            connection = self.connection_manager.get_connection()
+            connection = self._current_connection
             if not connection or not connection.interface:
-                return nodes
+                return []
                 
             interface = connection.interface
-            if hasattr(interface, 'nodesByNum') and interface.nodesByNum:
-                local_node_id = self._get_local_node_id()
-                # Safely iterate over nodesByNum keys
-                node_keys = interface.nodesByNum.keys() if interface.nodesByNum else []
-                for node_num in node_keys:
-                    node_id = f"!{node_num:08x}"
-                    # Skip our own node
-                    if node_id != local_node_id:
-                        nodes.append(node_id)
+            nodes_by_num = getattr(interface, 'nodesByNum', None)
+            if nodes_by_num:
+                cache_key = (self._node_table_version, len(nodes_by_num))
+                if self._known_nodes_cache is not None and self._known_nodes_cache_key == cache_key:
+                    return list(self._known_nodes_cache)
+                
+                # Skip our own node by number, formatting IDs only for the rest
+                local_num = self._get_local_node_num()
+                nodes = [_format_node_id(node_num) for node_num in nodes_by_num if node_num != local_num]
+                self._known_nodes_cache = nodes
+                self._known_nodes_cache_key = cache_key
+                return list(nodes)
         except Exception as e:
-            self.logger.error(f"Error getting known nodes for traceroute: {e}")
+            self.logger.error("Error getting known nodes for traceroute: %s", e)
         
-        return nodes
+        return []
     
-    def _get_local_node_id(self) -> str:
-        """Get the local node ID"""
+    def _get_local_node_num(self) -> Optional[int]:
+        """Get the local node number, None until the device has reported it"""
+        # The local node doesn't change for the lifetime of a connection
+        if self._local_node_num_cache is not None:
+            return self._local_node_num_cache
         try:
-            connection = self.connection_manager.get_connection()
+            connection = self._current_connection
             if connection and connection.interface:
-                interface = connection.interface
-                if hasattr(interface, 'myInfo') and interface.myInfo:
-                    return f"!{interface.myInfo.my_node_num:08x}"
+                my_info = getattr(connection.interface, 'myInfo', None)
+                if my_info:
+                    self._local_node_num_cache = my_info.my_node_num
+                    return self._local_node_num_cache
         except Exception as e:
-            self.logger.debug(f"Error getting local node ID: {e}")
-        return "!00000000"  # Fallback
+            self.logger.debug("Error getting local node number: %s", e)
+        return None
     
     async def periodic_route_discovery(self, interval_minutes: int = 60):
         """Periodically discover routes and send to server"""
-        self.logger.info(f"Starting periodic route discovery with {interval_minutes} minute intervals")
+        self.logger.info("Starting periodic route discovery with %s minute intervals", interval_minutes)
         
-        while self.running:
+        while not self._stop_event.is_set():
             try:
                 self.logger.info("Starting periodic route discovery cycle")
                 
@@ -245,38 +452,37 @@ class BaseAgent(ABC, LoggerMixin):
                 # Send to server
                 if route_results:
                     await self.send_route_data_to_server(route_results)
-                    self.logger.info(f"Sent {len(route_results)} routes to server")
+                    self.logger.info("Sent %d routes to server", len(route_results))
                 else:
                     self.logger.info("No routes discovered this cycle")
                 
             except Exception as e:
-                self.logger.error(f"Error in periodic route discovery: {e}")
+                self.logger.error("Error in periodic route discovery: %s", e)
             
             # Wait for next cycle
-            self.logger.debug(f"Sleeping for {interval_minutes} minutes until next route discovery")
+            self.logger.debug("Sleeping for %s minutes until next route discovery", interval_minutes)
             
-            # Sleep in small increments to allow for clean shutdown
-            sleep_seconds = interval_minutes * 60
-            for _ in range(int(sleep_seconds)):
-                if not self.running:
-                    break
-                await asyncio.sleep(1)
+            await self.wait_for_stop(interval_minutes * 60)
+    
+    async def wait_for_stop(self, timeout: float) -> bool:
+        """Sleep for up to timeout seconds, returning early (True) if the agent stops"""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
     
     def get_route_discovery_config(self) -> Dict:
-        """Get route discovery configuration from agent config"""
-        # Default configuration
-        config = {
-            'enabled': True,
-            'interval_minutes': 60,
-            'hop_limit': 7,
-            'delay_between_traces': 3.0
-        }
-        
+        """Get route discovery configuration from agent config (shared, treat as read-only)"""
+        # Agent config isn't reloaded at runtime, so this only needs building once
+        if self._route_config_cache is None:
+            self._route_config_cache = self._build_route_discovery_config()
+        return self._route_config_cache
+    
+    def _build_route_discovery_config(self) -> Dict:
+        """Merge the agent's route discovery settings over the defaults"""
         # Override with agent-specific config if available
-        if hasattr(self.agent_config, 'route_discovery') and self.agent_config.route_discovery is not None:
-            config.update(self.agent_config.route_discovery)
-        
-        return config
+        return _ROUTE_DISCOVERY_DEFAULTS | (getattr(self.agent_config, 'route_discovery', None) or {})
     
     async def cleanup_old_data(self):
         """Clean up old data - can be overridden by subclasses"""
@@ -285,131 +491,59 @@ class BaseAgent(ABC, LoggerMixin):
             self.node_tracker.cleanup_stale_nodes()
             self.logger.debug("Cleaned up stale nodes")
         except Exception as e:
-            self.logger.error(f"Error during data cleanup: {e}")
+            self.logger.error("Error during data cleanup: %s", e)
     
     def get_extended_node_data(self) -> Dict:
         """Get extended node information from Meshtastic interface"""
         try:
-            connection = self.connection_manager.get_connection()
-            if not connection or not connection.is_connected():
+            connection = self._current_connection
+            if connection is None or not connection.is_connected():
                 return {}
             
-            interface = connection.interface
-            if not interface or not hasattr(interface, 'nodesByNum') or not interface.nodesByNum:
+            nodes_by_num = getattr(connection.interface, 'nodesByNum', None)
+            if not nodes_by_num:
                 return {}
             
             nodes_data = {}
+            node_hashes = {}
+            prev_hashes = self._prev_node_hash
+            prev_data = self._prev_node_data
             
-            for node_num, node in interface.nodesByNum.items():
-                try:
-                    # Convert node number to hex ID format
-                    node_id = f"!{node_num:08x}"
-                    
-                    node_data = {
-                        'user': {},
-                        'position': {},
-                        'deviceMetrics': {}
-                    }
-                    
-                    # Handle both dict and object formats
-                    if isinstance(node, dict):
-                        # Node is a dictionary
-                        user_data = node.get('user', {})
-                        position_data = node.get('position', {})
-                        device_metrics = node.get('deviceMetrics', {})
-                        
-                        # Extract user information
-                        if user_data:
-                            node_data['user'] = {
-                                'id': user_data.get('id', '') or node_id,
-                                'longName': user_data.get('longName', ''),
-                                'shortName': user_data.get('shortName', ''),
-                                'macaddr': user_data.get('macaddr', ''),
-                                'hwModel': user_data.get('hwModel', 0),
-                                'role': user_data.get('role', 0),
-                                'isLicensed': user_data.get('isLicensed', False)
-                            }
-                        
-                        # Extract position information
-                        if position_data:
-                            node_data['position'] = {
-                                'latitude': position_data.get('latitude', 0),
-                                'longitude': position_data.get('longitude', 0),
-                                'altitude': position_data.get('altitude', 0),
-                                'time': position_data.get('time', 0)
-                            }
-                        
-                        # Extract device metrics
-                        if device_metrics:
-                            node_data['deviceMetrics'] = {
-                                'batteryLevel': device_metrics.get('batteryLevel'),
-                                'voltage': device_metrics.get('voltage'),
-                                'channelUtilization': device_metrics.get('channelUtilization'),
-                                'airUtilTx': device_metrics.get('airUtilTx'),
-                                'uptimeSeconds': device_metrics.get('uptimeSeconds')
-                            }
-                        
-                        # Add other node-level fields
-                        node_data['hopsAway'] = node.get('hopsAway')
-                        node_data['lastHeard'] = node.get('lastHeard')
-                        node_data['isFavorite'] = node.get('isFavorite', False)
-                        
-                    else:
-                        # Node is an object (original code for object format)
-                        # Extract user information
-                        if hasattr(node, 'user') and node.user:
-                            user = node.user
-                            node_data['user'] = {
-                                'id': getattr(user, 'id', '') or node_id,
-                                'longName': getattr(user, 'longName', ''),
-                                'shortName': getattr(user, 'shortName', ''),
-                                'macaddr': getattr(user, 'macaddr', ''),
-                                'hwModel': getattr(user, 'hwModel', 0),
-                                'role': getattr(user, 'role', 0),
-                                'isLicensed': getattr(user, 'isLicensed', False)
-                            }
-                        
-                        # Extract position information
-                        if hasattr(node, 'position') and node.position:
-                            pos = node.position
-                            node_data['position'] = {
-                                'latitude': getattr(pos, 'latitude', 0),
-                                'longitude': getattr(pos, 'longitude', 0),
-                                'altitude': getattr(pos, 'altitude', 0),
-                                'time': getattr(pos, 'time', 0)
-                            }
-                        
-                        # Extract device metrics
-                        if hasattr(node, 'deviceMetrics') and node.deviceMetrics:
-                            metrics = node.deviceMetrics
-                            node_data['deviceMetrics'] = {
-                                'batteryLevel': getattr(metrics, 'batteryLevel', None),
-                                'voltage': getattr(metrics, 'voltage', None),
-                                'channelUtilization': getattr(metrics, 'channelUtilization', None),
-                                'airUtilTx': getattr(metrics, 'airUtilTx', None),
-                                'uptimeSeconds': getattr(metrics, 'uptimeSeconds', None)
-                            }
-                        
-                        # Add other node-level fields
-                        node_data['hopsAway'] = getattr(node, 'hopsAway', None)
-                        node_data['lastHeard'] = getattr(node, 'lastHeard', None)
-                        node_data['isFavorite'] = getattr(node, 'isFavorite', False)
-                    
-                    nodes_data[node_id] = node_data
-                    
-                except Exception as e:
-                    self.logger.warning(f"Error processing node {node_num}: {e}")
+            # Snapshot the table, the Meshtastic thread may update it while we read
+            items = tuple(nodes_by_num.items())
+            
+            # All nodes in a table share one shape, so pick the extractor once
+            # from the first real entry (placeholders may be None)
+            first = next((node for _, node in items if node is not None), None)
+            extract = _extract_from_dict if isinstance(first, dict) else _extract_from_object
+            
+            for node_num, node in items:
+                if node is None:
+                    continue
+                
+                # Convert node number to hex ID format
+                node_id = _format_node_id(node_num)
+                
+                # Reuse the previous entry if nothing new was heard from the node
+                fingerprint = _node_fingerprint(node)
+                node_hashes[node_id] = fingerprint
+                if prev_hashes.get(node_id) == fingerprint and node_id in prev_data:
+                    nodes_data[node_id] = prev_data[node_id]
                     continue
+                
+                nodes_data[node_id] = extract(node, node_id)
             
+            self._prev_node_hash = node_hashes
+            self._prev_node_data = nodes_data
             return nodes_data
             
         except Exception as e:
-            self.logger.error(f"Error getting extended node data: {e}")
+            self.logger.error("Error getting extended node data: %s", e)
             return {}
 
     def get_agent_info(self) -> Dict:
         """Get information about this agent"""
-        connection = self.connection_manager.get_connection()
+        connection = self._current_connection
         meshtastic_info = connection.get_node_info() if connection else None
         
         return {
@@ -417,7 +551,7 @@ class BaseAgent(ABC, LoggerMixin):
             'location_name': self.agent_config.location_name,
             'coordinates': [self.agent_config.location_lat, self.agent_config.location_lon],
             'meshtastic_connection': {
-                'connected': connection.is_connected() if connection else False,
+                'connected': self._is_connected,
                 'node_info': meshtastic_info
             },
             'node_tracker': self.node_tracker.get_stats()
@@ -426,23 +560,33 @@ class BaseAgent(ABC, LoggerMixin):
     def start(self):
         """Start the agent"""
         self.running = True
-        self.logger.info(f"Starting agent {self.agent_config.id}")
+        self._stop_event.clear()
+        self.logger.info("Starting agent %s", self.agent_config.id)
     
     def stop(self):
         """Stop the agent"""
         self.running = False
+        self._stop_event.set()
+        if self._packet_consumer_task:
+            self._packet_consumer_task.cancel()
+            self._packet_consumer_task = None
+        self._loop = None
         self.disconnect_from_meshtastic()
-        self.logger.info(f"Stopped agent {self.agent_config.id}")
+        if self.db_connection:
+            self.db_connection.close()
+        self.logger.info("Stopped agent %s", self.agent_config.id)
     
     async def run_with_cleanup(self):
         """Run the agent with proper cleanup on exit"""
         try:
             self.start()
+            await self.setup_database()
+            self.start_packet_consumer()
             await self.run()
         except KeyboardInterrupt:
             self.logger.info("Received interrupt signal")
         except Exception as e:
-            self.logger.error(f"Agent error: {e}")
+            self.logger.error("Agent error: %s", e)
             raise
         finally:
             self.stop()
@@ -2,15 +2,23 @@
 Multi-server agent implementation for MeshyMcMapface
 """
 import asyncio
-from typing import Dict, List
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
-from .base_agent import BaseAgent
+from .base_agent import BaseAgent, PACKET_BATCH_SIZE
 from ..core.database import PacketRepository, NodeRepository, ServerHealthRepository, RouteCacheRepository
 from ..core.priority_monitor import PriorityNodeMonitor
 from ..servers.client import MultiServerClient
 from ..servers.health import MultiServerHealthMonitor
 from ..servers.queue_manager import MultiServerQueueManager, ServerTaskManager
 
+# Intervals for the periodic jobs started by run()
+NODEDB_INTERVAL_SECONDS = 120  # Send extended node data every 2 minutes
+CLEANUP_INTERVAL_SECONDS = 600  # Clean up old data every 10 minutes
+PACKET_FLUSH_INTERVAL = 0.25  # Longest a received packet waits before it is stored
+
 
 class MultiServerAgent(BaseAgent):
     """Agent that can report to multiple servers with different configurations"""
@@ -20,6 +28,8 @@ class MultiServerAgent(BaseAgent):
         
         # Load server configurations
         self.server_configs = self.config_manager.load_server_configs()
+        self._enabled_server_items = tuple((name, config) for name, config in self.server_configs.items() if config.enabled)
+        self._enabled_server_names = tuple(name for name, _ in self._enabled_server_items)
         
         # Initialize repositories
         self.packet_repo = PacketRepository(self.db_connection)
@@ -30,7 +40,23 @@ class MultiServerAgent(BaseAgent):
         self.server_client = MultiServerClient(self.server_configs)
         self.health_monitor = MultiServerHealthMonitor(self.server_configs, self.health_repo)
         self.queue_manager = MultiServerQueueManager(self.server_configs, self.packet_repo, self.node_repo)
-        self.task_manager = ServerTaskManager(self.queue_manager)
+        self.task_manager = ServerTaskManager(self.queue_manager, self._run_db)
+        
+        # Set whenever a packet may have produced node updates for process_node_updates
+        self._updates_ready = asyncio.Event()
+        
+        # Packets waiting to be stored; flushed by size or by PACKET_FLUSH_INTERVAL
+        self._packet_batch: List[Dict] = []
+        self._packet_batch_flush = asyncio.Event()
+        
+        # When (time.monotonic()) and at which node table version nodedb was last
+        # delivered, so idle periods can skip collecting it again
+        self._last_nodedb_ts: Optional[float] = None
+        self._last_nodedb_version = -1
+        
+        # SQLite writes run on one dedicated thread so they keep their order
+        # and don't stall the event loop
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mmm-db')
         
         # Initialize priority monitor if priority nodes are configured
         if self.agent_config.priority_nodes:
@@ -55,9 +81,13 @@ class MultiServerAgent(BaseAgent):
     def _handle_processed_packet(self, packet_data: Dict):
         """Handle a processed packet by queuing it for appropriate servers"""
         try:
-            packet_id = self.queue_manager.queue_packet(packet_data)
-            if packet_id > 0:
-                self.logger.debug(f"Queued packet {packet_id} from {packet_data.get('from_node')}")
+            # Stored in batches by _packet_flush_task
+            self._packet_batch.append(packet_data)
+            if len(self._packet_batch) >= PACKET_BATCH_SIZE:
+                self._packet_batch_flush.set()
+            
+            # Wake the node update task
+            self._updates_ready.set()
 
             # Check if this packet is from a priority node
             from_node = packet_data.get('from_node')
@@ -67,10 +97,34 @@ class MultiServerAgent(BaseAgent):
         except Exception as e:
             self.logger.error(f"Error queuing packet: {e}")
     
+    async def _run_db(self, func, *args):
+        """Run a blocking repository call on the database thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._db_executor, func, *args)
+    
+    async def _record_health(self, results: Dict[str, bool]):
+        """Update server health in memory and persist it on the database thread"""
+        known = self.health_monitor.mark_results(results)
+        if known:
+            await self._run_db(self.health_repo.update_server_health_batch, known)
+    
+    async def flush_packet_batch(self):
+        """Store all pending packets in one transaction"""
+        if not self._packet_batch:
+            return
+        
+        batch, self._packet_batch = self._packet_batch, []
+        try:
+            await self._run_db(self.queue_manager.queue_packets_batch, batch)
+        except Exception as e:
+            self.logger.error(f"Error queuing {len(batch)} packets: {e}")
+    
     def _handle_connection_established(self):
         """Handle Meshtastic connection establishment"""
         self.logger.info("Meshtastic connection established, starting server registrations")
         
+        # The device's node database is reloaded, so send it in full next time
+        self._last_nodedb_ts = None
+        
         # Link priority monitor to traceroute manager after connection is established
         if self.priority_monitor and self.traceroute_manager:
             self.priority_monitor.traceroute_manager = self.traceroute_manager
@@ -86,10 +140,10 @@ class MultiServerAgent(BaseAgent):
             for server_name, success in results.items():
                 if success:
                     self.logger.info(f"Registration with {server_name} successful")
-                    self.health_monitor.record_success(server_name)
                 else:
                     self.logger.warning(f"Registration with {server_name} failed")
-                    self.health_monitor.record_failure(server_name)
+            
+            await self._record_health(results)
         
         except Exception as e:
             self.logger.error(f"Error during server registrations: {e}")
@@ -98,34 +152,28 @@ class MultiServerAgent(BaseAgent):
         """Start individual server reporting tasks"""
         self.logger.info("Starting server reporting tasks...")
         
-        for server_name, config in self.server_configs.items():
-            if config.enabled:
-                self.task_manager.start_server_task(
-                    server_name, 
-                    self.server_client, 
-                    self.agent_config, 
-                    self.health_monitor
-                )
+        for server_name in self._enabled_server_names:
+            self.task_manager.start_server_task(
+                server_name, 
+                self.server_client, 
+                self.agent_config, 
+                self.health_monitor
+            )
         
-        self.logger.info(f"Started {len(self.task_manager.get_active_tasks())} server reporting tasks")
+        self.logger.info(f"Started {self.task_manager.active_count} server reporting tasks")
     
     def stop_server_tasks(self):
         """Stop all server reporting tasks"""
         self.logger.info("Stopping server reporting tasks...")
         self.task_manager.stop_all_tasks()
     
-    def process_node_updates(self):
+    async def process_node_updates(self):
         """Process queued node updates from tracker"""
         try:
             updates = self.node_tracker.get_all_updates()
             
-            for update in updates:
-                try:
-                    self.node_repo.update_node_status(update, self.agent_config.id)
-                except Exception as e:
-                    self.logger.error(f"Error updating node status: {e}")
-            
             if updates:
+                await self._run_db(self.node_repo.update_node_status_batch, updates, self.agent_config.id)
                 self.logger.debug(f"Processed {len(updates)} node updates")
                 
         except Exception as e:
@@ -135,7 +183,7 @@ class MultiServerAgent(BaseAgent):
         """Clean up old data from all repositories"""
         try:
             await super().cleanup_old_data()
-            self.queue_manager.cleanup_old_data()
+            await self._run_db(self.queue_manager.cleanup_old_data)
             
             # Clean up expired route cache if traceroute manager is available
             if self.traceroute_manager:
@@ -200,38 +248,30 @@ class MultiServerAgent(BaseAgent):
         except Exception as e:
             self.logger.error(f"Error setting up priority monitoring: {e}", exc_info=True)
         
-        # Main processing loop
+        # Main processing: node updates are handled as they arrive, the rest on timers
+        main_tasks = [
+            asyncio.create_task(self._packet_flush_task()),
+            asyncio.create_task(self._node_update_task()),
+            asyncio.create_task(self._nodedb_task()),
+            asyncio.create_task(self._cleanup_task()),
+        ]
         try:
-            cleanup_counter = 0
-            nodedb_counter = 0
-            while self.running:
-                # Process queued node updates
-                self.process_node_updates()
-                
-                # Send extended node data periodically (every ~2 minutes for testing)
-                nodedb_counter += 1
-                if nodedb_counter >= 24:  # 24 * 5 seconds = 2 minutes
-                    self.logger.info("Starting nodedb data collection and sending...")
-                    await self.send_nodedb_to_all_servers()
-                    nodedb_counter = 0
-                
-                # Periodic cleanup (every ~10 minutes)
-                cleanup_counter += 1
-                if cleanup_counter >= 120:  # 120 * 5 seconds = 10 minutes
-                    await self.cleanup_old_data()
-                    cleanup_counter = 0
-                
-                # Wait before next cycle
-                await asyncio.sleep(5)  # Fast processing loop
-                
+            # A failing job ends the agent rather than letting it run on without it
+            await asyncio.gather(*main_tasks)
         except KeyboardInterrupt:
             self.logger.info("Received interrupt, shutting down...")
         except Exception as e:
-            self.logger.error(f"Error in main loop: {e}")
+            self.logger.error(f"Error in main loop: {e}", exc_info=True)
             raise
         finally:
             # Cleanup
+            for task in main_tasks:
+                task.cancel()
             self.stop_server_tasks()
+            await self.flush_packet_batch()
+            # Let pending writes drain without blocking the loop
+            await asyncio.to_thread(self._db_executor.shutdown, True)
+            await self.server_client.close()
             
             # Stop priority monitoring
             if self.priority_monitor:
@@ -240,6 +280,61 @@ class MultiServerAgent(BaseAgent):
             
             self.logger.info("Multi-Server MeshyMcMapface Agent stopped")
     
+    async def _packet_flush_task(self):
+        """Store received packets once a batch fills up or PACKET_FLUSH_INTERVAL passes"""
+        while not self._stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._packet_batch_flush.wait(), timeout=PACKET_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._packet_batch_flush.clear()
+            await self.flush_packet_batch()
+    
+    async def _node_update_task(self):
+        """Process node updates as soon as packets produce them, until the agent stops"""
+        stopped = asyncio.create_task(self._stop_event.wait())
+        ready = None
+        try:
+            while True:
+                ready = asyncio.create_task(self._updates_ready.wait())
+                await asyncio.wait((ready, stopped), return_when=asyncio.FIRST_COMPLETED)
+                if stopped.done():
+                    return
+                self._updates_ready.clear()
+                await self.process_node_updates()
+        finally:
+            stopped.cancel()
+            if ready is not None:
+                ready.cancel()
+    
+    async def _nodedb_task(self):
+        """Periodically send extended node data to all servers"""
+        await self._run_every(NODEDB_INTERVAL_SECONDS, self._send_nodedb)
+    
+    async def _send_nodedb(self):
+        """Send one round of extended node data"""
+        self.logger.info("Starting nodedb data collection and sending...")
+        await self.send_nodedb_to_all_servers()
+    
+    async def _cleanup_task(self):
+        """Periodically clean up old data"""
+        await self._run_every(CLEANUP_INTERVAL_SECONDS, self.cleanup_old_data)
+    
+    async def _run_every(self, interval: float, job):
+        """Await job() every interval seconds until the agent stops
+        
+        Runs are scheduled against monotonic deadlines, so a slow job doesn't
+        push every later run back; runs missed entirely are skipped.
+        """
+        deadline = time.monotonic() + interval
+        while not await self.wait_for_stop(max(0.0, deadline - time.monotonic())):
+            await job()
+            
+            deadline += interval
+            now = time.monotonic()
+            if deadline <= now:
+                deadline = now + interval
+    
     def get_agent_info(self) -> Dict:
         """Get comprehensive information about this agent"""
         base_info = super().get_agent_info()
@@ -248,7 +343,7 @@ class MultiServerAgent(BaseAgent):
         base_info.update({
             'servers': {
                 'configured': len(self.server_configs),
-                'enabled': len([c for c in self.server_configs.values() if c.enabled]),
+                'enabled': len(self._enabled_server_items),
                 'health': self.health_monitor.get_all_health_info(),
                 'queue_stats': self.queue_manager.get_queue_stats()
             },
@@ -269,8 +364,8 @@ class MultiServerAgent(BaseAgent):
         return {
             'healthy_count': len(healthy_servers),
             'unhealthy_count': len(unhealthy_servers),
-            'healthy_servers': list(healthy_servers.keys()),
-            'unhealthy_servers': list(unhealthy_servers.keys()),
+            'healthy_servers': list(healthy_servers),
+            'unhealthy_servers': list(unhealthy_servers),
             'priority_order': self.health_monitor.get_server_priority_order()
         }
     
@@ -280,7 +375,19 @@ class MultiServerAgent(BaseAgent):
     
     async def send_nodedb_to_all_servers(self):
         """Send extended node data to all servers"""
+        if not self._enabled_server_items:
+            return
+        
+        # Nothing heard and no node table changes since the last delivery
+        if (self._last_nodedb_ts is not None
+                and self._node_table_version == self._last_nodedb_version
+                and not self.node_tracker.has_changes_since(self._last_nodedb_ts)):
+            self.logger.debug("No node changes since last nodedb send, skipping")
+            return
+        
         try:
+            collected_at = time.monotonic()
+            table_version = self._node_table_version
             self.logger.info("Collecting extended node data from Meshtastic interface...")
             # Get extended node data from the Meshtastic interface
             nodes_data = self.get_extended_node_data()
@@ -291,23 +398,26 @@ class MultiServerAgent(BaseAgent):
                 self.logger.warning("No extended node data available to send")
                 return
             
-            # Count nodes with actual metrics
-            nodes_with_metrics = sum(1 for node_data in nodes_data.values() 
-                                   if node_data.get('deviceMetrics') and 
-                                   any(v is not None for v in node_data['deviceMetrics'].values()))
-            
-            self.logger.info(f"Found {nodes_with_metrics} nodes with device metrics to send")
+            # Count nodes with actual metrics (only needed for the log line)
+            if self.logger.isEnabledFor(logging.INFO):
+                nodes_with_metrics = sum(1 for node_data in nodes_data.values()
+                                         if (metrics := node_data.get('deviceMetrics')) and
+                                         any(v is not None for v in metrics.values()))
+                
+                self.logger.info("Found %d nodes with device metrics to send", nodes_with_metrics)
             
             # Send to all enabled servers
             results = await self.server_client.send_nodedb_to_all(self.agent_config, nodes_data)
             
             # Record results in health monitor
+            await self._record_health(results)
+            if any(results.values()):
+                self._last_nodedb_ts = collected_at
+                self._last_nodedb_version = table_version
             for server_name, success in results.items():
                 if success:
-                    self.health_monitor.record_success(server_name)
                     self.logger.debug(f"Successfully sent nodedb to {server_name}")
                 else:
-                    self.health_monitor.record_failure(server_name)
                     self.logger.warning(f"Failed to send nodedb to {server_name}")
             
             self.logger.info(f"Sent extended node data for {len(nodes_data)} nodes to {len(results)} servers")
@@ -327,12 +437,11 @@ class MultiServerAgent(BaseAgent):
             results = await self.server_client.send_routes_to_all(self.agent_config, route_results)
             
             # Record results in health monitor
+            await self._record_health(results)
             for server_name, success in results.items():
                 if success:
-                    self.health_monitor.record_success(server_name)
                     self.logger.debug(f"Successfully sent routes to {server_name}")
                 else:
-                    self.health_monitor.record_failure(server_name)
                     self.logger.warning(f"Failed to send routes to {server_name}")
             
             successful_sends = sum(1 for success in results.values() if success)
@@ -364,32 +473,46 @@ class MultiServerAgent(BaseAgent):
     async def force_send_to_all_servers(self):
         """Force sending queued data to all servers (useful for testing)"""
         self.logger.info("Force sending data to all servers...")
+        await self.flush_packet_batch()
         
-        for server_name in self.server_configs.keys():
-            if self.server_configs[server_name].enabled:
-                try:
-                    # Get data for this server
-                    packet_ids, packets = self.queue_manager.get_packets_for_server(server_name)
-                    node_status = self.queue_manager.get_node_status_for_server(
-                        self.agent_config.id, server_name
-                    )
-                    
-                    if packets or node_status:
-                        # Send to server
-                        success = await self.server_client.send_to_server(
-                            server_name, self.agent_config, packets, node_status
-                        )
-                        
-                        if success:
-                            self.queue_manager.mark_packets_sent(packet_ids, server_name)
-                            self.health_monitor.record_success(server_name)
-                            self.logger.info(f"Force sent data to {server_name}: {len(packets)} packets, {len(node_status)} nodes")
-                        else:
-                            self.health_monitor.record_failure(server_name)
-                            self.logger.warning(f"Force send to {server_name} failed")
-                    else:
-                        self.logger.info(f"No data to send to {server_name}")
-                        
-                except Exception as e:
-                    self.logger.error(f"Error force sending to {server_name}: {e}")
-                    self.health_monitor.record_failure(server_name)
\ No newline at end of file
+        # Send to every enabled server at once rather than one after another
+        outcomes = await asyncio.gather(
+            *(self._force_send_one(server_name) for server_name in self._enabled_server_names),
+            return_exceptions=True
+        )
+        
+        # Record health for the servers that had something to send
+        await self._record_health({
+            server_name: outcome
+            for server_name, outcome in zip(self._enabled_server_names, outcomes)
+            if isinstance(outcome, bool)
+        })
+    
+    async def _force_send_one(self, server_name: str) -> Optional[bool]:
+        """Force send queued data to a single server, returning None if there was nothing to send"""
+        try:
+            # Get data for this server
+            packet_ids, packets = await self._run_db(self.queue_manager.get_packets_for_server, server_name)
+            node_status = await self._run_db(
+                self.queue_manager.get_node_status_for_server, self.agent_config.id, server_name
+            )
+            
+            if packets or node_status:
+                # Send to server
+                success = await self.server_client.send_to_server(
+                    server_name, self.agent_config, packets, node_status
+                )
+                
+                if success:
+                    await self._run_db(self.queue_manager.mark_packets_sent, packet_ids, server_name)
+                    self.logger.info(f"Force sent data to {server_name}: {len(packets)} packets, {len(node_status)} nodes")
+                else:
+                    self.logger.warning(f"Force send to {server_name} failed")
+                return success
+            
+            self.logger.info(f"No data to send to {server_name}")
+            return None
+                
+        except Exception as e:
+            self.logger.error(f"Error force sending to {server_name}: {e}")
+            return False
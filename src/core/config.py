@@ -4,13 +4,18 @@ Handles loading and validation of agent and server configurations
 """
 import configparser
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, FrozenSet, List, Optional
 from datetime import datetime, timezone
 
 
-@dataclass
+def _csv(raw: Optional[str]) -> List[str]:
+    """Split a comma-separated config value into its non-empty, stripped items"""
+    return [item for item in (part.strip() for part in raw.split(',')) if item] if raw else []
+
+
+@dataclass(slots=True)
 class ServerConfig:
     """Configuration for a single server"""
     name: str
@@ -18,7 +23,7 @@ class ServerConfig:
     api_key: str
     enabled: bool = True
     report_interval: int = 30
-    packet_types: List[str] = None
+    packet_types: FrozenSet[str] = None  # Any iterable on input; empty when accept_all_types
     priority: int = 1
     max_retries: int = 3
     timeout: int = 10
@@ -30,16 +35,38 @@ class ServerConfig:
     consecutive_failures: int = 0
     is_healthy: bool = True
     
+    # True when packet_types was 'all', so routing can skip the type lookup
+    accept_all_types: bool = field(init=False)
+    
+    # Set forms of the node filters above for the per-packet routing checks
+    _filter_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    _exclude_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    
     def __post_init__(self):
-        if self.packet_types is None:
-            self.packet_types = ['all']
+        # Only a missing list means 'all'; an explicit empty list accepts nothing
+        packet_types = frozenset(('all',) if self.packet_types is None else self.packet_types)
+        self.accept_all_types = 'all' in packet_types
+        self.packet_types = frozenset() if self.accept_all_types else packet_types
         if self.filter_nodes is None:
             self.filter_nodes = []
         if self.exclude_nodes is None:
             self.exclude_nodes = []
+        
+        self._filter_set = frozenset(self.filter_nodes)
+        self._exclude_set = frozenset(self.exclude_nodes)
+    
+    def accepts(self, packet_type: str, node_id: str) -> bool:
+        """Check a packet type and sending node against this server's filters"""
+        if not self.accept_all_types and packet_type not in self.packet_types:
+            return False
+        
+        if self._filter_set and node_id not in self._filter_set:
+            return False
+        
+        return node_id not in self._exclude_set
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentConfig:
     """Configuration for the agent"""
     id: str
@@ -57,7 +84,7 @@ class AgentConfig:
             self.priority_nodes = []
 
 
-@dataclass
+@dataclass(slots=True)
 class MeshtasticConfig:
     """Configuration for Meshtastic connection"""
     connection_type: str = 'auto'
@@ -83,14 +110,19 @@ class ConfigManager:
     
     def __init__(self, config_file: str):
         self.config_file = config_file
-        self.config = configparser.ConfigParser()
+        # No values use %(...)s interpolation, so skip that pass on every lookup
+        self.config = configparser.ConfigParser(interpolation=None, empty_lines_in_values=False)
         self.logger = logging.getLogger(__name__)
         
         if not Path(config_file).exists():
             raise FileNotFoundError(f"Configuration file {config_file} not found")
         
-        self.config.read(config_file)
+        self.config.read(config_file, encoding='utf-8')
         self._validate_config()
+        
+        # Server sections and parsed configs don't change after load
+        self._server_sections = [s for s in self.config.sections() if s.startswith('server_')]
+        self._server_configs_cache: Dict[str, ServerConfig] = {}
     
     def _validate_config(self):
         """Validate required configuration sections exist"""
@@ -122,9 +154,7 @@ class ConfigManager:
                 }
             
             # Parse priority nodes
-            priority_nodes = []
-            if agent_section.get('priority_nodes'):
-                priority_nodes = [node.strip() for node in agent_section['priority_nodes'].split(',') if node.strip()]
+            priority_nodes = _csv(agent_section.get('priority_nodes'))
             
             return AgentConfig(
                 id=agent_section['id'],
@@ -179,49 +209,46 @@ class ConfigManager:
     
     def load_server_configs(self) -> Dict[str, ServerConfig]:
         """Load all server configurations"""
+        if self._server_configs_cache:
+            return self._server_configs_cache
+        
         servers = {}
         
-        for section_name in self.config.sections():
-            if section_name.startswith('server_'):
-                server_name = section_name[7:]  # Remove 'server_' prefix
-                try:
-                    servers[server_name] = self._load_single_server_config(server_name, section_name)
-                except Exception as e:
-                    self.logger.error(f"Error loading server config for {server_name}: {e}")
-                    continue
+        for section_name in self._server_sections:
+            server_name = section_name[7:]  # Remove 'server_' prefix
+            try:
+                servers[server_name] = self._load_single_server_config(server_name, section_name)
+            except Exception as e:
+                self.logger.error(f"Error loading server config for {server_name}: {e}")
+                continue
         
         if not servers:
             raise ValueError("No valid server configurations found")
         
+        self._server_configs_cache = servers
         return servers
     
     def _load_single_server_config(self, server_name: str, section_name: str) -> ServerConfig:
         """Load configuration for a single server"""
-        section = dict(self.config.items(section_name))
+        get = self.config.get
         
         # Parse packet types
-        packet_types = section.get('packet_types', 'all').split(',') if section.get('packet_types') != 'all' else ['all']
-        packet_types = [pt.strip() for pt in packet_types if pt.strip()]
+        packet_types = _csv(get(section_name, 'packet_types', fallback='all'))
         
         # Parse node filters
-        filter_nodes = []
-        if section.get('filter_nodes'):
-            filter_nodes = [node.strip() for node in section['filter_nodes'].split(',') if node.strip()]
-        
-        exclude_nodes = []
-        if section.get('exclude_nodes'):
-            exclude_nodes = [node.strip() for node in section['exclude_nodes'].split(',') if node.strip()]
+        filter_nodes = _csv(get(section_name, 'filter_nodes', fallback=None))
+        exclude_nodes = _csv(get(section_name, 'exclude_nodes', fallback=None))
         
         return ServerConfig(
             name=server_name,
-            url=section['url'],
-            api_key=section['api_key'],
-            enabled=section.get('enabled', 'true').lower() == 'true',
-            report_interval=int(section.get('report_interval', 30)),
+            url=get(section_name, 'url'),
+            api_key=get(section_name, 'api_key'),
+            enabled=get(section_name, 'enabled', fallback='true').lower() == 'true',
+            report_interval=int(get(section_name, 'report_interval', fallback=30)),
             packet_types=packet_types,
-            priority=int(section.get('priority', 1)),
-            max_retries=int(section.get('max_retries', 3)),
-            timeout=int(section.get('timeout', 10)),
+            priority=int(get(section_name, 'priority', fallback=1)),
+            max_retries=int(get(section_name, 'max_retries', fallback=3)),
+            timeout=int(get(section_name, 'timeout', fallback=10)),
             filter_nodes=filter_nodes,
             exclude_nodes=exclude_nodes
         )
@@ -235,22 +262,8 @@ class ConfigManager:
         return os.path.join(db_dir, f"{agent_id}_buffer.db")
     
     def should_send_to_server(self, server: ServerConfig, packet_data: Dict, node_id: str) -> bool:
-        """Determine if packet should be sent to specific server"""
-        if not server.enabled:
-            return False
-        
-        # Check packet type filtering
-        if server.packet_types != ['all'] and packet_data['type'] not in server.packet_types:
-            return False
-        
-        # Check node filtering
-        if server.filter_nodes and node_id not in server.filter_nodes:
-            return False
-        
-        if server.exclude_nodes and node_id in server.exclude_nodes:
-            return False
-        
-        return True
+        """Determine if packet should be sent to specific server (prefer ServerConfig.accepts)"""
+        return server.enabled and server.accepts(packet_data['type'], node_id)
 
 
 def create_sample_multi_config(filename: str = 'multi_agent_config.ini'):
@@ -2,25 +2,63 @@
 Database abstraction layer for MeshyMcMapface
 Provides repository pattern for data access
 """
+import atexit
 import sqlite3
 import json
 import logging
+import threading
+import time
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Tuple
 from abc import ABC, abstractmethod
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def safe_json_dumps(obj):
+
+def _default_serializer(o):
+    if isinstance(o, bytes):
+        return o.hex()
+    elif hasattr(o, '__dict__'):
+        return str(o)
+    else:
+        return str(o)
+
+
+def safe_json_bytes(obj) -> bytes:
+    """Serialize objects to UTF-8 JSON bytes, handling bytes and other non-serializable types"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_default_serializer, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # e.g. integers wider than 64 bits, which orjson refuses
+            pass
+    return json.dumps(obj, default=_default_serializer).encode()
+
+
+def safe_json_dumps(obj) -> str:
     """Safely serialize objects to JSON, handling bytes and other non-serializable types"""
-    def default_serializer(o):
-        if isinstance(o, bytes):
-            return o.hex()
-        elif hasattr(o, '__dict__'):
-            return str(o)
-        else:
-            return str(o)
-    
-    return json.dumps(obj, default=default_serializer)
+    return safe_json_bytes(obj).decode()
+
+
+# Packet blobs are decoded with orjson when it's installed; both decoders take
+# the BLOB bytes directly as well as TEXT from older rows
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+# Per-connection settings for the write-heavy buffer database; with WAL (set
+# once in _ensure_schema) synchronous=NORMAL only fsyncs at checkpoints
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-64000',
+)
+
+# Buffered packets older than this are no longer offered to servers
+SEND_WINDOW_SECONDS = 3600
 
 
 class DatabaseConnection:
@@ -29,24 +67,100 @@ class DatabaseConnection:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.logger = logging.getLogger(__name__)
+        self._schema_ready = False
+        
+        # One long-lived connection per thread, closed together at exit
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+    
+    def initialize(self):
+        """Create the schema up front so later connections can skip it"""
+        conn = self._connect()
+        try:
+            self._ensure_schema(conn)
+        finally:
+            conn.close()
+        self._schema_ready = True
     
     def get_connection(self) -> sqlite3.Connection:
-        """Get a database connection for the current thread"""
-        conn = sqlite3.connect(self.db_path)
-        self._ensure_schema(conn)
+        """Get the current thread's database connection, opening it on first use
+        
+        The connection stays open for reuse; callers must not close it.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            with self._lock:
+                if not self._schema_ready:
+                    self._ensure_schema(conn)
+                    self._schema_ready = True
+                self._connections.append(conn)
+            self._local.conn = conn
+        return conn
+    
+    def close(self):
+        """Close every cached connection"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the buffer database's PRAGMAs applied"""
+        # Connections are only used by the thread that opened them, but close()
+        # may run elsewhere at shutdown
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
         return conn
     
     def _ensure_schema(self, conn: sqlite3.Connection):
         """Create tables if they don't exist"""
+        # WAL lets readers run alongside the writer; the mode is stored in the
+        # database file, so it only needs switching the first time
+        if conn.execute('PRAGMA journal_mode').fetchone()[0] != 'wal':
+            conn.execute('PRAGMA journal_mode=WAL')
+        
+        # Tables from before timestamps were stored as unix seconds get rebuilt
+        legacy_packet_columns = self._stash_text_timestamp_table(conn, 'packet_buffer', 'created_at')
+        legacy_node_columns = self._stash_text_timestamp_table(conn, 'nodes', 'updated_at')
+        
         conn.execute('''
             CREATE TABLE IF NOT EXISTS packet_buffer (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp TEXT,
-                packet_data TEXT,
+                packet_data BLOB,
                 server_status TEXT DEFAULT '{}',
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
             )
         ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_pb_created ON packet_buffer (created_at)')
+        
+        # Per-server delivery state for each buffered packet (packet_buffer.server_status
+        # is no longer written)
+        backfill_server_status = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'packet_server_status'"
+        ).fetchone() is None
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS packet_server_status (
+                packet_id INTEGER,
+                server_name TEXT,
+                sent INTEGER DEFAULT 0,
+                retry_count INTEGER DEFAULT 0,
+                last_attempt TEXT,
+                PRIMARY KEY (packet_id, server_name)
+            )
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_pss_lookup
+            ON packet_server_status (server_name, sent, retry_count, packet_id)
+        ''')
         
         conn.execute('''
             CREATE TABLE IF NOT EXISTS nodes (
@@ -58,10 +172,42 @@ class DatabaseConnection:
                 position_lon REAL,
                 rssi INTEGER,
                 snr REAL,
-                updated_at TEXT,
+                updated_at INTEGER,
                 PRIMARY KEY (node_id, agent_id)
             )
         ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_nodes_agent_updated ON nodes (agent_id, updated_at)')
+        
+        if legacy_packet_columns:
+            self._restore_text_timestamp_table(conn, 'packet_buffer', 'created_at', legacy_packet_columns)
+        if legacy_node_columns:
+            self._restore_text_timestamp_table(conn, 'nodes', 'updated_at', legacy_node_columns)
+        
+        # Carry over packets still waiting in the old server_status JSON so they
+        # aren't dropped when upgrading a buffer
+        if backfill_server_status:
+            cursor = conn.execute('''
+                INSERT OR IGNORE INTO packet_server_status
+                (packet_id, server_name, sent, retry_count, last_attempt)
+                SELECT pb.id, s.key, 0, COALESCE(json_extract(s.value, '$.retry_count'), 0),
+                       json_extract(s.value, '$.last_attempt')
+                FROM packet_buffer pb, json_each(pb.server_status) s
+                WHERE pb.created_at > ? AND json_valid(pb.server_status)
+                AND NOT COALESCE(json_extract(s.value, '$.sent'), 0)
+            ''', (int(time.time()) - SEND_WINDOW_SECONDS,))
+            if cursor.rowcount > 0:
+                self.logger.info(f"Moved {cursor.rowcount} pending deliveries to packet_server_status")
+        
+        # server_health is only ever looked up by server_name, so it lives in the
+        # primary key B-tree; older databases still have a rowid table
+        # (read from the CREATE statement, PRAGMA table_list needs SQLite 3.37+)
+        health_sql = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'server_health'"
+        ).fetchone()
+        rebuild_health = health_sql is not None and 'WITHOUT ROWID' not in health_sql[0].upper()
+        if rebuild_health:
+            self.logger.info("Rebuilding server_health as a WITHOUT ROWID table")
+            conn.execute('ALTER TABLE server_health RENAME TO server_health_legacy')
         
         conn.execute('''
             CREATE TABLE IF NOT EXISTS server_health (
@@ -71,9 +217,18 @@ class DatabaseConnection:
                 consecutive_failures INTEGER DEFAULT 0,
                 total_packets_sent INTEGER DEFAULT 0,
                 is_healthy BOOLEAN DEFAULT 1
-            )
+            ) WITHOUT ROWID
         ''')
         
+        if rebuild_health:
+            conn.execute('''
+                INSERT INTO server_health
+                (server_name, last_success, last_failure, consecutive_failures, total_packets_sent, is_healthy)
+                SELECT server_name, last_success, last_failure, consecutive_failures, total_packets_sent, is_healthy
+                FROM server_health_legacy WHERE server_name IS NOT NULL
+            ''')
+            conn.execute('DROP TABLE server_health_legacy')
+        
         conn.execute('''
             CREATE TABLE IF NOT EXISTS route_cache (
                 source_node TEXT,
@@ -93,6 +248,26 @@ class DatabaseConnection:
         conn.commit()
 
 
+    def _stash_text_timestamp_table(self, conn: sqlite3.Connection, table: str, column: str) -> Optional[List[str]]:
+        """Move aside a table whose timestamp column is still TEXT, returning its columns"""
+        columns = {row[1]: row[2] for row in conn.execute(f'PRAGMA table_info({table})')}
+        if columns.get(column, '').upper() != 'TEXT':
+            return None
+        
+        self.logger.info(f"Converting {table}.{column} to unix timestamps")
+        conn.execute(f'ALTER TABLE {table} RENAME TO {table}_legacy')
+        return list(columns)
+    
+    def _restore_text_timestamp_table(self, conn: sqlite3.Connection, table: str, column: str, columns: List[str]):
+        """Copy rows from a stashed table into its rebuilt version and drop the old one"""
+        select = ', '.join(
+            f"CAST(strftime('%s', {name}) AS INTEGER)" if name == column else name
+            for name in columns
+        )
+        conn.execute(f'INSERT INTO {table} ({", ".join(columns)}) SELECT {select} FROM {table}_legacy')
+        conn.execute(f'DROP TABLE {table}_legacy')
+
+
 class BaseRepository(ABC):
     """Base repository class with common functionality"""
     
@@ -104,18 +279,35 @@ class BaseRepository(ABC):
 class PacketRepository(BaseRepository):
     """Repository for packet data operations"""
     
+    _STATUS_SQL = '''
+        INSERT INTO packet_server_status (packet_id, server_name, sent, retry_count, last_attempt)
+        VALUES (?, ?, ?, ?, ?)
+    '''
+    
+    @staticmethod
+    def _insert_packet(conn: sqlite3.Connection, packet_data: Dict) -> int:
+        """Insert a packet into the buffer, returning the packet ID"""
+        cursor = conn.execute('''
+            INSERT INTO packet_buffer (timestamp, packet_data, created_at)
+            VALUES (?, ?, ?)
+        ''', (packet_data['timestamp'], safe_json_bytes(packet_data), int(time.time())))
+        return cursor.lastrowid
+    
+    @staticmethod
+    def _status_rows(packet_id: int, server_routing: Dict) -> List[Tuple]:
+        """Build the packet_server_status rows for a packet's routing"""
+        return [
+            (packet_id, server_name, int(status.get('sent', False)), status.get('retry_count', 0), status.get('last_attempt'))
+            for server_name, status in server_routing.items()
+        ]
+    
     def store_packet(self, packet_data: Dict, server_routing: Dict) -> int:
         """Store a packet with server routing information"""
         try:
             conn = self.db_connection.get_connection()
-            cursor = conn.execute('''
-                INSERT INTO packet_buffer (timestamp, packet_data, server_status)
-                VALUES (?, ?, ?)
-            ''', (packet_data['timestamp'], safe_json_dumps(packet_data), safe_json_dumps(server_routing)))
-            
-            packet_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            with conn:
+                packet_id = self._insert_packet(conn, packet_data)
+                conn.executemany(self._STATUS_SQL, self._status_rows(packet_id, server_routing))
             
             self.logger.debug(f"Stored packet {packet_id} for servers: {list(server_routing.keys())}")
             return packet_id
@@ -124,33 +316,43 @@ class PacketRepository(BaseRepository):
             self.logger.error(f"Error storing packet: {e}")
             raise
     
-    def get_unsent_packets(self, server_name: str, limit: int = 100) -> List[Tuple]:
-        """Get packets that need to be sent to a specific server"""
+    def store_packets(self, packets: List[Tuple[Dict, Dict]]) -> List[int]:
+        """Store several (packet, server routing) pairs in a single transaction"""
+        try:
+            conn = self.db_connection.get_connection()
+            packet_ids = []
+            status_rows = []
+            with conn:
+                # Take the write lock up front rather than upgrading mid-batch
+                conn.execute('BEGIN IMMEDIATE')
+                for packet_data, server_routing in packets:
+                    packet_id = self._insert_packet(conn, packet_data)
+                    packet_ids.append(packet_id)
+                    status_rows.extend(self._status_rows(packet_id, server_routing))
+                conn.executemany(self._STATUS_SQL, status_rows)
+            
+            self.logger.debug(f"Stored {len(packet_ids)} packets")
+            return packet_ids
+            
+        except Exception as e:
+            self.logger.error(f"Error storing packets: {e}")
+            raise
+    
+    def get_unsent_packets(self, server_name: str, limit: int = 100) -> List[Tuple[int, Dict]]:
+        """Get (packet ID, packet data) pairs that need to be sent to a specific server"""
         try:
             conn = self.db_connection.get_connection()
             cursor = conn.execute('''
-                SELECT id, packet_data, server_status FROM packet_buffer 
-                WHERE created_at > datetime('now', '-1 hour')
-                ORDER BY timestamp 
+                SELECT pb.id, pb.packet_data
+                FROM packet_server_status s
+                JOIN packet_buffer pb ON pb.id = s.packet_id
+                WHERE s.server_name = ? AND s.sent = 0 AND s.retry_count < 3
+                AND pb.created_at > ?
+                ORDER BY pb.timestamp 
                 LIMIT ?
-            ''', (limit,))
-            
-            packets = cursor.fetchall()
-            conn.close()
-            
-            # Filter for this specific server
-            filtered_packets = []
-            for packet_row in packets:
-                packet_id, packet_data_str, server_status_str = packet_row
-                server_status = json.loads(server_status_str)
-                
-                if (server_name in server_status and 
-                    not server_status[server_name]['sent'] and
-                    server_status[server_name]['retry_count'] < 3):  # Default max_retries
-                    
-                    filtered_packets.append((packet_id, json.loads(packet_data_str), server_status))
+            ''', (server_name, int(time.time()) - SEND_WINDOW_SECONDS, limit))
             
-            return filtered_packets
+            return [(packet_id, _json_loads(packet_data)) for packet_id, packet_data in cursor]
             
         except Exception as e:
             self.logger.error(f"Error getting unsent packets for {server_name}: {e}")
@@ -158,23 +360,18 @@ class PacketRepository(BaseRepository):
     
     def mark_packets_sent(self, packet_ids: List[int], server_name: str):
         """Mark packets as sent to a specific server"""
+        if not packet_ids:
+            return
+        
         try:
             conn = self.db_connection.get_connection()
+            now = datetime.now(timezone.utc).isoformat()
             
-            for packet_id in packet_ids:
-                cursor = conn.execute('SELECT server_status FROM packet_buffer WHERE id = ?', (packet_id,))
-                row = cursor.fetchone()
-                if row:
-                    server_status = json.loads(row[0])
-                    if server_name in server_status:
-                        server_status[server_name]['sent'] = True
-                        server_status[server_name]['last_attempt'] = datetime.now(timezone.utc).isoformat()
-                    
-                    conn.execute('UPDATE packet_buffer SET server_status = ? WHERE id = ?',
-                               (json.dumps(server_status), packet_id))
-            
-            conn.commit()
-            conn.close()
+            with conn:
+                conn.executemany('''
+                    UPDATE packet_server_status SET sent = 1, last_attempt = ?
+                    WHERE packet_id = ? AND server_name = ?
+                ''', [(now, packet_id, server_name) for packet_id in packet_ids])
             
         except Exception as e:
             self.logger.error(f"Error marking packets sent for {server_name}: {e}")
@@ -183,13 +380,15 @@ class PacketRepository(BaseRepository):
     def cleanup_old_packets(self, hours_to_keep: int = 24):
         """Remove old packets from buffer"""
         try:
-            cutoff = datetime.now(timezone.utc).timestamp() - (hours_to_keep * 60 * 60)
-            cutoff_iso = datetime.fromtimestamp(cutoff, timezone.utc).isoformat()
+            cutoff = int(time.time()) - (hours_to_keep * 60 * 60)
             
             conn = self.db_connection.get_connection()
-            conn.execute('DELETE FROM packet_buffer WHERE created_at < ?', (cutoff_iso,))
-            conn.commit()
-            conn.close()
+            with conn:
+                conn.execute('''
+                    DELETE FROM packet_server_status
+                    WHERE packet_id IN (SELECT id FROM packet_buffer WHERE created_at < ?)
+                ''', (cutoff,))
+                conn.execute('DELETE FROM packet_buffer WHERE created_at < ?', (cutoff,))
             
         except Exception as e:
             self.logger.error(f"Error cleaning up old packets: {e}")
@@ -199,6 +398,27 @@ class PacketRepository(BaseRepository):
 class NodeRepository(BaseRepository):
     """Repository for node data operations"""
     
+    _NODE_STATUS_SQL = '''
+        INSERT OR REPLACE INTO nodes 
+        (node_id, agent_id, last_seen, battery_level, position_lat, position_lon, rssi, snr, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    @staticmethod
+    def _node_status_row(node_status: Dict, agent_id: str) -> Tuple:
+        """Build the nodes table row for a node status update"""
+        return (
+            node_status['node_id'], 
+            agent_id, 
+            node_status['last_seen'], 
+            node_status.get('battery_level'),
+            node_status.get('position_lat'),
+            node_status.get('position_lon'),
+            node_status.get('rssi'), 
+            node_status.get('snr'), 
+            int(time.time())
+        )
+    
     def update_node_status(self, node_status: Dict, agent_id: str):
         """Update node status in database"""
         try:
@@ -211,24 +431,8 @@ class NodeRepository(BaseRepository):
             conn = self.db_connection.get_connection()
             
             # Use INSERT OR REPLACE to handle updates properly
-            conn.execute('''
-                INSERT OR REPLACE INTO nodes 
-                (node_id, agent_id, last_seen, battery_level, position_lat, position_lon, rssi, snr, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                node_id, 
-                agent_id, 
-                node_status['last_seen'], 
-                node_status.get('battery_level'),
-                lat,
-                lon,
-                node_status.get('rssi'), 
-                node_status.get('snr'), 
-                node_status['updated_at']
-            ))
-            
-            conn.commit()
-            conn.close()
+            with conn:
+                conn.execute(self._NODE_STATUS_SQL, self._node_status_row(node_status, agent_id))
             
             if lat and lon:
                 self.logger.info(f"Successfully wrote GPS data for node {node_id}: {lat:.6f}, {lon:.6f}")
@@ -239,6 +443,34 @@ class NodeRepository(BaseRepository):
             self.logger.error(f"Error updating node status for {node_status.get('node_id', 'unknown')}: {e}")
             raise
     
+    def update_node_status_batch(self, node_statuses: List[Dict], agent_id: str):
+        """Update several node statuses in a single transaction"""
+        rows = []
+        for node_status in node_statuses:
+            try:
+                rows.append(self._node_status_row(node_status, agent_id))
+            except KeyError as e:
+                self.logger.error(f"Error updating node status for {node_status.get('node_id', 'unknown')}: missing {e}")
+        
+        if not rows:
+            return
+        
+        conn = self.db_connection.get_connection()
+        try:
+            with conn:
+                conn.executemany(self._NODE_STATUS_SQL, rows)
+        except sqlite3.Error as e:
+            # Fall back to one row at a time so a bad record only loses itself
+            self.logger.warning(f"Batched node update failed ({e}), retrying individually")
+            for row in rows:
+                try:
+                    with conn:
+                        conn.execute(self._NODE_STATUS_SQL, row)
+                except sqlite3.Error as e:
+                    self.logger.error(f"Error updating node status for {row[0]}: {e}")
+        
+        self.logger.debug(f"Wrote {len(rows)} node updates for {agent_id}")
+    
     def get_nodes_for_agent(self, agent_id: str, hours_active: int = 24) -> List[Tuple]:
         """Get recent nodes for an agent"""
         try:
@@ -246,11 +478,10 @@ class NodeRepository(BaseRepository):
             cursor = conn.execute('''
                 SELECT node_id, last_seen, battery_level, position_lat, position_lon, rssi, snr
                 FROM nodes 
-                WHERE agent_id = ? AND datetime(updated_at) > datetime('now', '-{} hours')
-            '''.format(hours_active), (agent_id,))
+                WHERE agent_id = ? AND updated_at > ?
+            ''', (agent_id, int(time.time()) - hours_active * 60 * 60))
             
             nodes = cursor.fetchall()
-            conn.close()
             
             self.logger.info(f"Found {len(nodes)} nodes in database for {agent_id}")
             return nodes
@@ -262,13 +493,11 @@ class NodeRepository(BaseRepository):
     def cleanup_old_nodes(self, days_to_keep: int = 7):
         """Remove old node data"""
         try:
-            cutoff = datetime.now(timezone.utc).timestamp() - (days_to_keep * 24 * 60 * 60)
-            cutoff_iso = datetime.fromtimestamp(cutoff, timezone.utc).isoformat()
+            cutoff = int(time.time()) - (days_to_keep * 24 * 60 * 60)
             
             conn = self.db_connection.get_connection()
-            conn.execute('DELETE FROM nodes WHERE updated_at < ?', (cutoff_iso,))
-            conn.commit()
-            conn.close()
+            with conn:
+                conn.execute('DELETE FROM nodes WHERE updated_at < ?', (cutoff,))
             
         except Exception as e:
             self.logger.error(f"Error cleaning up old nodes: {e}")
@@ -300,16 +529,14 @@ class RouteCacheRepository(BaseRepository):
             expires_at = (now + timedelta(hours=cache_duration_hours)).isoformat()
             last_used = now.isoformat()
             
-            conn.execute('''
-                INSERT OR REPLACE INTO route_cache 
-                (source_node, target_node, agent_id, route_path, hop_count, snr_data, 
-                 discovery_timestamp, last_used, expires_at, total_time_ms)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (source_node, target_node, agent_id, route_path, hop_count, snr_data,
-                  discovery_timestamp, last_used, expires_at, total_time_ms))
-            
-            conn.commit()
-            conn.close()
+            with conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO route_cache 
+                    (source_node, target_node, agent_id, route_path, hop_count, snr_data, 
+                     discovery_timestamp, last_used, expires_at, total_time_ms)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (source_node, target_node, agent_id, route_path, hop_count, snr_data,
+                      discovery_timestamp, last_used, expires_at, total_time_ms))
             
             self.logger.debug(f"Cached route: {source_node} -> {target_node} (expires in {cache_duration_hours}h)")
             return True
@@ -334,11 +561,11 @@ class RouteCacheRepository(BaseRepository):
             
             if row:
                 # Update last_used timestamp
-                conn.execute('''
-                    UPDATE route_cache SET last_used = ? 
-                    WHERE source_node = ? AND target_node = ? AND agent_id = ?
-                ''', (datetime.now(timezone.utc).isoformat(), source_node, target_node, agent_id))
-                conn.commit()
+                with conn:
+                    conn.execute('''
+                        UPDATE route_cache SET last_used = ? 
+                        WHERE source_node = ? AND target_node = ? AND agent_id = ?
+                    ''', (datetime.now(timezone.utc).isoformat(), source_node, target_node, agent_id))
                 
                 cached_route = {
                     'route_path': json.loads(row[0]),
@@ -351,10 +578,8 @@ class RouteCacheRepository(BaseRepository):
                 }
                 
                 self.logger.debug(f"Found cached route: {source_node} -> {target_node}")
-                conn.close()
                 return cached_route
             
-            conn.close()
             return None
             
         except Exception as e:
@@ -370,12 +595,10 @@ class RouteCacheRepository(BaseRepository):
             expired_count = cursor.fetchone()[0]
             
             if expired_count > 0:
-                conn.execute('DELETE FROM route_cache WHERE datetime(expires_at) <= datetime("now")')
-                conn.commit()
+                with conn:
+                    conn.execute('DELETE FROM route_cache WHERE datetime(expires_at) <= datetime("now")')
                 self.logger.info(f"Cleaned up {expired_count} expired cached routes")
             
-            conn.close()
-            
         except Exception as e:
             self.logger.error(f"Error cleaning up expired routes: {e}")
     
@@ -402,7 +625,6 @@ class RouteCacheRepository(BaseRepository):
             ''', (agent_id,))
             recent_routes = cursor.fetchone()[0]
             
-            conn.close()
             
             return {
                 'total_cached_routes': total_routes,
@@ -452,7 +674,6 @@ class RouteCacheRepository(BaseRepository):
                     'route_path': json.loads(row[4])
                 })
             
-            conn.close()
             return results
             
         except Exception as e:
@@ -469,7 +690,6 @@ class RouteCacheRepository(BaseRepository):
             ''', (source_node, target_node, agent_id))
             
             row = cursor.fetchone()
-            conn.close()
             
             if row:
                 last_used = datetime.fromisoformat(row[0].replace('Z', '+00:00'))
@@ -491,33 +711,48 @@ class RouteCacheRepository(BaseRepository):
 class ServerHealthRepository(BaseRepository):
     """Repository for server health tracking"""
     
+    _SUCCESS_SQL = '''
+        INSERT INTO server_health 
+        (server_name, last_success, consecutive_failures, total_packets_sent, is_healthy)
+        VALUES (?, ?, 0, 1, 1)
+        ON CONFLICT (server_name) DO UPDATE SET
+            last_success = excluded.last_success,
+            consecutive_failures = 0,
+            total_packets_sent = total_packets_sent + 1,
+            is_healthy = 1
+    '''
+    
+    _FAILURE_SQL = '''
+        INSERT INTO server_health 
+        (server_name, last_failure, consecutive_failures, total_packets_sent, is_healthy)
+        VALUES (?, ?, 1, 0, 0)
+        ON CONFLICT (server_name) DO UPDATE SET
+            last_failure = excluded.last_failure,
+            consecutive_failures = consecutive_failures + 1,
+            is_healthy = 0
+    '''
+    
     def update_server_health(self, server_name: str, success: bool):
         """Update server health status"""
         try:
-            conn = self.db_connection.get_connection()
-            now = datetime.now(timezone.utc).isoformat()
-            
-            if success:
-                conn.execute('''
-                    INSERT OR REPLACE INTO server_health 
-                    (server_name, last_success, consecutive_failures, total_packets_sent, is_healthy)
-                    VALUES (?, ?, 0, COALESCE((SELECT total_packets_sent FROM server_health WHERE server_name = ?), 0) + 1, 1)
-                ''', (server_name, now, server_name))
-            else:
-                conn.execute('''
-                    INSERT OR REPLACE INTO server_health 
-                    (server_name, last_failure, consecutive_failures, total_packets_sent, is_healthy)
-                    VALUES (?, ?, COALESCE((SELECT consecutive_failures FROM server_health WHERE server_name = ?), 0) + 1, 
-                            COALESCE((SELECT total_packets_sent FROM server_health WHERE server_name = ?), 0), 0)
-                ''', (server_name, now, server_name, server_name))
-            
-            conn.commit()
-            conn.close()
-            
+            self.update_server_health_batch({server_name: success})
         except Exception as e:
             self.logger.error(f"Error updating server health for {server_name}: {e}")
             raise
     
+    def update_server_health_batch(self, results: Dict[str, bool]):
+        """Update health status for several servers in a single transaction"""
+        now = datetime.now(timezone.utc).isoformat()
+        success_rows = [(name, now) for name, success in results.items() if success]
+        failure_rows = [(name, now) for name, success in results.items() if not success]
+        
+        conn = self.db_connection.get_connection()
+        with conn:
+            if success_rows:
+                conn.executemany(self._SUCCESS_SQL, success_rows)
+            if failure_rows:
+                conn.executemany(self._FAILURE_SQL, failure_rows)
+    
     def get_server_health(self, server_name: str) -> Optional[Dict]:
         """Get health status for a specific server"""
         try:
@@ -528,7 +763,6 @@ class ServerHealthRepository(BaseRepository):
             ''', (server_name,))
             
             row = cursor.fetchone()
-            conn.close()
             
             if row:
                 return {
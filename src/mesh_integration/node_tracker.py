@@ -3,6 +3,7 @@ Node tracking and status management
 """
 import logging
 import queue
+import time
 from datetime import datetime, timezone
 from typing import Dict, Optional
 
@@ -160,6 +161,8 @@ class NodeTracker:
         self.logger = logging.getLogger(__name__)
         self.nodes: Dict[str, NodeStatus] = {}
         self.update_queue = queue.Queue()
+        # time.monotonic() of the last node change, for cheap "anything new?" checks
+        self.last_change: float = 0.0
     
     def update_from_packet(self, packet_data: Dict):
         """Update node status from a packet"""
@@ -178,6 +181,7 @@ class NodeTracker:
         
         # Queue for database update
         self.update_queue.put(self.nodes[node_id].to_dict())
+        self.last_change = time.monotonic()
         
         self.logger.debug(f"Updated node {node_id} from {packet_data['type']} packet")
     
@@ -204,6 +208,7 @@ class NodeTracker:
             
             self.logger.info(f"Updated position for {node_id}: lat={lat}, lon={lon}")
             self.update_queue.put(node.to_dict())
+            self.last_change = time.monotonic()
         else:
             self.logger.warning(f"Invalid position data for {node_id}: lat={lat}, lon={lon}")
     
@@ -219,6 +224,10 @@ class NodeTracker:
         """Get all nodes as dictionaries"""
         return {node_id: node.to_dict() for node_id, node in self.nodes.items()}
     
+    def has_changes_since(self, timestamp: float) -> bool:
+        """Check if any node changed after a time.monotonic() timestamp"""
+        return self.last_change > timestamp
+    
     def has_updates(self) -> bool:
         """Check if there are pending updates in the queue"""
         return not self.update_queue.empty()
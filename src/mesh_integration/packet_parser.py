@@ -4,7 +4,88 @@ Packet processing handlers for different Meshtastic packet types
 import logging
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Tuple
+
+
+# Telemetry metric fields as (snake_case name, camelCase alias or None). The
+# snake_case name is also the key used in the processed payload.
+_DEVICE_METRIC_FIELDS = (
+    ('battery_level', 'batteryLevel'),
+    ('voltage', None),
+    ('channel_utilization', 'channelUtilization'),
+    ('air_util_tx', 'airUtilTx'),
+    ('uptime_seconds', 'uptimeSeconds'),
+)
+
+_ENVIRONMENT_METRIC_FIELDS = (
+    ('temperature', None),
+    ('relative_humidity', 'relativeHumidity'),
+    ('barometric_pressure', 'barometricPressure'),
+    ('gas_resistance', 'gasResistance'),
+    ('voltage', None),
+    ('current', None),
+    ('iaq', None),
+    ('distance', None),
+    ('lux', None),
+    ('white_lux', 'whiteLux'),
+    ('ir_lux', 'irLux'),
+    ('uv_lux', 'uvLux'),
+    ('wind_direction', 'windDirection'),
+    ('wind_speed', 'windSpeed'),
+    ('weight', None),
+    ('wind_gust', 'windGust'),
+    ('wind_lull', 'windLull'),
+    ('radiation', None),
+    ('rainfall_1h', 'rainfall1h'),
+    ('rainfall_24h', 'rainfall24h'),
+)
+
+_POWER_METRIC_FIELDS = (
+    ('ch1_voltage', 'ch1Voltage'),
+    ('ch1_current', 'ch1Current'),
+    ('ch2_voltage', 'ch2Voltage'),
+    ('ch2_current', 'ch2Current'),
+    ('ch3_voltage', 'ch3Voltage'),
+    ('ch3_current', 'ch3Current'),
+)
+
+_AIR_QUALITY_METRIC_FIELDS = (
+    ('pm10_standard', 'pm10Standard'),
+    ('pm25_standard', 'pm25Standard'),
+    ('pm100_standard', 'pm100Standard'),
+    ('pm10_environmental', 'pm10Environmental'),
+    ('pm25_environmental', 'pm25Environmental'),
+    ('pm100_environmental', 'pm100Environmental'),
+    ('particles_03um', 'particles03um'),
+    ('particles_05um', 'particles05um'),
+    ('particles_10um', 'particles10um'),
+    ('particles_25um', 'particles25um'),
+    ('particles_50um', 'particles50um'),
+    ('particles_100um', 'particles100um'),
+)
+
+
+def _telemetry_section(telemetry, name: str, alias: str):
+    """Get a telemetry sub-section by its snake_case or camelCase name"""
+    if isinstance(telemetry, dict):
+        if name in telemetry:
+            return telemetry[name]
+        return telemetry.get(alias)
+    section = getattr(telemetry, name, None)
+    return section if section is not None else getattr(telemetry, alias, None)
+
+
+def _read_fields(source, fields: Tuple[Tuple[str, Optional[str]], ...]) -> Dict:
+    """Copy metric fields out of a telemetry section, accepting either naming style"""
+    if isinstance(source, dict):
+        get = source.get
+    else:
+        def get(field):
+            return getattr(source, field, None)
+    return {
+        name: (get(name) or get(alias)) if alias else get(name)
+        for name, alias in fields
+    }
 
 
 class PacketHandler(ABC):
@@ -60,7 +141,7 @@ class TextMessageHandler(PacketHandler):
         decoded = packet.get('decoded', {})
         packet_data['payload'] = decoded.get('text', '')
 
-        self.logger.debug(f"Processed text message from {packet_data['from_node']}")
+        self.logger.debug("Processed text message from %s", packet_data['from_node'])
         return packet_data
 
 
@@ -89,8 +170,8 @@ class PositionHandler(PacketHandler):
         }
         packet_data['payload'] = position_data
 
-        self.logger.debug(f"Processed position data from {packet_data['from_node']}: "
-                         f"lat={position_data['latitude']}, lon={position_data['longitude']}")
+        self.logger.debug("Processed position data from %s: lat=%s, lon=%s", packet_data['from_node'],
+                          position_data['latitude'], position_data['longitude'])
         return packet_data
 
 
@@ -117,117 +198,47 @@ class TelemetryHandler(PacketHandler):
 
         # Device metrics (battery, voltage, channel utilization, airtime, uptime)
         # Check for both snake_case and camelCase variants
-        device_metrics = None
-        if hasattr(telemetry, 'device_metrics') or 'device_metrics' in telemetry:
-            device_metrics = getattr(telemetry, 'device_metrics', telemetry.get('device_metrics'))
-        elif hasattr(telemetry, 'deviceMetrics') or 'deviceMetrics' in telemetry:
-            device_metrics = getattr(telemetry, 'deviceMetrics', telemetry.get('deviceMetrics'))
+        device_metrics = _telemetry_section(telemetry, 'device_metrics', 'deviceMetrics')
 
         if device_metrics:
-            telemetry_data['device_metrics'] = {
-                'battery_level': getattr(device_metrics, 'battery_level', None) or getattr(device_metrics, 'batteryLevel', None) or device_metrics.get('battery_level') or device_metrics.get('batteryLevel'),
-                'voltage': getattr(device_metrics, 'voltage', None) or device_metrics.get('voltage'),
-                'channel_utilization': getattr(device_metrics, 'channel_utilization', None) or getattr(device_metrics, 'channelUtilization', None) or device_metrics.get('channel_utilization') or device_metrics.get('channelUtilization'),
-                'air_util_tx': getattr(device_metrics, 'air_util_tx', None) or getattr(device_metrics, 'airUtilTx', None) or device_metrics.get('air_util_tx') or device_metrics.get('airUtilTx'),
-                'uptime_seconds': getattr(device_metrics, 'uptime_seconds', None) or getattr(device_metrics, 'uptimeSeconds', None) or device_metrics.get('uptime_seconds') or device_metrics.get('uptimeSeconds')
-            }
+            telemetry_data['device_metrics'] = _read_fields(device_metrics, _DEVICE_METRIC_FIELDS)
 
         # Environment metrics (temperature, humidity, pressure, sensors, etc.)
         # Check for both snake_case and camelCase variants
-        env_metrics = None
-        if hasattr(telemetry, 'environment_metrics') or 'environment_metrics' in telemetry:
-            env_metrics = getattr(telemetry, 'environment_metrics', telemetry.get('environment_metrics'))
-        elif hasattr(telemetry, 'environmentMetrics') or 'environmentMetrics' in telemetry:
-            env_metrics = getattr(telemetry, 'environmentMetrics', telemetry.get('environmentMetrics'))
+        env_metrics = _telemetry_section(telemetry, 'environment_metrics', 'environmentMetrics')
 
         if env_metrics:
-            self.logger.debug(f"Environment metrics found for {packet_data['from_node']}: temp={env_metrics.get('temperature')}, humidity={env_metrics.get('relativeHumidity')}")
-            telemetry_data['environment_metrics'] = {
-                'temperature': getattr(env_metrics, 'temperature', None) or env_metrics.get('temperature'),
-                'relative_humidity': getattr(env_metrics, 'relative_humidity', None) or getattr(env_metrics, 'relativeHumidity', None) or env_metrics.get('relative_humidity') or env_metrics.get('relativeHumidity'),
-                'barometric_pressure': getattr(env_metrics, 'barometric_pressure', None) or getattr(env_metrics, 'barometricPressure', None) or env_metrics.get('barometric_pressure') or env_metrics.get('barometricPressure'),
-                'gas_resistance': getattr(env_metrics, 'gas_resistance', None) or getattr(env_metrics, 'gasResistance', None) or env_metrics.get('gas_resistance') or env_metrics.get('gasResistance'),
-                'voltage': getattr(env_metrics, 'voltage', None) or env_metrics.get('voltage'),
-                'current': getattr(env_metrics, 'current', None) or env_metrics.get('current'),
-                'iaq': getattr(env_metrics, 'iaq', None) or env_metrics.get('iaq'),
-                'distance': getattr(env_metrics, 'distance', None) or env_metrics.get('distance'),
-                'lux': getattr(env_metrics, 'lux', None) or env_metrics.get('lux'),
-                'white_lux': getattr(env_metrics, 'white_lux', None) or getattr(env_metrics, 'whiteLux', None) or env_metrics.get('white_lux') or env_metrics.get('whiteLux'),
-                'ir_lux': getattr(env_metrics, 'ir_lux', None) or getattr(env_metrics, 'irLux', None) or env_metrics.get('ir_lux') or env_metrics.get('irLux'),
-                'uv_lux': getattr(env_metrics, 'uv_lux', None) or getattr(env_metrics, 'uvLux', None) or env_metrics.get('uv_lux') or env_metrics.get('uvLux'),
-                'wind_direction': getattr(env_metrics, 'wind_direction', None) or getattr(env_metrics, 'windDirection', None) or env_metrics.get('wind_direction') or env_metrics.get('windDirection'),
-                'wind_speed': getattr(env_metrics, 'wind_speed', None) or getattr(env_metrics, 'windSpeed', None) or env_metrics.get('wind_speed') or env_metrics.get('windSpeed'),
-                'weight': getattr(env_metrics, 'weight', None) or env_metrics.get('weight'),
-                'wind_gust': getattr(env_metrics, 'wind_gust', None) or getattr(env_metrics, 'windGust', None) or env_metrics.get('wind_gust') or env_metrics.get('windGust'),
-                'wind_lull': getattr(env_metrics, 'wind_lull', None) or getattr(env_metrics, 'windLull', None) or env_metrics.get('wind_lull') or env_metrics.get('windLull'),
-                'radiation': getattr(env_metrics, 'radiation', None) or env_metrics.get('radiation'),
-                'rainfall_1h': getattr(env_metrics, 'rainfall_1h', None) or getattr(env_metrics, 'rainfall1h', None) or env_metrics.get('rainfall_1h') or env_metrics.get('rainfall1h'),
-                'rainfall_24h': getattr(env_metrics, 'rainfall_24h', None) or getattr(env_metrics, 'rainfall24h', None) or env_metrics.get('rainfall_24h') or env_metrics.get('rainfall24h')
-            }
+            self.logger.debug("Environment metrics found for %s: temp=%s, humidity=%s", packet_data['from_node'],
+                              env_metrics.get('temperature'), env_metrics.get('relativeHumidity'))
+            telemetry_data['environment_metrics'] = _read_fields(env_metrics, _ENVIRONMENT_METRIC_FIELDS)
 
         # Power metrics (multi-channel voltage/current monitoring)
-        power_metrics = None
-        if hasattr(telemetry, 'power_metrics') or 'power_metrics' in telemetry:
-            power_metrics = getattr(telemetry, 'power_metrics', telemetry.get('power_metrics'))
-        elif hasattr(telemetry, 'powerMetrics') or 'powerMetrics' in telemetry:
-            power_metrics = getattr(telemetry, 'powerMetrics', telemetry.get('powerMetrics'))
+        power_metrics = _telemetry_section(telemetry, 'power_metrics', 'powerMetrics')
 
         if power_metrics:
-            telemetry_data['power_metrics'] = {
-                'ch1_voltage': getattr(power_metrics, 'ch1_voltage', None) or getattr(power_metrics, 'ch1Voltage', None) or power_metrics.get('ch1_voltage') or power_metrics.get('ch1Voltage'),
-                'ch1_current': getattr(power_metrics, 'ch1_current', None) or getattr(power_metrics, 'ch1Current', None) or power_metrics.get('ch1_current') or power_metrics.get('ch1Current'),
-                'ch2_voltage': getattr(power_metrics, 'ch2_voltage', None) or getattr(power_metrics, 'ch2Voltage', None) or power_metrics.get('ch2_voltage') or power_metrics.get('ch2Voltage'),
-                'ch2_current': getattr(power_metrics, 'ch2_current', None) or getattr(power_metrics, 'ch2Current', None) or power_metrics.get('ch2_current') or power_metrics.get('ch2Current'),
-                'ch3_voltage': getattr(power_metrics, 'ch3_voltage', None) or getattr(power_metrics, 'ch3Voltage', None) or power_metrics.get('ch3_voltage') or power_metrics.get('ch3Voltage'),
-                'ch3_current': getattr(power_metrics, 'ch3_current', None) or getattr(power_metrics, 'ch3Current', None) or power_metrics.get('ch3_current') or power_metrics.get('ch3Current')
-            }
+            telemetry_data['power_metrics'] = _read_fields(power_metrics, _POWER_METRIC_FIELDS)
 
         # Air quality metrics (particulate matter and particle counts)
-        aq_metrics = None
-        if hasattr(telemetry, 'air_quality_metrics') or 'air_quality_metrics' in telemetry:
-            aq_metrics = getattr(telemetry, 'air_quality_metrics', telemetry.get('air_quality_metrics'))
-        elif hasattr(telemetry, 'airQualityMetrics') or 'airQualityMetrics' in telemetry:
-            aq_metrics = getattr(telemetry, 'airQualityMetrics', telemetry.get('airQualityMetrics'))
+        aq_metrics = _telemetry_section(telemetry, 'air_quality_metrics', 'airQualityMetrics')
 
         if aq_metrics:
-            telemetry_data['air_quality_metrics'] = {
-                'pm10_standard': getattr(aq_metrics, 'pm10_standard', None) or getattr(aq_metrics, 'pm10Standard', None) or aq_metrics.get('pm10_standard') or aq_metrics.get('pm10Standard'),
-                'pm25_standard': getattr(aq_metrics, 'pm25_standard', None) or getattr(aq_metrics, 'pm25Standard', None) or aq_metrics.get('pm25_standard') or aq_metrics.get('pm25Standard'),
-                'pm100_standard': getattr(aq_metrics, 'pm100_standard', None) or getattr(aq_metrics, 'pm100Standard', None) or aq_metrics.get('pm100_standard') or aq_metrics.get('pm100Standard'),
-                'pm10_environmental': getattr(aq_metrics, 'pm10_environmental', None) or getattr(aq_metrics, 'pm10Environmental', None) or aq_metrics.get('pm10_environmental') or aq_metrics.get('pm10Environmental'),
-                'pm25_environmental': getattr(aq_metrics, 'pm25_environmental', None) or getattr(aq_metrics, 'pm25Environmental', None) or aq_metrics.get('pm25_environmental') or aq_metrics.get('pm25Environmental'),
-                'pm100_environmental': getattr(aq_metrics, 'pm100_environmental', None) or getattr(aq_metrics, 'pm100Environmental', None) or aq_metrics.get('pm100_environmental') or aq_metrics.get('pm100Environmental'),
-                'particles_03um': getattr(aq_metrics, 'particles_03um', None) or getattr(aq_metrics, 'particles03um', None) or aq_metrics.get('particles_03um') or aq_metrics.get('particles03um'),
-                'particles_05um': getattr(aq_metrics, 'particles_05um', None) or getattr(aq_metrics, 'particles05um', None) or aq_metrics.get('particles_05um') or aq_metrics.get('particles05um'),
-                'particles_10um': getattr(aq_metrics, 'particles_10um', None) or getattr(aq_metrics, 'particles10um', None) or aq_metrics.get('particles_10um') or aq_metrics.get('particles10um'),
-                'particles_25um': getattr(aq_metrics, 'particles_25um', None) or getattr(aq_metrics, 'particles25um', None) or aq_metrics.get('particles_25um') or aq_metrics.get('particles25um'),
-                'particles_50um': getattr(aq_metrics, 'particles_50um', None) or getattr(aq_metrics, 'particles50um', None) or aq_metrics.get('particles_50um') or aq_metrics.get('particles50um'),
-                'particles_100um': getattr(aq_metrics, 'particles_100um', None) or getattr(aq_metrics, 'particles100um', None) or aq_metrics.get('particles_100um') or aq_metrics.get('particles100um')
-            }
+            telemetry_data['air_quality_metrics'] = _read_fields(aq_metrics, _AIR_QUALITY_METRIC_FIELDS)
 
         # Local stats (network statistics)
-        local_stats = None
-        if hasattr(telemetry, 'local_stats') or 'local_stats' in telemetry:
-            local_stats = getattr(telemetry, 'local_stats', telemetry.get('local_stats'))
-        elif hasattr(telemetry, 'localStats') or 'localStats' in telemetry:
-            local_stats = getattr(telemetry, 'localStats', telemetry.get('localStats'))
+        local_stats = _telemetry_section(telemetry, 'local_stats', 'localStats')
 
         if local_stats:
             telemetry_data['local_stats'] = dict(local_stats) if isinstance(local_stats, dict) else str(local_stats)
 
         # Health metrics (heart rate, SpO2, body temperature)
-        health_metrics = None
-        if hasattr(telemetry, 'health_metrics') or 'health_metrics' in telemetry:
-            health_metrics = getattr(telemetry, 'health_metrics', telemetry.get('health_metrics'))
-        elif hasattr(telemetry, 'healthMetrics') or 'healthMetrics' in telemetry:
-            health_metrics = getattr(telemetry, 'healthMetrics', telemetry.get('healthMetrics'))
+        health_metrics = _telemetry_section(telemetry, 'health_metrics', 'healthMetrics')
 
         if health_metrics:
             telemetry_data['health_metrics'] = dict(health_metrics) if isinstance(health_metrics, dict) else str(health_metrics)
 
         packet_data['payload'] = telemetry_data
 
-        self.logger.debug(f"Processed telemetry from {packet_data['from_node']}: {list(telemetry_data.keys())}")
+        self.logger.debug("Processed telemetry from %s: %s", packet_data['from_node'], list(telemetry_data))
         return packet_data
 
 
@@ -256,7 +267,7 @@ class UserInfoHandler(PacketHandler):
         }
         packet_data['payload'] = user_data
 
-        self.logger.debug(f"Processed user info from {packet_data['from_node']}")
+        self.logger.debug("Processed user info from %s", packet_data['from_node'])
         return packet_data
 
 
@@ -282,7 +293,7 @@ class RoutingHandler(PacketHandler):
         }
         packet_data['payload'] = routing_data
 
-        self.logger.debug(f"Processed routing packet from {packet_data['from_node']}")
+        self.logger.debug("Processed routing packet from %s", packet_data['from_node'])
         return packet_data
 
 
@@ -337,7 +348,7 @@ class TracerouteHandler(PacketHandler):
         
         packet_data['payload'] = traceroute_data
         
-        self.logger.debug(f"Processed traceroute packet from {packet_data['from_node']}")
+        self.logger.debug("Processed traceroute packet from %s", packet_data['from_node'])
         return packet_data
 
 
@@ -376,7 +387,7 @@ class EncryptedHandler(PacketHandler):
 
         packet_data['payload'] = None
 
-        self.logger.debug(f"Processed encrypted packet from {packet_data['from_node']}")
+        self.logger.debug("Processed encrypted packet from %s", packet_data['from_node'])
         return packet_data
 
 
@@ -392,7 +403,7 @@ class UnknownHandler(PacketHandler):
         packet_data['type'] = 'other'
         packet_data['payload'] = packet.get('decoded', {})
         
-        self.logger.debug(f"Processed unknown packet type from {packet_data['from_node']}")
+        self.logger.debug("Processed unknown packet type from %s", packet_data['from_node'])
         return packet_data
 
 
@@ -5,18 +5,43 @@ import aiohttp
 import asyncio
 import logging
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from ..core.config import ServerConfig, AgentConfig
 from ..core.exceptions import ServerConnectionError
 
 
+def _create_session() -> aiohttp.ClientSession:
+    """Create a long-lived HTTP session that keeps connections to servers open"""
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(
+        limit=50, limit_per_host=4, keepalive_timeout=60, ttl_dns_cache=300
+    ))
+
+
 class ServerClient:
     """Client for communicating with a single server"""
     
-    def __init__(self, server_config: ServerConfig):
+    def __init__(self, server_config: ServerConfig,
+                 session_getter: Optional[Callable[[], aiohttp.ClientSession]] = None):
         self.config = server_config
         self.logger = logging.getLogger(__name__)
+        # Shared session from MultiServerClient; standalone clients open their own
+        self._session_getter = session_getter
+        self._own_session: Optional[aiohttp.ClientSession] = None
+    
+    def _session(self) -> aiohttp.ClientSession:
+        """Get the HTTP session to send requests on"""
+        if self._session_getter is not None:
+            return self._session_getter()
+        if self._own_session is None or self._own_session.closed:
+            self._own_session = _create_session()
+        return self._own_session
+    
+    async def close(self):
+        """Close this client's own HTTP session, if it opened one"""
+        if self._own_session is not None and not self._own_session.closed:
+            await self._own_session.close()
+        self._own_session = None
     
     async def register_agent(self, agent_config: AgentConfig) -> bool:
         """Register this agent with the server"""
@@ -34,21 +59,20 @@ class ServerClient:
                 'X-API-Key': self.config.api_key
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.config.url}/api/agent/register",
-                    json=payload,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=self.config.timeout)
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        self.logger.info(f"Successfully registered with {self.config.name}: {result.get('agent_id')}")
-                        return True
-                    else:
-                        self.logger.error(f"Failed to register with {self.config.name}: {response.status}")
-                        return False
-                        
+            async with self._session().post(
+                f"{self.config.url}/api/agent/register",
+                json=payload,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout)
+            ) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    self.logger.info(f"Successfully registered with {self.config.name}: {result.get('agent_id')}")
+                    return True
+                else:
+                    self.logger.error(f"Failed to register with {self.config.name}: {response.status}")
+                    return False
+                    
         except Exception as e:
             self.logger.error(f"Error registering with {self.config.name}: {e}")
             raise ServerConnectionError(f"Registration failed for {self.config.name}: {e}")
@@ -72,21 +96,20 @@ class ServerClient:
                 'X-API-Key': self.config.api_key
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.config.url}/api/agent/data",
-                    json=payload,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=self.config.timeout)
-                ) as response:
-                    if response.status == 200:
-                        self.logger.info(f"Successfully sent {len(packets)} packets and {len(node_status)} nodes to {self.config.name}")
-                        return True
-                    else:
-                        response_text = await response.text()
-                        self.logger.error(f"Server {self.config.name} returned status {response.status}: {response_text}")
-                        return False
-                        
+            async with self._session().post(
+                f"{self.config.url}/api/agent/data",
+                json=payload,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout)
+            ) as response:
+                if response.status == 200:
+                    self.logger.info(f"Successfully sent {len(packets)} packets and {len(node_status)} nodes to {self.config.name}")
+                    return True
+                else:
+                    response_text = await response.text()
+                    self.logger.error(f"Server {self.config.name} returned status {response.status}: {response_text}")
+                    return False
+                    
         except Exception as e:
             self.logger.error(f"Error sending data to {self.config.name}: {e}")
             raise ServerConnectionError(f"Data send failed for {self.config.name}: {e}")
@@ -111,21 +134,20 @@ class ServerClient:
                 'X-API-Key': self.config.api_key
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.config.url}/api/agent/nodedb",
-                    json=payload,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=self.config.timeout)
-                ) as response:
-                    if response.status == 200:
-                        self.logger.info(f"Successfully sent nodedb data for {len(nodes_data)} nodes to {self.config.name}")
-                        return True
-                    else:
-                        response_text = await response.text()
-                        self.logger.error(f"Server {self.config.name} returned status {response.status} for nodedb: {response_text}")
-                        return False
-                        
+            async with self._session().post(
+                f"{self.config.url}/api/agent/nodedb",
+                json=payload,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout)
+            ) as response:
+                if response.status == 200:
+                    self.logger.info(f"Successfully sent nodedb data for {len(nodes_data)} nodes to {self.config.name}")
+                    return True
+                else:
+                    response_text = await response.text()
+                    self.logger.error(f"Server {self.config.name} returned status {response.status} for nodedb: {response_text}")
+                    return False
+                    
         except Exception as e:
             self.logger.error(f"Error sending nodedb data to {self.config.name}: {e}")
             raise ServerConnectionError(f"Nodedb send failed for {self.config.name}: {e}")
@@ -151,21 +173,20 @@ class ServerClient:
                 'X-API-Key': self.config.api_key
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.config.url}/api/agent/routes",
-                    json=payload,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=self.config.timeout)
-                ) as response:
-                    if response.status == 200:
-                        self.logger.info(f"Successfully sent route data for {len(route_results)} routes to {self.config.name}")
-                        return True
-                    else:
-                        response_text = await response.text()
-                        self.logger.error(f"Server {self.config.name} returned status {response.status} for routes: {response_text}")
-                        return False
-                        
+            async with self._session().post(
+                f"{self.config.url}/api/agent/routes",
+                json=payload,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout)
+            ) as response:
+                if response.status == 200:
+                    self.logger.info(f"Successfully sent route data for {len(route_results)} routes to {self.config.name}")
+                    return True
+                else:
+                    response_text = await response.text()
+                    self.logger.error(f"Server {self.config.name} returned status {response.status} for routes: {response_text}")
+                    return False
+                    
         except Exception as e:
             self.logger.error(f"Error sending route data to {self.config.name}: {e}")
             raise ServerConnectionError(f"Route data send failed for {self.config.name}: {e}")
@@ -177,14 +198,13 @@ class ServerClient:
                 'X-API-Key': self.config.api_key
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.config.url}/api/health",
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=self.config.timeout)
-                ) as response:
-                    return response.status == 200
-                    
+            async with self._session().get(
+                f"{self.config.url}/api/health",
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout)
+            ) as response:
+                return response.status == 200
+                
         except Exception as e:
             self.logger.debug(f"Health check failed for {self.config.name}: {e}")
             return False
@@ -194,9 +214,23 @@ class MultiServerClient:
     """Manages communication with multiple servers"""
     
     def __init__(self, server_configs: Dict[str, ServerConfig]):
-        self.servers = {name: ServerClient(config) for name, config in server_configs.items()}
+        # One pooled session reused by every server client, opened on first use
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self.servers = {name: ServerClient(config, self._get_session) for name, config in server_configs.items()}
         self.logger = logging.getLogger(__name__)
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use"""
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = _create_session()
+        return self._http_session
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
+    
     async def register_all(self, agent_config: AgentConfig) -> Dict[str, bool]:
         """Register with all enabled servers"""
         results = {}
@@ -389,12 +423,12 @@ class MultiServerClient:
     
     def update_server_config(self, server_name: str, config: ServerConfig):
         """Update configuration for a specific server"""
-        self.servers[server_name] = ServerClient(config)
+        self.servers[server_name] = ServerClient(config, self._get_session)
         self.logger.info(f"Updated configuration for server {server_name}")
     
     def add_server(self, server_name: str, config: ServerConfig):
         """Add a new server"""
-        self.servers[server_name] = ServerClient(config)
+        self.servers[server_name] = ServerClient(config, self._get_session)
         self.logger.info(f"Added new server: {server_name}")
     
     def remove_server(self, server_name: str):
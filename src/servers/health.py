@@ -31,17 +31,28 @@ class ServerHealthMonitor:
     
     def record_success(self):
         """Record a successful operation"""
-        self.config.consecutive_failures = 0
-        self.config.is_healthy = True
-        self.config.last_success = datetime.now(timezone.utc).isoformat()
+        self._mark(True)
         
         # Update database
         self.health_repo.update_server_health(self.config.name, success=True)
-        
-        self.logger.debug(f"Server {self.config.name} operation successful")
     
     def record_failure(self):
         """Record a failed operation"""
+        self._mark(False)
+        
+        # Update database
+        self.health_repo.update_server_health(self.config.name, success=False)
+    
+    def _mark(self, success: bool):
+        """Update the in-memory health state for an operation result"""
+        if success:
+            self.config.consecutive_failures = 0
+            self.config.is_healthy = True
+            self.config.last_success = datetime.now(timezone.utc).isoformat()
+            
+            self.logger.debug(f"Server {self.config.name} operation successful")
+            return
+        
         self.config.consecutive_failures += 1
         
         # Mark as unhealthy after max_retries consecutive failures
@@ -49,9 +60,6 @@ class ServerHealthMonitor:
             self.config.is_healthy = False
             self.logger.warning(f"Server {self.config.name} marked as unhealthy after {self.config.consecutive_failures} failures")
         
-        # Update database
-        self.health_repo.update_server_health(self.config.name, success=False)
-        
         self.logger.debug(f"Server {self.config.name} operation failed (failures: {self.config.consecutive_failures})")
     
     def is_healthy(self) -> bool:
@@ -107,6 +115,24 @@ class MultiServerHealthMonitor:
         else:
             self.logger.warning(f"Attempted to record failure for unknown server: {server_name}")
     
+    def mark_results(self, results: Dict[str, bool]) -> Dict[str, bool]:
+        """Update in-memory health for several servers, returning the results that still need persisting"""
+        known = {}
+        for server_name, success in results.items():
+            monitor = self.monitors.get(server_name)
+            if monitor is None:
+                self.logger.warning(f"Attempted to record result for unknown server: {server_name}")
+                continue
+            monitor._mark(success)
+            known[server_name] = success
+        return known
+    
+    def record_results(self, results: Dict[str, bool]):
+        """Record success/failure for several servers, persisted in one transaction"""
+        known = self.mark_results(results)
+        if known:
+            self.health_repo.update_server_health_batch(known)
+    
     def is_server_healthy(self, server_name: str) -> bool:
         """Check if a specific server is healthy"""
         if server_name in self.monitors:
@@ -168,11 +194,7 @@ class MultiServerHealthMonitor:
                 health_results = await server_client.health_check_all()
                 
                 # Update health state based on results
-                for server_name, is_healthy in health_results.items():
-                    if is_healthy:
-                        self.record_success(server_name)
-                    else:
-                        self.record_failure(server_name)
+                self.record_results(health_results)
                 
                 # Log summary
                 healthy_count = len(self.get_healthy_servers())
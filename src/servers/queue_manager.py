@@ -3,6 +3,7 @@ Multi-server queue management for different reporting intervals
 """
 import asyncio
 import logging
+from functools import lru_cache
 from typing import Dict, List, Tuple
 
 from ..core.config import ServerConfig
@@ -16,24 +17,20 @@ class ServerQueue:
         self.server_name = server_name
         self.config = server_config
         self.logger = logging.getLogger(__name__)
+        # Routing only depends on (packet type, node), so remember recent decisions;
+        # the cache lives and dies with this queue's config
+        self._accepts = lru_cache(maxsize=4096)(self._check_filters)
     
     def should_process_packet(self, packet_data: Dict, node_id: str) -> bool:
         """Check if this packet should be queued for this server"""
         if not self.config.enabled:
             return False
         
-        # Check packet type filtering
-        if self.config.packet_types != ['all'] and packet_data['type'] not in self.config.packet_types:
-            return False
-        
-        # Check node filtering
-        if self.config.filter_nodes and node_id not in self.config.filter_nodes:
-            return False
-        
-        if self.config.exclude_nodes and node_id in self.config.exclude_nodes:
-            return False
-        
-        return True
+        return self._accepts(packet_data['type'], node_id)
+    
+    def _check_filters(self, packet_type: str, node_id: str) -> bool:
+        """Apply this server's packet type and node filters"""
+        return self.config.accepts(packet_type, node_id)
 
 
 class MultiServerQueueManager:
@@ -51,11 +48,8 @@ class MultiServerQueueManager:
         for name, config in server_configs.items():
             self.server_queues[name] = ServerQueue(name, config)
     
-    def queue_packet(self, packet_data: Dict) -> int:
-        """Queue a packet for appropriate servers and return packet ID"""
-        node_id = packet_data.get('from_node', '')
-        
-        # Determine which servers should receive this packet
+    def _server_routing(self, packet_data: Dict, node_id: str) -> Dict[str, Dict]:
+        """Determine which servers should receive a packet"""
         server_routing = {}
         
         for server_name, server_queue in self.server_queues.items():
@@ -67,6 +61,15 @@ class MultiServerQueueManager:
                     'retry_count': 0
                 }
         
+        return server_routing
+    
+    def queue_packet(self, packet_data: Dict) -> int:
+        """Queue a packet for appropriate servers and return packet ID"""
+        node_id = packet_data.get('from_node', '')
+        
+        # Determine which servers should receive this packet
+        server_routing = self._server_routing(packet_data, node_id)
+        
         if server_routing:
             # Store in database with routing information
             packet_id = self.packet_repo.store_packet(packet_data, server_routing)
@@ -76,6 +79,22 @@ class MultiServerQueueManager:
             self.logger.debug(f"No servers configured for packet from {node_id}")
             return -1
     
+    def queue_packets_batch(self, packets: List[Dict]) -> List[int]:
+        """Queue several packets in one database transaction and return their IDs"""
+        routed = []
+        for packet_data in packets:
+            server_routing = self._server_routing(packet_data, packet_data.get('from_node', ''))
+            if server_routing:
+                routed.append((packet_data, server_routing))
+        
+        if not routed:
+            self.logger.debug(f"No servers configured for {len(packets)} packets")
+            return []
+        
+        packet_ids = self.packet_repo.store_packets(routed)
+        self.logger.debug(f"Queued {len(packet_ids)} of {len(packets)} packets")
+        return packet_ids
+    
     def get_packets_for_server(self, server_name: str, limit: int = 100) -> Tuple[List[int], List[Dict]]:
         """Get queued packets for a specific server"""
         try:
@@ -84,7 +103,7 @@ class MultiServerQueueManager:
             packet_ids = []
             packet_data_list = []
             
-            for packet_id, packet_data, server_status in packets:
+            for packet_id, packet_data in packets:
                 packet_ids.append(packet_id)
                 packet_data_list.append(packet_data)
             
@@ -187,7 +206,9 @@ class MultiServerQueueManager:
     def update_server_config(self, server_name: str, server_config: ServerConfig):
         """Update configuration for a server queue"""
         if server_name in self.server_queues:
-            self.server_queues[server_name].config = server_config
+            server_queue = self.server_queues[server_name]
+            server_queue.config = server_config
+            server_queue._accepts.cache_clear()
             self.server_configs[server_name] = server_config
             self.logger.info(f"Updated configuration for server queue: {server_name}")
 
@@ -195,11 +216,26 @@ class MultiServerQueueManager:
 class ServerTaskManager:
     """Manages individual server reporting tasks"""
     
-    def __init__(self, queue_manager: MultiServerQueueManager):
+    def __init__(self, queue_manager: MultiServerQueueManager, run_db=None):
         self.queue_manager = queue_manager
+        # Awaitable runner for blocking database calls, e.g. the agent's DB thread;
+        # without one they run inline
+        self.run_db = run_db
         self.tasks: Dict[str, asyncio.Task] = {}
         self.logger = logging.getLogger(__name__)
     
+    async def _db(self, func, *args):
+        """Run a blocking queue/repository call through run_db"""
+        if self.run_db is None:
+            return func(*args)
+        return await self.run_db(func, *args)
+    
+    async def _record_health(self, health_monitor, server_name: str, success: bool):
+        """Update a server's health in memory and persist it through run_db"""
+        known = health_monitor.mark_results({server_name: success})
+        if known:
+            await self._db(health_monitor.health_repo.update_server_health_batch, known)
+    
     async def server_reporting_loop(self, server_name: str, server_client, agent_config, health_monitor):
         """Individual server reporting loop"""
         config = self.queue_manager.server_configs[server_name]
@@ -209,8 +245,10 @@ class ServerTaskManager:
             try:
                 if config.enabled and health_monitor.is_server_healthy(server_name):
                     # Get packets and node status for this server
-                    packet_ids, packets = self.queue_manager.get_packets_for_server(server_name)
-                    node_status = self.queue_manager.get_node_status_for_server(agent_config.id, server_name)
+                    packet_ids, packets = await self._db(self.queue_manager.get_packets_for_server, server_name)
+                    node_status = await self._db(
+                        self.queue_manager.get_node_status_for_server, agent_config.id, server_name
+                    )
                     
                     if packets or node_status:
                         # Send data to server
@@ -221,10 +259,8 @@ class ServerTaskManager:
                         if success:
                             # Mark packets as sent
                             if packet_ids:
-                                self.queue_manager.mark_packets_sent(packet_ids, server_name)
-                            health_monitor.record_success(server_name)
-                        else:
-                            health_monitor.record_failure(server_name)
+                                await self._db(self.queue_manager.mark_packets_sent, packet_ids, server_name)
+                        await self._record_health(health_monitor, server_name, success)
                     else:
                         self.logger.debug(f"No data to send to {server_name}")
                 
@@ -235,7 +271,7 @@ class ServerTaskManager:
                 break
             except Exception as e:
                 self.logger.error(f"Error in server loop for {server_name}: {e}")
-                health_monitor.record_failure(server_name)
+                await self._record_health(health_monitor, server_name, False)
                 await asyncio.sleep(config.report_interval)
     
     def start_server_task(self, server_name: str, server_client, agent_config, health_monitor):
@@ -265,4 +301,9 @@ class ServerTaskManager:
     
     def get_active_tasks(self) -> List[str]:
         """Get list of servers with active tasks"""
-        return list(self.tasks.keys())
\ No newline at end of file
+        return list(self.tasks.keys())
+    
+    @property
+    def active_count(self) -> int:
+        """Number of servers with active tasks"""
+        return len(self.tasks)
\ No newline at end of file
@@ -253,6 +253,8 @@ def get_logger(name: str) -> logging.Logger:
 class LoggerMixin:
     """Mixin class to add logging capability to other classes"""
     
+    __slots__ = ()
+    
     @property
     def logger(self) -> logging.Logger:
         """Get logger for this class"""
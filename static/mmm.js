@@ -0,0 +1,108 @@
+// Shared theme handling for the MeshyMcMapface web UI.
+// Loaded synchronously from <head> so the theme is applied before the page renders.
+
+// Theme initialization - must run before page renders to avoid flash
+(function() {
+    const theme = localStorage.getItem('theme') || 'light';
+    document.documentElement.setAttribute('data-theme', theme);
+})();
+
+// Theme toggle functions
+function toggleTheme() {
+    const html = document.documentElement;
+    const currentTheme = html.getAttribute('data-theme') || 'light';
+    const newTheme = currentTheme === 'light' ? 'dark' : 'light';
+
+    html.setAttribute('data-theme', newTheme);
+    localStorage.setItem('theme', newTheme);
+    updateThemeToggleText(newTheme);
+}
+
+function updateThemeToggleText(theme) {
+    const toggle = document.getElementById('theme-toggle');
+    if (toggle) {
+        toggle.textContent = theme === 'light' ? '🌙 Dark' : '☀️ Light';
+    }
+}
+
+// Initialize theme toggle text on load
+window.addEventListener('DOMContentLoaded', () => {
+    const currentTheme = document.documentElement.getAttribute('data-theme') || 'light';
+    updateThemeToggleText(currentTheme);
+});
+
+// Poll `fn` every `intervalMs` while the page is visible. Polls are skipped
+// for hidden tabs and run in idle time; a fresh poll runs as soon as the tab
+// becomes visible again.
+function startVisiblePolling(fn, intervalMs) {
+    setInterval(() => {
+        if (document.hidden) return;
+        if (window.requestIdleCallback) {
+            requestIdleCallback(() => fn(), { timeout: 2000 });
+        } else {
+            fn();
+        }
+    }, intervalMs);
+    document.addEventListener('visibilitychange', () => {
+        if (!document.hidden) fn();
+    });
+}
+
+// Memoized JSON fetch. A response is reused for `ttlMs`, then revalidated
+// with If-None-Match; `changed` is false whenever the cached copy was used.
+const fetchCache = new Map();
+
+async function fetchCached(url, ttlMs = 60000) {
+    const cached = fetchCache.get(url);
+    if (cached && Date.now() - cached.time < ttlMs) {
+        return { data: cached.data, changed: false };
+    }
+
+    const headers = cached && cached.etag ? { 'If-None-Match': cached.etag } : {};
+    const response = await fetch(url, { headers });
+    if (response.status === 304 && cached) {
+        cached.time = Date.now();
+        return { data: cached.data, changed: false };
+    }
+
+    const data = await response.json();
+    if (response.ok) {
+        fetchCache.set(url, { data, etag: response.headers.get('ETag'), time: Date.now() });
+    }
+    return { data, changed: true };
+}
+
+// Shared timestamp formatter. Formatted strings are memoized because the
+// same timestamps come back on every poll.
+const DATE_TIME_FORMAT = new Intl.DateTimeFormat(undefined, {
+    year: 'numeric', month: '2-digit', day: '2-digit',
+    hour: '2-digit', minute: '2-digit', second: '2-digit'
+});
+const formattedTimestamps = new Map();
+
+function fmtTs(value) {
+    let text = formattedTimestamps.get(value);
+    if (text === undefined) {
+        text = DATE_TIME_FORMAT.format(new Date(value));
+        if (formattedTimestamps.size >= 5000) formattedTimestamps.clear();
+        formattedTimestamps.set(value, text);
+    }
+    return text;
+}
+
+// Read an NDJSON response body, passing each batch of parsed lines to
+// `onBatch` as it arrives from the network.
+async function readNdjson(response, onBatch) {
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        const items = lines.filter(line => line.trim()).map(line => JSON.parse(line));
+        if (items.length) onBatch(items);
+    }
+    if (buffer.trim()) onBatch([JSON.parse(buffer)]);
+}